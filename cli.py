@@ -1,5 +1,609 @@
-def run_cli():
-    print("La CLI est démarrée. Si vous voyez ce message, manage.py fonctionne !")
+"""
+CLI unifiée de CineExplore : pipeline de données et benchmarks.
+
+    python cli.py schema                  # crée data/imdb.db (--compact : base compacte)
+    python cli.py import                  # importe les CSV (reprise automatique)
+    python cli.py indexes                 # applique create_indexes.sql
+    python cli.py leaderboard             # recalcule les classements Top N (score bayésien)
+    python cli.py history                 # ajoute l'instantané des notes à l'historique (--date)
+    python cli.py graph                   # reconstruit le graphe de collaborations
+    python cli.py suggest                 # reconstruit l'index d'autocomplétion
+    python cli.py fuzzy                   # reconstruit l'index de recherche floue (trigrammes)
+    python cli.py facets                  # reconstruit les bitmaps de la navigation à facettes
+    python cli.py similar                 # précalcule les films similaires (table MovieSimilar, --neighbours)
+    python cli.py snapshot                # exporte l'instantané Arrow/Parquet
+    python cli.py static                  # fichiers statiques hachés et précompressés (--posters : miniatures OMDb)
+    python cli.py replica                 # initialise le Replica Set rs0
+    python cli.py sharded                 # démarre le cluster shardé local (mongos :27030, 2 shards)
+    python cli.py migrate-flat            # SQLite -> collections plates
+    python cli.py migrate-structured      # collections plates -> movies_complete
+    python cli.py prerender               # fragments HTML précalculés de la page Détails (--top-k)
+    python cli.py mongo-indexes --check   # index MongoDB déclarés : création, $indexStats, explain Q1-Q9
+    python cli.py storage --experiment    # tailles par table/index/collection ; pages et compresseurs sur copies
+    python cli.py benchmark sqlite        # sqlite, mongo, compare, analytics, graph, compact, snapshot, leaderboard, history, suggest, fuzzy, facets, breakout, similar, sharding, bulk, prerender
+    python cli.py warmup --compare        # préchauffe les caches, latence 1re requête avant/après
+    python cli.py pipeline                # toutes les étapes dans un seul processus
+
+Les options globales (--db, --csv-dir, --mongo-uri, --mongo-db, --bulk-profile) remplacent les
+chemins et l'URI codés en dur dans les scripts. Les modules lourds (pandas,
+pyarrow, numpy, pymongo) ne sont importés qu'au lancement de la commande :
+`python cli.py --help` est immédiat.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PHASE1_DIR = os.path.join(BASE_DIR, 'scripts', 'phase1_sqlite')
+PHASE2_DIR = os.path.join(BASE_DIR, 'scripts', 'phase2_mongodb')
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+BENCHMARKS = {
+    'sqlite': os.path.join(PHASE1_DIR, 'benchmark.py'),
+    'analytics': os.path.join(PHASE1_DIR, 'benchmark_analytics.py'),
+    'graph': os.path.join(PHASE1_DIR, 'benchmark_graph.py'),
+    'compact': os.path.join(PHASE1_DIR, 'benchmark_compact.py'),
+    'snapshot': os.path.join(PHASE1_DIR, 'benchmark_snapshot.py'),
+    'leaderboard': os.path.join(PHASE1_DIR, 'benchmark_leaderboard.py'),
+    'history': os.path.join(PHASE1_DIR, 'benchmark_rating_history.py'),
+    'suggest': os.path.join(PHASE1_DIR, 'benchmark_suggest.py'),
+    'fuzzy': os.path.join(PHASE1_DIR, 'benchmark_fuzzy.py'),
+    'facets': os.path.join(PHASE1_DIR, 'benchmark_facets.py'),
+    'breakout': os.path.join(PHASE1_DIR, 'benchmark_breakout.py'),
+    'similar': os.path.join(PHASE1_DIR, 'benchmark_similar.py'),
+    'mongo': os.path.join(PHASE2_DIR, 'queries_mongo.py'),
+    'compare': os.path.join(PHASE2_DIR, 'compare_performance.py'),
+    'sharding': os.path.join(PHASE2_DIR, 'benchmark_sharding.py'),
+    'bulk': os.path.join(PHASE2_DIR, 'benchmark_bulk_load.py'),
+    'prerender': os.path.join(PHASE2_DIR, 'benchmark_prerender.py'),
+}
+
+PIPELINE_STAGES = ['schema', 'import', 'indexes', 'leaderboard', 'history', 'graph', 'suggest', 'fuzzy', 'facets', 'similar', 'snapshot', 'static', 'migrate-flat', 'migrate-structured', 'prerender']
+MONGO_STAGES = {'migrate-flat', 'migrate-structured', 'prerender'}
+
+
+def _console():
+    from rich.console import Console
+    return Console()
+
+
+def _script_module(directory, name):
+    """Importe un script de scripts/phaseN (ils s'importent entre eux par nom de fichier)."""
+    import importlib
+    for path in (BASE_DIR, directory):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return importlib.import_module(name)
+
+
+class PipelineContext:
+    """
+    Ressources partagées entre les étapes : une connexion SQLite, un client
+    MongoDB et le validateur d'import (ensembles d'identifiants Movie/Person),
+    ouverts à la première utilisation et réutilisés par les étapes suivantes.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.db_file = args.db
+        self.csv_dir = args.csv_dir
+        # Graphe, index et instantané à côté de la base (data/graph, data/suggest, data/fuzzy, data/facets...)
+        data_dir = os.path.dirname(os.path.abspath(args.db))
+        self.graph_dir = os.path.join(data_dir, 'graph')
+        self.suggest_dir = os.path.join(data_dir, 'suggest')
+        self.fuzzy_dir = os.path.join(data_dir, 'fuzzy')
+        self.facets_dir = os.path.join(data_dir, 'facets')
+        self.snapshot_dir = os.path.join(data_dir, 'snapshot')
+        self._sqlite = None
+        self._mongo = None
+        self.validator = None
+        self.checkpoints = None
+
+    @property
+    def sqlite(self):
+        if self._sqlite is None:
+            import sqlite3
+            self._sqlite = sqlite3.connect(self.db_file)
+        return self._sqlite
+
+    @property
+    def mongo_client(self):
+        if self._mongo is None:
+            from pymongo import MongoClient
+            self._mongo = MongoClient(self.args.mongo_uri, serverSelectionTimeoutMS=5000)
+        return self._mongo
+
+    @property
+    def mongo_db(self):
+        return self.mongo_client[self.args.mongo_db]
+
+    def reset_sqlite(self):
+        if self._sqlite is not None:
+            self._sqlite.close()
+            self._sqlite = None
+        self.validator = self.checkpoints = None
+
+    def close(self):
+        self.reset_sqlite()
+        if self._mongo is not None:
+            self._mongo.close()
+            self._mongo = None
+
+
+# --- Étapes ---------------------------------------------------------------------
+
+def stage_schema(ctx):
+    if ctx.args.compact:
+        compact = _script_module(PHASE1_DIR, 'create_schema_compact')
+        compact.DB_FILE = ctx.db_file
+        compact.COMPACT_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(ctx.db_file)), 'imdb_compact.db')
+        compact.main()
+        return
+    create_schema = _script_module(PHASE1_DIR, 'create_schema')
+    ctx.reset_sqlite()
+    create_schema.reset_database(ctx.db_file)
+
+
+def stage_import(ctx):
+    import_data = _script_module(PHASE1_DIR, 'import_data')
+    import_data.DB_FILE = ctx.db_file
+    import_data.CSV_DIR = ctx.csv_dir
+    import_data.SNAPSHOT_DIR = ctx.snapshot_dir
+    if ctx.validator is None:
+        ctx.checkpoints, ctx.validator = import_data.prepare_import(ctx.sqlite)
+    stats = import_data.import_all(ctx.sqlite, ctx.validator, ctx.checkpoints)
+    import_data.print_import_stats(stats, ctx.validator)
+
+
+def stage_indexes(ctx):
+    apply_indexes = _script_module(PHASE1_DIR, 'apply_indexes')
+    indexes = apply_indexes.apply_indexes(ctx.sqlite)
+    print(f" Indexation complétée ({len(indexes)} index idx_*).")
+
+
+def stage_leaderboard(ctx):
+    from movies.leaderboard import build_leaderboard
+    stats = build_leaderboard(ctx.sqlite)
+    print(f" Classements précalculés : {stats['lists']:,} listes, {stats['rows']:,} lignes "
+          f"(C = {stats['mean_rating']:.2f}, m = {stats['prior_votes']:,} votes)")
+
+
+def stage_history(ctx):
+    from datetime import date
+    from movies.rating_history import record_snapshot
+    snapshot_date = getattr(ctx.args, 'date', None)
+    stats = record_snapshot(ctx.sqlite, date.fromisoformat(snapshot_date) if snapshot_date else None)
+    if stats['skipped']:
+        print(f" Historique des notes : instantané du {stats['date']} déjà enregistré")
+    else:
+        print(f" Historique des notes : {stats['changed']:,} changements sur {stats['movies']:,} films "
+              f"({stats['date']})")
+
+
+def stage_graph(ctx):
+    from movies.collab_graph import build_graph
+    graph = build_graph(ctx.db_file, ctx.csv_dir, ctx.graph_dir)
+    print(f" Graphe de collaborations : {len(graph.person_ids):,} personnes, {len(graph.person_movies):,} crédits")
+
+
+def stage_suggest(ctx):
+    from movies.suggest import build_prefix_index
+    index = build_prefix_index(ctx.db_file, ctx.suggest_dir)
+    print(f" Index d'autocomplétion : {len(index):,} clés, {len(index.heavy):,} préfixes précalculés")
+
+
+def stage_fuzzy(ctx):
+    from movies.fuzzy import build_fuzzy_index
+    index = build_fuzzy_index(ctx.db_file, ctx.fuzzy_dir)
+    print(f" Index de recherche floue : {len(index):,} documents, {len(index.vocabulary):,} trigrammes")
+
+
+def stage_facets(ctx):
+    from movies.facets import build_facet_index
+    index = build_facet_index(ctx.db_file, ctx.facets_dir)
+    print(f" Facettes : {len(index.rows)} bitmaps de {index.num_movies:,} films")
+
+
+def stage_similar(ctx):
+    from movies.collab_graph import CollaborationGraph, build_graph
+    from movies.similar import TOP_K, build_similar
+    if os.path.exists(os.path.join(ctx.graph_dir, 'person_ids.npy')):
+        graph = CollaborationGraph.load(ctx.graph_dir)
+    else:
+        graph = build_graph(ctx.db_file, ctx.csv_dir, ctx.graph_dir)
+    stats = build_similar(ctx.sqlite, graph, top_k=getattr(ctx.args, 'neighbours', 0) or TOP_K)
+    print(f" Films similaires : {stats['rows']:,} voisins pour {stats['with_neighbours']:,}/{stats['movies']:,} films "
+          f"({stats['persons']:,} personnes retenues) en {stats['seconds']:.1f} s")
+
+
+def stage_snapshot(ctx):
+    from movies.snapshot import export_csv_snapshot, export_sqlite_snapshot
+    if getattr(ctx.args, 'source', 'sqlite') == 'csv':
+        stats = export_csv_snapshot(ctx.csv_dir, ctx.snapshot_dir)
+    else:
+        stats = export_sqlite_snapshot(ctx.db_file, ctx.snapshot_dir)
+    print(f" Instantané Arrow/Parquet : {', '.join(f'{t} ({n:,})' for t, n in stats.items())}")
+
+
+def stage_static(ctx):
+    _django_setup(ctx.args)
+    from django.conf import settings
+    from django.core.management import call_command
+    call_command('collectstatic', interactive=False, clear=True, verbosity=0)
+    files = variants = 0
+    for root, _, names in os.walk(settings.STATIC_ROOT):
+        files += sum(1 for name in names if not name.endswith(('.gz', '.br')))
+        variants += sum(1 for name in names if name.endswith(('.gz', '.br')))
+    print(f" Fichiers statiques : {files} fichiers (noms d'origine et hachés), {variants} variantes gzip/brotli "
+          f"dans {settings.STATIC_ROOT}")
+    if settings.DEBUG:
+        print(" DEBUG=True : {% static %} renvoie les noms d'origine et runserver sert /static/ lui-même ; "
+              "lancer le serveur avec CINEEXPLORE_DEBUG=0 pour les noms hachés et les en-têtes de cache")
+    if not getattr(ctx.args, 'posters', False):
+        return
+    if settings.OMDB_STUB:
+        print(" Miniatures des affiches : OMDb bouchonné (CINEEXPLORE_OMDB_STUB), aucun téléchargement")
+        return
+    from movies.leaderboard import top_movies
+    from movies.posters import poster_cache
+    movies = top_movies(10)
+    for movie in movies:
+        poster_cache.poster_url(movie.movie_id)
+    local = sum(1 for movie in movies if poster_cache.local_url(movie.movie_id))
+    print(f" Miniatures des affiches de l'accueil : {local}/{len(movies)} dans {settings.POSTER_DIR}")
+
+
+def stage_replica(ctx):
+    from pymongo import MongoClient
+    setup_replica = _script_module(os.path.join(BASE_DIR, 'scripts'), 'setup_replica')
+    setup_replica.setup(MongoClient(ctx.args.mongo_uri, directConnection=True))
+
+
+def stage_sharded(ctx):
+    setup_sharded = _script_module(os.path.join(BASE_DIR, 'scripts'), 'setup_sharded')
+    setup_sharded.start()
+
+
+def stage_migrate_flat(ctx):
+    import sqlite3
+    migrate_flat = _script_module(PHASE2_DIR, 'migrate_flat')
+    ctx.sqlite.row_factory = sqlite3.Row
+    try:
+        migrate_flat.migrate_all(ctx.mongo_db, ctx.sqlite, ctx.snapshot_dir, getattr(ctx.args, 'restart', False),
+                                 ctx.args.bulk_profile)
+    finally:
+        ctx.sqlite.row_factory = None
+
+
+def stage_migrate_structured(ctx):
+    migrate_structured = _script_module(PHASE2_DIR, 'migrate_structured')
+    db = ctx.mongo_db
+    if not migrate_structured.verify_collections(db):
+        raise RuntimeError("Collections plates manquantes : lancer migrate-flat")
+    migrate_structured.create_indexes(db)
+    if migrate_structured.create_structured_collection_optimized(
+            db, limit=getattr(ctx.args, 'limit', 1000000), batch_size=getattr(ctx.args, 'batch_size', 2000),
+            profile=ctx.args.bulk_profile):
+        migrate_structured.create_indexes(db, ['movies_complete'])
+        if migrate_structured.create_persons_collection(db):
+            migrate_structured.create_indexes(db, ['persons_complete'])
+        # Fragments de la page Détails rendus depuis l'ancienne movies_complete
+        from movies.prerender import invalidate
+        invalidate(ctx.sqlite)
+
+
+def stage_prerender(ctx):
+    _django_setup(ctx.args)
+    from movies.prerender import prerender
+    prerender(ctx.sqlite, ctx.mongo_db.movies_complete, top_k=getattr(ctx.args, 'top_k', 0) or None)
+
+
+STAGES = {
+    'schema': stage_schema,
+    'import': stage_import,
+    'indexes': stage_indexes,
+    'leaderboard': stage_leaderboard,
+    'history': stage_history,
+    'graph': stage_graph,
+    'suggest': stage_suggest,
+    'fuzzy': stage_fuzzy,
+    'facets': stage_facets,
+    'similar': stage_similar,
+    'snapshot': stage_snapshot,
+    'static': stage_static,
+    'replica': stage_replica,
+    'sharded': stage_sharded,
+    'migrate-flat': stage_migrate_flat,
+    'migrate-structured': stage_migrate_structured,
+    'prerender': stage_prerender,
+}
+
+
+def run_stages(names, args):
+    ctx = PipelineContext(args)
+    timings = []
+    try:
+        for name in names:
+            _console().rule(f"[bold]{name}")
+            start = time.perf_counter()
+            STAGES[name](ctx)
+            timings.append((name, time.perf_counter() - start))
+    finally:
+        ctx.close()
+    return timings
+
+
+# --- Commandes --------------------------------------------------------------------
+
+def cmd_stage(args):
+    run_stages([args.command], args)
+
+
+def cmd_pipeline(args):
+    names = PIPELINE_STAGES[PIPELINE_STAGES.index(args.from_stage):]
+    if args.skip_mongo:
+        names = [n for n in names if n not in MONGO_STAGES]
+    args.compact = False
+    timings = run_stages(names, args)
+
+    from rich.table import Table
+    table = Table(title="Pipeline")
+    table.add_column("Étape")
+    table.add_column("Durée (s)", justify="right")
+    for name, seconds in timings:
+        table.add_row(name, f"{seconds:.2f}")
+    table.add_row("[bold]total", f"[bold]{sum(s for _, s in timings):.2f}")
+    _console().print(table)
+
+
+def _django_setup(args):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ['CINEEXPLORE_SQLITE_DB'] = os.path.abspath(args.db)
+    import django
+    django.setup()
+
+
+def cmd_warmup(args):
+    import json
+    _django_setup(args)
+    from movies import warmup
+
+    if args.probe:
+        print(json.dumps(warmup.measure_first_requests(args.urls)))
+        return
+
+    before = None
+    if args.compare:
+        # Premières requêtes sans préchauffage, dans un processus neuf
+        import subprocess
+        probe = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--db', args.db, 'warmup', '--probe', '--urls', *args.urls],
+            capture_output=True, text=True, check=True)
+        before = json.loads(probe.stdout.strip().splitlines()[-1])
+
+    report = warmup.warm_up(verbose=False)
+
+    from rich.table import Table
+    table = Table(title="Préchauffage")
+    table.add_column("Étape")
+    table.add_column("Durée (ms)", justify="right")
+    table.add_column("Détail")
+    for name, elapsed_ms, detail in report:
+        table.add_row(name, f"{elapsed_ms:.0f}", detail)
+    table.add_row("[bold]total", f"[bold]{sum(ms for _, ms, _ in report):.0f}", "")
+    _console().print(table)
+
+    if args.compare:
+        after = warmup.measure_first_requests(args.urls)
+        fmt = lambda ms: f"{ms:.1f}" if ms is not None else "erreur"
+        table = Table(title="Première requête (ms)")
+        table.add_column("Page")
+        table.add_column("Sans préchauffage", justify="right")
+        table.add_column("Après préchauffage", justify="right")
+        for url in args.urls:
+            table.add_row(url, fmt(before.get(url)), fmt(after.get(url)))
+        _console().print(table)
+
+
+def cmd_mongo_indexes(args):
+    from pymongo import MongoClient
+    from rich.table import Table
+    from movies import mongo_indexes
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    try:
+        db = client[args.mongo_db]
+        if not args.check:
+            mongo_indexes.sync_indexes(db, drop_undeclared=args.drop_undeclared)
+            return
+        queries_mongo = _script_module(PHASE2_DIR, 'queries_mongo')
+        report = mongo_indexes.check_indexes(db, queries_mongo.workload())
+    finally:
+        client.close()
+
+    table = Table(title="Plans Q1-Q9 (explain)")
+    table.add_column("Requête")
+    table.add_column("Index utilisés")
+    table.add_column("COLLSCAN")
+    for query, indexes, collscan, missing in report["plans"]:
+        flag = "[red]oui (index manquant)" if missing else ("oui" if collscan else "")
+        table.add_row(query, ", ".join(indexes) or "-", flag)
+    _console().print(table)
+
+    table = Table(title=f"Index ($indexStats sur {', '.join(report['hosts']) or 'aucun membre'})")
+    table.add_column("Constat")
+    table.add_column("Index")
+    for label, key in (("manquant", "missing"), ("non déclaré", "undeclared"), ("inutilisé", "unused")):
+        for collection, name in report[key]:
+            table.add_row(label, f"{collection}.{name}")
+    _console().print(table)
+
+
+def _mb(size):
+    return f"{size / 1e6:,.1f}"
+
+
+def cmd_storage(args):
+    import sqlite3
+    from rich.table import Table
+    from movies import storage_report
+
+    conn = sqlite3.connect(args.db)
+    try:
+        summary = storage_report.sqlite_summary(conn)
+        objects = storage_report.sqlite_objects(conn)
+    finally:
+        conn.close()
+
+    table = Table(title=f"SQLite {args.db} : {_mb(summary['bytes'])} Mo, pages de {summary['page_size']} o, "
+                        f"{_mb(summary['free_bytes'])} Mo libres (VACUUM), cache {_mb(summary['cache_bytes'])} Mo")
+    table.add_column("Table")
+    table.add_column("Données (Mo)", justify="right")
+    table.add_column("Index (Mo)", justify="right")
+    table.add_column("Total (Mo)", justify="right")
+    for name, (data, indexes) in storage_report.sqlite_tables(objects).items():
+        table.add_row(name, _mb(data), _mb(indexes), _mb(data + indexes))
+    _console().print(table)
+
+    table = Table(title="SQLite : tables et index (dbstat)")
+    table.add_column("Objet")
+    table.add_column("Type")
+    table.add_column("Pages", justify="right")
+    table.add_column("Taille (Mo)", justify="right")
+    table.add_column("Remplissage", justify="right")
+    for obj in objects[:args.top]:
+        table.add_row(obj["name"], obj["type"], f"{obj['pages']:,}", _mb(obj["bytes"]), f"{obj['fill'] * 100:.0f} %")
+    _console().print(table)
+
+    if not args.skip_mongo:
+        from pymongo import MongoClient
+        from pymongo.errors import PyMongoError
+        client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=2000)
+        try:
+            report = storage_report.mongo_report(client[args.mongo_db])
+        except PyMongoError as e:
+            report = None
+            _console().print(f"[yellow]MongoDB injoignable ({args.mongo_uri}), rapport ignoré ({type(e).__name__})")
+        finally:
+            client.close()
+        if report is not None:
+            table = Table(title=f"MongoDB {args.mongo_db} ($collStats)")
+            table.add_column("Collection")
+            table.add_column("Documents", justify="right")
+            table.add_column("Données (Mo)", justify="right")
+            table.add_column("Disque (Mo)", justify="right")
+            table.add_column("Compresseur")
+            table.add_column("Index (Mo)", justify="right")
+            table.add_column("Réutilisable (Mo)", justify="right")
+            table.add_column("En cache (Mo)", justify="right")
+            for name, stats in report.items():
+                table.add_row(name, f"{stats['count']:,}", _mb(stats["size"]), _mb(stats["storage"]),
+                              stats["compressor"] or "-", _mb(stats["index_bytes"]), _mb(stats["free"]),
+                              _mb(stats["cache"]))
+            _console().print(table)
+
+    if args.experiment:
+        _script_module(PHASE1_DIR, 'benchmark_storage').main(args.db)
+        if not args.skip_mongo:
+            _script_module(PHASE2_DIR, 'benchmark_compression').main(args.mongo_uri, args.mongo_db)
+
+
+def cmd_benchmark(args):
+    import runpy
+    path = BENCHMARKS[args.name]
+    for directory in (BASE_DIR, os.path.dirname(path)):
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    runpy.run_path(path, run_name='__main__')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Pipeline de données et benchmarks CineExplore")
+    parser.add_argument('--db', default=os.path.join(DATA_DIR, 'imdb.db'), help="base SQLite (défaut : data/imdb.db)")
+    parser.add_argument('--csv-dir', default=os.path.join(DATA_DIR, 'csv'), help="répertoire des CSV bruts")
+    parser.add_argument('--mongo-uri', default="mongodb://localhost:27017/")
+    parser.add_argument('--mongo-db', default="cineexplorer_db")
+    parser.add_argument('--bulk-profile', choices=('safe', 'balanced', 'fast'), default=None,
+                        help="write concern et lots des migrations (défaut : CINEEXPLORE_BULK_PROFILE ou balanced)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('schema', help="crée le schéma SQLite (supprime la base existante)")
+    p.add_argument('--compact', action='store_true', help="construit data/imdb_compact.db depuis --db")
+    sub.add_parser('import', help="importe les CSV (ou l'instantané) dans SQLite")
+    sub.add_parser('indexes', help="applique create_indexes.sql")
+    sub.add_parser('leaderboard', help="recalcule les classements Top N par genre/décennie")
+    p = sub.add_parser('history', help="ajoute l'état de Rating à l'historique des notes")
+    p.add_argument('--date', help="date de l'instantané (AAAA-MM-JJ, défaut : aujourd'hui)")
+    sub.add_parser('graph', help="reconstruit le graphe de collaborations")
+    sub.add_parser('suggest', help="reconstruit l'index de préfixes de l'autocomplétion")
+    sub.add_parser('fuzzy', help="reconstruit l'index de trigrammes de la recherche floue")
+    sub.add_parser('facets', help="reconstruit les bitmaps de la navigation à facettes")
+    p = sub.add_parser('similar', help="précalcule les K films similaires de chaque film (table MovieSimilar)")
+    p.add_argument('--neighbours', type=int, default=0, help="voisins par film (0 : movies/similar.py TOP_K)")
+    p = sub.add_parser('snapshot', help="exporte l'instantané Arrow/Parquet")
+    p.add_argument('--source', choices=('sqlite', 'csv'), default='sqlite')
+    p = sub.add_parser('static', help="collectstatic : noms hachés, variantes gzip/brotli")
+    p.add_argument('--posters', action='store_true',
+                   help="télécharge aussi les miniatures des affiches de l'accueil (OMDb, réseau requis)")
+    sub.add_parser('replica', help="initialise le Replica Set rs0")
+    sub.add_parser('sharded', help="démarre un cluster shardé local (config server, 2 shards, mongos)")
+    p = sub.add_parser('migrate-flat', help="copie les tables SQLite en collections plates")
+    p.add_argument('--restart', action='store_true', help="ignore les points de reprise")
+    p = sub.add_parser('migrate-structured', help="construit movies_complete")
+    p.add_argument('--limit', type=int, default=1000000)
+    p.add_argument('--batch-size', type=int, default=2000)
+    p = sub.add_parser('prerender', help="rend les fragments de la page Détails dans la base SQLite")
+    p.add_argument('--top-k', type=int, default=0, help="films les plus votés seulement (0 : tous)")
+    for name in STAGES:
+        sub.choices[name].set_defaults(func=cmd_stage)
+
+    p = sub.add_parser('mongo-indexes', help="crée les index MongoDB déclarés dans movies/mongo_indexes.py")
+    p.add_argument('--check', action='store_true',
+                   help="compare aux index présents, à $indexStats et aux plans des requêtes Q1-Q9")
+    p.add_argument('--drop-undeclared', action='store_true', help="supprime les index absents de la déclaration")
+    p.set_defaults(func=cmd_mongo_indexes)
+
+    p = sub.add_parser('storage', help="occupation disque et cache des tables, index et collections")
+    p.add_argument('--experiment', action='store_true',
+                   help="copies VACUUM / tailles de page (SQLite) et compresseurs (MongoDB), avec temps Q1-Q9")
+    p.add_argument('--skip-mongo', action='store_true', help="SQLite seulement")
+    p.add_argument('--top', type=int, default=20, help="nombre d'objets SQLite détaillés")
+    p.set_defaults(func=cmd_storage)
+
+    p = sub.add_parser('benchmark', help="lance un benchmark")
+    p.add_argument('name', choices=sorted(BENCHMARKS))
+    p.set_defaults(func=cmd_benchmark)
+
+    p = sub.add_parser('warmup', help="préchauffe SQLite, MongoDB et les caches applicatifs")
+    p.add_argument('--compare', action='store_true',
+                   help="mesure la première requête de chaque page sans puis avec préchauffage")
+    p.add_argument('--urls', nargs='+', default=['/', '/movies/', '/stats/'])
+    p.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    p.set_defaults(func=cmd_warmup)
+
+    p = sub.add_parser('pipeline', help="enchaîne toutes les étapes dans un seul processus")
+    p.add_argument('--from', dest='from_stage', choices=PIPELINE_STAGES, default='schema',
+                   help="reprend à partir de cette étape")
+    p.add_argument('--skip-mongo', action='store_true', help="s'arrête après les étapes SQLite")
+    p.add_argument('--batch-size', type=int, default=2000)
+    p.add_argument('--limit', type=int, default=1000000)
+    p.add_argument('--top-k', type=int, default=0, help="fragments précalculés des K films les plus votés (0 : tous)")
+    p.add_argument('--neighbours', type=int, default=0, help="films similaires par film (0 : valeur par défaut)")
+    p.add_argument('--posters', action='store_true', help="étape static : télécharge les miniatures des affiches")
+    p.set_defaults(func=cmd_pipeline)
+    return parser
+
+
+def run_cli(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except Exception as e:
+        _console().print(f"[red]Échec de « {args.command} » : {type(e).__name__}: {e}")
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     run_cli()
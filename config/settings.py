@@ -4,8 +4,10 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = "django-insecure-votre-cle-secrete-ici"
-DEBUG = True
-ALLOWED_HOSTS = []
+# CINEEXPLORE_DEBUG=0 : noms hachés de {% static %} et /static/ servi par movies/static_assets.py
+# (avec DEBUG, runserver sert /static/ lui-même et {% static %} renvoie les noms d'origine)
+DEBUG = os.environ.get("CINEEXPLORE_DEBUG", "1") == "1"
+ALLOWED_HOSTS = os.environ.get("CINEEXPLORE_ALLOWED_HOSTS", "localhost,127.0.0.1,[::1]").split(",")
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -25,6 +27,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "movies.instrumentation.RequestMetricsMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -51,7 +54,8 @@ WSGI_APPLICATION = "config.wsgi.application"
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'data' / 'imdb.db',
+        # CINEEXPLORE_SQLITE_DB=data/imdb_compact.db pour le schéma compact (vues de compatibilité)
+        'NAME': os.environ.get('CINEEXPLORE_SQLITE_DB', BASE_DIR / 'data' / 'imdb.db'),
         'OPTIONS': {
             'init_command': 'PRAGMA foreign_keys = OFF;',
             'timeout': 20,
@@ -63,6 +67,39 @@ DATABASES = {
 MONGO_URI = "mongodb://localhost:27017/?replicaSet=rs0"
 MONGO_DB_NAME = "cineexplorer_db" 
 
+# OMDb : CINEEXPLORE_OMDB_STUB=1 coupe les appels réseau (tests de charge, hors ligne)
+OMDB_API_KEY = os.environ.get("OMDB_API_KEY", "7fca3f7f")
+OMDB_STUB = os.environ.get("CINEEXPLORE_OMDB_STUB") == "1"
+OMDB_CACHE_SIZE = 5000
+
+# Préchauffage (movies/warmup.py) au démarrage du serveur : CINEEXPLORE_WARMUP=1
+WARMUP_ON_STARTUP = os.environ.get("CINEEXPLORE_WARMUP") == "1"
+WARMUP_TOP_DOCUMENTS = 1000
+
+# Vues asynchrones (ASGI) : CINEEXPLORE_ASYNC_VIEWS=1, pool de threads dédié à SQLite
+ASYNC_VIEWS = os.environ.get("CINEEXPLORE_ASYNC_VIEWS") == "1"
+SQLITE_EXECUTOR_WORKERS = 8
+
+# Moteur analytique en mémoire (NumPy) pour la page Statistiques
+ANALYTICS_ENGINE = os.environ.get("CINEEXPLORE_ANALYTICS_ENGINE") == "1"
+# Instantané Arrow/Parquet (movies/snapshot.py), chargé par le moteur s'il existe
+SNAPSHOT_DIR = BASE_DIR / "data" / "snapshot"
+# Index de préfixes de l'autocomplétion (movies/suggest.py), mappé en mémoire au démarrage
+SUGGEST_DIR = BASE_DIR / "data" / "suggest"
+SUGGEST_MAX_RESULTS = 20
+# Recherche floue par trigrammes (movies/fuzzy.py) ; CINEEXPLORE_FUZZY_SEARCH=0 revient à icontains
+FUZZY_SEARCH = os.environ.get("CINEEXPLORE_FUZZY_SEARCH", "1") == "1"
+FUZZY_DIR = BASE_DIR / "data" / "fuzzy"
+# Bitmaps de la navigation à facettes (movies/facets.py)
+FACETS_DIR = BASE_DIR / "data" / "facets"
+# Page Détails servie depuis les fragments précalculés (movies/prerender.py, python cli.py prerender)
+PRERENDERED_DETAIL = os.environ.get("CINEEXPLORE_PRERENDERED_DETAIL", "1") == "1"
+
+# Instrumentation (movies/instrumentation.py)
+METRICS_WINDOW = 1000
+N_PLUS_ONE_THRESHOLD = 10
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -77,5 +114,16 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# python cli.py static : noms hachés + variantes .gz/.br, servis par movies/static_assets.py
+STATIC_ROOT = BASE_DIR / "data" / "static"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "movies.static_assets.PrecompressedManifestStorage"},
+}
+STATIC_MAX_AGE = 365 * 24 * 3600
+STATIC_REVALIDATE_AGE = 60
+# Miniatures des affiches OMDb (movies/posters.py)
+POSTER_DIR = BASE_DIR / "data" / "posters"
+POSTER_THUMB_SIZE = (300, 450)
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
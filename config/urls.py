@@ -6,10 +6,15 @@ The `urlpatterns` list routes URLs to views. For more information please see:
 """
 
 from django.contrib import admin
-from django.urls import path, include 
+from django.urls import path, include, re_path
+
+from movies.static_assets import serve, serve_poster
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # Fichiers de STATIC_ROOT et miniatures, avec Cache-Control long (python cli.py static)
+    re_path(r"^static/(?P<path>.+)$", serve),
+    re_path(r"^posters/(?P<path>.+)$", serve_poster),
     
     
     path("", include("movies.urls")), 
@@ -0,0 +1,250 @@
+"""
+Moteur analytique en mémoire (colonnes NumPy) pour les agrégats Q5, Q7 et la
+page Statistiques.
+
+Movie, Rating et MovieGenre sont chargés une seule fois depuis SQLite dans des
+tableaux alignés sur un ordinal de film dense (0..N-1). Les colonnes textuelles
+répétitives (genre, titleType) sont encodées par dictionnaire : un tableau
+d'entiers + la liste triée des valeurs, ce qui rend l'ordre des codes identique
+à l'ordre alphabétique de SQLite.
+
+Les requêtes sont des noyaux vectorisés (bincount, lexsort, masques) au lieu de
+jointures ligne à ligne. Ce module n'importe pas Django : les scripts peuvent
+l'utiliser directement avec un chemin de base, ou avec un instantané Arrow
+(movies/snapshot.py) pour ne pas parcourir SQLite.
+"""
+
+import sqlite3
+import threading
+
+import numpy as np
+
+from movies import snapshot
+
+MISSING_YEAR = -1
+
+
+def _encode(values):
+    """Encodage par dictionnaire : (codes int32, valeurs triées)."""
+    labels, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return codes.astype(np.int32), labels.tolist()
+
+
+class AnalyticsEngine:
+
+    def __init__(self, db_path, snapshot_dir=None):
+        self.db_path = str(db_path)
+        self.snapshot_dir = snapshot_dir
+        self.load()
+
+    def _use_snapshot(self):
+        sources = snapshot.sqlite_sources(self.db_path)
+        return self.snapshot_dir is not None and all(
+            snapshot.is_fresh(t, sources, self.snapshot_dir) for t in ("Movie", "Rating", "MovieGenre"))
+
+    def load(self):
+        """(Re)charge les colonnes depuis l'instantané s'il est complet et à jour, sinon depuis SQLite."""
+        if self._use_snapshot():
+            movies = sorted(snapshot.load_rows(
+                "Movie", ["movie_id", "titleType", "primaryTitle", "startYear", "runtimeMinutes"], self.snapshot_dir))
+            ratings = snapshot.load_rows("Rating", ["movie_id", "averageRating", "numVotes"], self.snapshot_dir)
+            movie_genres = snapshot.load_rows("MovieGenre", ["movie_id", "genre_name"], self.snapshot_dir)
+        else:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                movies = conn.execute(
+                    "SELECT movie_id, titleType, primaryTitle, startYear, runtimeMinutes FROM Movie ORDER BY movie_id"
+                ).fetchall()
+                ratings = conn.execute("SELECT movie_id, averageRating, numVotes FROM Rating").fetchall()
+                movie_genres = conn.execute("SELECT movie_id, genre_name FROM MovieGenre").fetchall()
+            finally:
+                conn.close()
+
+        self.movie_ids = np.array([m[0] for m in movies], dtype=object)
+        self.ordinal = {mid: i for i, mid in enumerate(self.movie_ids)}
+        n = len(self.movie_ids)
+
+        self.title_type, self.title_types = _encode([m[1] if m[1] is not None else "" for m in movies])
+        self.title = np.array([m[2] for m in movies], dtype=object)
+        self.year = np.array([m[3] if m[3] is not None else MISSING_YEAR for m in movies], dtype=np.int32)
+        self.runtime = np.array([m[4] if m[4] is not None else -1 for m in movies], dtype=np.int32)
+
+        # Rating (1:1) aligné sur l'ordinal du film ; has_rating = jointure interne possible
+        self.rating = np.full(n, np.nan, dtype=np.float64)
+        self.votes = np.zeros(n, dtype=np.int64)
+        self.has_rating = np.zeros(n, dtype=bool)
+        for mid, average, votes in ratings:
+            i = self.ordinal.get(mid)
+            if i is None:
+                continue
+            self.has_rating[i] = True
+            if average is not None:
+                self.rating[i] = average
+            self.votes[i] = votes or 0
+
+        # MovieGenre (N:M) sous forme de liste d'arêtes (ordinal film, code genre)
+        pairs = [(self.ordinal[mid], g) for mid, g in movie_genres if mid in self.ordinal and g is not None]
+        self.mg_movie = np.array([p[0] for p in pairs], dtype=np.int32)
+        self.mg_genre, self.genres = _encode([p[1] for p in pairs])
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    # --- Noyaux génériques -------------------------------------------------
+
+    def group_by(self, key, value=None, agg="count", mask=None):
+        """
+        Agrégat groupé vectorisé.
+
+        Args:
+            key: 'genre', 'titleType' ou 'decade'
+            value: None, 'averageRating', 'numVotes' ou 'runtimeMinutes'
+            agg: 'count', 'sum' ou 'mean'
+            mask: masque booléen optionnel sur les films (longueur num_movies)
+        Returns:
+            dict {libellé: valeur} (groupes vides omis)
+        """
+        if key == "genre":
+            movie_idx, codes, labels = self.mg_movie, self.mg_genre, self.genres
+        else:
+            movie_idx = np.arange(self.num_movies)
+            if key == "titleType":
+                codes, labels = self.title_type, self.title_types
+            elif key == "decade":
+                valid = self.year != MISSING_YEAR
+                decades = np.where(valid, (self.year // 10) * 10, -1)
+                labels = sorted(set(decades[valid].tolist()))
+                codes = np.searchsorted(labels, decades).astype(np.int32)
+                movie_idx = movie_idx[valid]
+                codes = codes[valid]
+            else:
+                raise ValueError(f"Clé de regroupement inconnue : {key}")
+
+        keep = np.ones(len(movie_idx), dtype=bool)
+        if mask is not None:
+            keep &= mask[movie_idx]
+        if value is not None:
+            column = self._column(value)
+            keep &= ~np.isnan(column[movie_idx])
+        movie_idx, codes = movie_idx[keep], codes[keep]
+
+        counts = np.bincount(codes, minlength=len(labels))
+        if agg == "count" or value is None:
+            result = counts
+        else:
+            sums = np.bincount(codes, weights=column[movie_idx], minlength=len(labels))
+            if agg == "sum":
+                result = sums
+            elif agg == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    result = sums / counts
+            else:
+                raise ValueError(f"Agrégat inconnu : {agg}")
+        return {labels[c]: result[c].item() for c in np.flatnonzero(counts)}
+
+    def histogram(self, column="averageRating", bins=20, genre=None, mask=None):
+        """Histogramme d'une colonne numérique, éventuellement restreint à un genre."""
+        values = self._column(column)
+        selected = ~np.isnan(values)
+        if mask is not None:
+            selected &= mask
+        if genre is not None:
+            in_genre = np.zeros(self.num_movies, dtype=bool)
+            if genre in self.genres:
+                in_genre[self.mg_movie[self.mg_genre == self.genres.index(genre)]] = True
+            selected &= in_genre
+        counts, edges = np.histogram(values[selected], bins=bins)
+        return counts.tolist(), edges.tolist()
+
+    def top_k_per_genre(self, k=3, min_votes=1000, title_type="movie"):
+        """
+        Top-k par genre avec la sémantique de RANK() OVER (PARTITION BY genre
+        ORDER BY averageRating DESC, numVotes DESC) : les ex aequo partagent un rang.
+
+        Returns:
+            liste de tuples (genre_name, primaryTitle, averageRating, rank)
+        """
+        m = self.mg_movie
+        keep = self.has_rating[m] & (self.votes[m] > min_votes)
+        if title_type is not None:
+            code = self.title_types.index(title_type) if title_type in self.title_types else -1
+            keep &= self.title_type[m] == code
+        m, g = m[keep], self.mg_genre[keep]
+        rating, votes = self.rating[m], self.votes[m]
+
+        # Tri par genre, puis note décroissante, puis votes décroissants
+        order = np.lexsort((-votes, -np.nan_to_num(rating, nan=-np.inf), g))
+        m, g, rating, votes = m[order], g[order], rating[order], votes[order]
+        if len(m) == 0:
+            return []
+
+        position = np.arange(len(m))
+        group_start = np.r_[True, g[1:] != g[:-1]]
+        new_value = group_start | np.r_[True, (rating[1:] != rating[:-1]) | (votes[1:] != votes[:-1])]
+        first_of_group = np.maximum.accumulate(np.where(group_start, position, 0))
+        first_of_value = np.maximum.accumulate(np.where(new_value, position, 0))
+        rank = first_of_value - first_of_group + 1
+
+        sel = rank <= k
+        return [
+            (self.genres[gc], self.title[mi], float(r), int(rk))
+            for gc, mi, r, rk in zip(g[sel], m[sel], rating[sel], rank[sel])
+        ]
+
+    def _column(self, name):
+        if name == "averageRating":
+            return self.rating
+        if name == "numVotes":
+            return np.where(self.has_rating, self.votes, np.nan).astype(np.float64)
+        if name == "runtimeMinutes":
+            return np.where(self.runtime >= 0, self.runtime, np.nan).astype(np.float64)
+        if name == "startYear":
+            return np.where(self.year != MISSING_YEAR, self.year, np.nan).astype(np.float64)
+        raise ValueError(f"Colonne inconnue : {name}")
+
+    # --- Requêtes du projet ------------------------------------------------
+
+    def popular_genres(self, min_avg=7.0, min_count=50):
+        """
+        Équivalent de query_popular_genres (Q5).
+
+        Returns:
+            liste de tuples (genre_name, avg_rating, film_count)
+        """
+        counts = self.group_by("genre", mask=self.has_rating)
+        averages = self.group_by("genre", "averageRating", "mean", mask=self.has_rating)
+        rows = [
+            (genre, averages[genre], count)
+            for genre, count in counts.items()
+            if genre in averages and averages[genre] > min_avg and count > min_count
+        ]
+        return sorted(rows, key=lambda r: (-r[1], -r[2]))
+
+    def genre_ranking(self):
+        """Équivalent de query_genre_ranking (Q7) : top 3 par genre, votes > 1000, films."""
+        return self.top_k_per_genre(k=3, min_votes=1000, title_type="movie")
+
+    def genre_counts(self, limit=10):
+        """Nombre de films par genre (page Statistiques), même format que MongoService.get_genre_stats."""
+        counts = self.group_by("genre")
+        top = sorted(counts.items(), key=lambda item: -item[1])[:limit]
+        return [{"name": genre, "count": count} for genre, count in top]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(db_path=None, snapshot_dir=None):
+    """Instance partagée, chargée une seule fois (chemin par défaut : base Django et son instantané)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if db_path is None:
+                    from django.conf import settings
+                    db_path = settings.DATABASES['default']['NAME']
+                    snapshot_dir = getattr(settings, 'SNAPSHOT_DIR', None)
+                _engine = AnalyticsEngine(db_path, snapshot_dir)
+    return _engine
@@ -0,0 +1,32 @@
+import os
+import sys
+
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class MoviesConfig(AppConfig):
+    name = 'movies'
+
+    def ready(self):
+        from .facets import get_facet_index, has_facet_index
+        from .fuzzy import get_fuzzy_index, has_fuzzy_index
+        from .suggest import get_prefix_index, has_prefix_index
+        # Index de recherche : simple mmap, les premières requêtes ne paient pas le chargement
+        if has_prefix_index(str(settings.SUGGEST_DIR)):
+            get_prefix_index()
+        if settings.FUZZY_SEARCH and has_fuzzy_index(str(settings.FUZZY_DIR)):
+            get_fuzzy_index()
+        if has_facet_index(str(settings.FACETS_DIR)):
+            get_facet_index()
+        if not settings.WARMUP_ON_STARTUP:
+            return
+        # Commandes manage.py autres que runserver (migrate, shell...) : rien à préchauffer,
+        # et pour runserver seul le processus fils du rechargeur (RUN_MAIN) sert les requêtes
+        if os.path.basename(sys.argv[0]) == 'manage.py':
+            if sys.argv[1:2] != ['runserver']:
+                return
+            if '--noreload' not in sys.argv and os.environ.get('RUN_MAIN') != 'true':
+                return
+        from .warmup import start_background_warmup
+        start_background_warmup()
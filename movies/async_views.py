@@ -0,0 +1,127 @@
+"""
+Versions asynchrones (ASGI) des vues de movies/views.py.
+
+- MongoDB : driver PyMongo async (AsyncMongoService).
+- SQLite : l'ORM Django reste synchrone, les requêtes passent donc par un pool de
+  threads dédié (SQLITE_EXECUTOR_WORKERS) au lieu de bloquer la boucle d'événements.
+  Chaque tâche est encadrée par close_old_connections(), comme une requête
+  Django : les connexions par thread du pool sont recyclées (CONN_MAX_AGE,
+  connexion en erreur) au lieu de vivre aussi longtemps que le thread.
+- OMDb : client httpx asynchrone.
+
+Les accès indépendants d'une même requête sont lancés en parallèle avec
+asyncio.gather, si bien qu'un seul worker ASGI sert plusieurs requêtes en vol.
+Activées par CINEEXPLORE_ASYNC_VIEWS=1 (voir movies/urls.py).
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from .analytics_engine import get_engine
+from .fuzzy import search_movies
+from .leaderboard import top_movies as leaderboard_top_movies
+from .models import Movie
+from .mongo_service import async_mongo_service
+from .posters import poster_cache
+from .prerender import get_fragment_store
+
+sqlite_executor = ThreadPoolExecutor(
+    max_workers=settings.SQLITE_EXECUTOR_WORKERS,
+    thread_name_prefix="sqlite",
+)
+
+
+def _with_connections(func, *args):
+    """Cycle de vie des connexions d'une requête Django, autour d'une tâche du pool."""
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_sqlite(func, *args):
+    """Exécute `func` dans le pool SQLite en conservant le contexte (instrumentation)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(sqlite_executor, context.run, _with_connections, func, *args)
+
+
+def _top_movies():
+    return leaderboard_top_movies(10)
+
+
+def _movie_page(page_number):
+    movie_queryset = Movie.objects.select_related('rating').order_by('-rating__numVotes')
+    page_obj = Paginator(movie_queryset, 20).get_page(page_number)
+    page_obj.object_list = list(page_obj.object_list)
+    return page_obj
+
+
+def _prerendered_page(tconst):
+    return get_fragment_store().page(tconst)
+
+
+def _search_movies(query):
+    return search_movies(query, 20)
+
+
+async def home(request):
+    """Top 10 (pool SQLite) puis les 10 affiches OMDb récupérées en parallèle"""
+    top_movies = await run_sqlite(_top_movies)
+
+    posters = await asyncio.gather(*(poster_cache.aposter_url(m.movie_id) for m in top_movies))
+    for movie, poster in zip(top_movies, posters):
+        movie.poster_url = poster
+
+    return render(request, 'movies/home.html', {'top_movies': top_movies})
+
+
+async def movie_list(request):
+    page_obj = await run_sqlite(_movie_page, request.GET.get('page'))
+    return render(request, 'movies/list.html', {'movies': page_obj})
+
+
+async def movie_detail(request, tconst):
+    if settings.PRERENDERED_DETAIL:
+        page = await run_sqlite(_prerendered_page, tconst)
+        if page is not None:
+            return HttpResponse(page)
+    movie = await async_mongo_service.get_movie_by_id(tconst)
+    return render(request, 'movies/detail.html', {'movie': movie})
+
+
+async def search_view(request):
+    query = request.GET.get('q', '')
+
+    movies = await run_sqlite(_search_movies, query) if query else []
+    return render(request, 'movies/search.html', {'movies': movies, 'query': query})
+
+
+async def stats_view(request):
+    if settings.ANALYTICS_ENGINE:
+        genre_data = (await run_sqlite(get_engine)).genre_counts()
+    else:
+        genre_data = await async_mongo_service.get_genre_stats()
+    return render(request, 'movies/stats.html', {'genre_data': genre_data})
+
+
+async def test_stats_view(request):
+    """Comptages MongoDB et SQLite lancés en parallèle"""
+    nb_mongo, nb_sqlite = await asyncio.gather(
+        async_mongo_service.get_movies_count(),
+        run_sqlite(Movie.objects.count),
+    )
+    context = {
+        'count_mongo': nb_mongo,
+        'count_sqlite': nb_sqlite,
+        'infra_status': "Opérationnel"
+    }
+    return render(request, 'movies/test_stats.html', context)
@@ -0,0 +1,190 @@
+"""
+Détection des carrières « percée » (Q8) : le premier film à succès d'une
+personne, après une série de films peu vus.
+
+Pour chaque personne (acteur, actrice, réalisateur), ses films sont pris
+dans l'ordre chronologique (startYear, puis movie_id). Le film de la percée
+est le premier dont le nombre de votes atteint `threshold` ; il compte si la
+personne a au moins `min_low_films` films sortis les années précédentes, tous
+sous le seuil par construction. Les films de la même année que la percée ne
+comptent pas dans la série : l'ordre entre eux n'est pas connu.
+
+Les crédits sont lus par lots, triés par personne puis année en NumPy, et
+traités par segments (un segment = les films d'une personne) : premier film
+au-dessus du seuil par minimum.reduceat, longueur de la série et maximum des
+votes précédents par add/maximum.reduceat, sans boucle Python par personne.
+
+reference_breakouts() calcule le même résultat en SQL (fenêtre + sous-requêtes
+corrélées) ; scripts/phase1_sqlite/benchmark_breakout.py compare les deux sur
+toute la base.
+"""
+
+import numpy as np
+
+THRESHOLD = 200000
+MIN_LOW_FILMS = 3
+CATEGORIES = ("actor", "actress", "director")
+FETCH_SIZE = 100000
+
+_MOVIES_SQL = """
+    SELECT m.movie_id, m.startYear, r.numVotes
+    FROM Movie m JOIN Rating r ON r.movie_id = m.movie_id
+    WHERE m.startYear IS NOT NULL AND r.numVotes IS NOT NULL
+    ORDER BY m.movie_id
+"""
+_PRINCIPALS_SQL = "SELECT person_id, movie_id FROM MoviePrincipal WHERE category IN ({categories})"
+
+
+def load_credits(conn, categories=CATEGORIES):
+    """
+    Crédits (personne, film) lus par lots de FETCH_SIZE lignes, joints en
+    NumPy à l'année et aux votes du film (recherche dichotomique dans les
+    movie_id triés) au lieu d'une jointure SQL ligne à ligne.
+
+    Returns:
+        (person_ids, movie_ids) valeurs distinctes triées, et tableaux
+        (person, year, votes, movie) de codes / valeurs, une ligne par crédit
+    """
+    movies = conn.execute(_MOVIES_SQL).fetchall()
+    movie_ids = np.array([row[0] for row in movies], dtype=str)
+    movie_year = np.array([row[1] for row in movies], dtype=np.int32)
+    movie_votes = np.array([row[2] for row in movies], dtype=np.int64)
+
+    cursor = conn.execute(_PRINCIPALS_SQL.format(categories=", ".join("?" * len(categories))), categories)
+    persons, movie_codes = [], []
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        person, movie = zip(*rows)
+        movie = np.array(movie, dtype=str)
+        # Films sans année ou sans note : absents de movie_ids, crédit ignoré
+        code = np.minimum(np.searchsorted(movie_ids, movie), max(len(movie_ids) - 1, 0))
+        found = movie_ids[code] == movie if len(movie_ids) else np.zeros(len(movie), dtype=bool)
+        persons.append(np.array(person, dtype=str)[found])
+        movie_codes.append(code[found])
+    if not persons:
+        empty = np.zeros(0, dtype=np.int64)
+        return [], movie_ids.tolist(), empty, empty.astype(np.int32), empty, empty
+    person_ids, person = np.unique(np.concatenate(persons), return_inverse=True)
+    movie = np.concatenate(movie_codes).astype(np.int64)
+    return person_ids.tolist(), movie_ids.tolist(), person.astype(np.int64), movie_year[movie], movie_votes[movie], movie
+
+
+def detect(person, year, votes, movie, threshold=THRESHOLD, min_low_films=MIN_LOW_FILMS):
+    """
+    Noyau vectorisé sur les crédits (codes de load_credits).
+
+    Returns:
+        dict de tableaux alignés, une entrée par percée : person, movie, year,
+        votes (du film de la percée), low_films (films des années précédentes),
+        prior_max (votes maximum parmi eux)
+    """
+    # Tri (personne, année, film) puis suppression des crédits en double (plusieurs rôles)
+    order = np.lexsort((movie, year, person))
+    person, year, votes, movie = person[order], year[order], votes[order], movie[order]
+    keep = np.ones(len(person), dtype=bool)
+    keep[1:] = (person[1:] != person[:-1]) | (movie[1:] != movie[:-1])
+    person, year, votes, movie = person[keep], year[keep], votes[keep], movie[keep]
+    if not len(person):
+        return {key: np.zeros(0, dtype=np.int64) for key in
+                ("person", "movie", "year", "votes", "low_films", "prior_max")}
+
+    # Segments : une personne, ses films dans l'ordre chronologique
+    starts = np.flatnonzero(np.r_[True, person[1:] != person[:-1]])
+    segment = np.cumsum(np.r_[False, person[1:] != person[:-1]])
+    n = len(person)
+
+    # Premier film au-dessus du seuil de chaque segment (n si aucun)
+    positions = np.where(votes >= threshold, np.arange(n), n)
+    first_high = np.minimum.reduceat(positions, starts)
+    has_high = first_high < n
+    breakout_year = np.where(has_high, year[np.minimum(first_high, n - 1)], np.iinfo(np.int32).min)
+
+    # Série de films antérieurs à l'année de la percée (tous sous le seuil)
+    before = year < breakout_year[segment]
+    low_films = np.add.reduceat(before.astype(np.int64), starts)
+    prior_max = np.maximum.reduceat(np.where(before, votes, 0), starts)
+
+    found = has_high & (low_films >= min_low_films)
+    rows = first_high[found]
+    return {
+        "person": person[rows], "movie": movie[rows], "year": year[rows], "votes": votes[rows],
+        "low_films": low_films[found], "prior_max": prior_max[found],
+    }
+
+
+def rank(found, limit=None):
+    """Ordre : votes du film de la percée décroissants, puis saut par rapport au meilleur film précédent."""
+    jump = found["votes"] / np.maximum(found["prior_max"], 1)
+    order = np.lexsort((-jump, -found["votes"]))
+    return order[:limit] if limit is not None else order
+
+
+def breakout_careers(conn, limit=10, threshold=THRESHOLD, min_low_films=MIN_LOW_FILMS, categories=CATEGORIES):
+    """
+    Returns:
+        [(primaryName, primaryTitle, année, films avant, votes max avant, votes de la percée)]
+        classés par rank()
+    """
+    person_ids, movie_ids, person, year, votes, movie = load_credits(conn, categories)
+    found = detect(person, year, votes, movie, threshold, min_low_films)
+    order = rank(found, limit)
+
+    selected_persons = [person_ids[i] for i in found["person"][order]]
+    selected_movies = [movie_ids[i] for i in found["movie"][order]]
+    names = dict(_lookup(conn, "SELECT person_id, primaryName FROM Person WHERE person_id IN ({})",
+                         selected_persons))
+    titles = dict(_lookup(conn, "SELECT movie_id, primaryTitle FROM Movie WHERE movie_id IN ({})",
+                          selected_movies))
+    return [
+        (names.get(person_id), titles.get(movie_id), int(found["year"][i]), int(found["low_films"][i]),
+         int(found["prior_max"][i]), int(found["votes"][i]))
+        for person_id, movie_id, i in zip(selected_persons, selected_movies, order)
+    ]
+
+
+def _lookup(conn, sql, ids):
+    ids = list(dict.fromkeys(ids))
+    rows = []
+    # Limite du nombre de paramètres SQLite
+    for start in range(0, len(ids), 900):
+        chunk = ids[start:start + 900]
+        rows += conn.execute(sql.format(", ".join("?" * len(chunk))), chunk).fetchall()
+    return rows
+
+
+def reference_breakouts(conn, threshold=THRESHOLD, min_low_films=MIN_LOW_FILMS, categories=CATEGORIES):
+    """
+    Référence SQL, sans NumPy : premier film au-dessus du seuil par fenêtre
+    ROW_NUMBER, série et maximum antérieurs par sous-requêtes corrélées.
+
+    Returns:
+        {person_id: (movie_id, année, films avant, votes max avant, votes de la percée)}
+    """
+    placeholders = ", ".join("?" * len(categories))
+    sql = f"""
+    WITH credits AS (
+        SELECT DISTINCT mp.person_id, mp.movie_id, m.startYear AS year, r.numVotes AS votes
+        FROM MoviePrincipal mp
+        JOIN Movie m ON m.movie_id = mp.movie_id
+        JOIN Rating r ON r.movie_id = mp.movie_id
+        WHERE mp.category IN ({placeholders})
+          AND m.startYear IS NOT NULL AND r.numVotes IS NOT NULL
+    ),
+    first_high AS (
+        SELECT person_id, movie_id, year, votes,
+               ROW_NUMBER() OVER (PARTITION BY person_id ORDER BY year, movie_id) AS position
+        FROM credits
+        WHERE votes >= ?
+    )
+    SELECT f.person_id, f.movie_id, f.year,
+           (SELECT COUNT(*) FROM credits c WHERE c.person_id = f.person_id AND c.year < f.year) AS low_films,
+           (SELECT COALESCE(MAX(c.votes), 0) FROM credits c
+            WHERE c.person_id = f.person_id AND c.year < f.year) AS prior_max,
+           f.votes
+    FROM first_high f
+    WHERE f.position = 1 AND low_films >= ?
+    """
+    rows = conn.execute(sql, (*categories, threshold, min_low_films)).fetchall()
+    return {row[0]: tuple(row[1:]) for row in rows}
@@ -0,0 +1,179 @@
+"""
+Profils d'écriture des chargements en masse vers MongoDB (migrate_flat, migrate_structured).
+
+Un profil fixe le write concern (w, j), la taille des lots et le nombre de lots
+envoyés en parallèle (in-flight), et plafonne le retard de réplication :
+    safe      w="majority", journalisé, 1 lot à la fois : chaque lot attend
+              d'être répliqué sur la majorité (pas de retard possible, plus lent)
+    balanced  w=1 journalisé, 2 lots en vol, retard plafonné à 10 s
+    fast      w=1 sans journal, 4 lots en vol, retard plafonné à 30 s
+Choix : CINEEXPLORE_BULK_PROFILE ou --bulk-profile de cli.py (défaut balanced).
+
+Avec w=1 le primaire accepte les lots plus vite que les secondaires ne les
+rejouent ; le retard grandit et les lectures servies par les secondaires
+deviennent obsolètes. BulkLoader mesure le retard (optime du primaire moins
+optime du secondaire le plus en retard, replSetGetStatus) au plus une fois par
+LAG_CHECK_INTERVAL : au-delà de max_lag_s il divise par deux le nombre de lots
+en vol et attend que le retard redescende sous la moitié du plafond, puis
+remonte d'un lot à la fois (AIMD). Hors Replica Set (standalone, mongos), le
+retard n'est pas mesuré.
+
+Les lots sont confirmés dans l'ordre d'envoi : on_commit n'est appelé que pour
+le préfixe contigu des lots terminés, et les _id sont attribués avant l'envoi
+(ObjectId croissants) : le point de reprise « dernier _id » reste valable avec
+plusieurs lots en vol.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from bson import ObjectId
+from pymongo import WriteConcern
+
+PROFILES = {
+    "safe": {"w": "majority", "j": True, "batch_size": 5000, "max_in_flight": 1, "max_lag_s": None},
+    "balanced": {"w": 1, "j": True, "batch_size": 10000, "max_in_flight": 2, "max_lag_s": 10.0},
+    "fast": {"w": 1, "j": False, "batch_size": 20000, "max_in_flight": 4, "max_lag_s": 30.0},
+}
+DEFAULT_PROFILE = os.environ.get("CINEEXPLORE_BULK_PROFILE", "balanced")
+LAG_CHECK_INTERVAL = 1.0
+LAG_POLL_INTERVAL = 0.5
+
+
+def get_profile(name=None):
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Profil d'écriture inconnu : {name} ({', '.join(PROFILES)})")
+    return dict(PROFILES[name], name=name)
+
+
+def replication_lag(client):
+    """Retard (s) du secondaire le plus en retard sur le primaire ; None hors Replica Set."""
+    try:
+        status = client.admin.command("replSetGetStatus")
+    except Exception:
+        return None
+    members = status.get("members", [])
+    primary = next((m for m in members if m.get("stateStr") == "PRIMARY"), None)
+    secondaries = [m for m in members if m.get("stateStr") == "SECONDARY"]
+    if primary is None or not secondaries:
+        return None
+    oldest = min(m["optimeDate"] for m in secondaries)
+    return max((primary["optimeDate"] - oldest).total_seconds(), 0.0)
+
+
+class BulkLoader:
+    """Chargement par lots selon un profil ; stats() résume débit et retard de réplication."""
+
+    def __init__(self, db, profile=None):
+        self.db = db
+        self.profile = profile if isinstance(profile, dict) else get_profile(profile)
+        self.write_concern = WriteConcern(w=self.profile["w"], j=self.profile["j"])
+        self.in_flight = self.profile["max_in_flight"]
+        self.documents = 0
+        self.seconds = 0.0
+        self.lags = []
+        self.throttled_s = 0.0
+        self._last_check = 0.0
+
+    def collection(self, name):
+        return self.db.get_collection(name, write_concern=self.write_concern)
+
+    # --- Retard de réplication ------------------------------------------------
+
+    def _check_lag(self):
+        if time.perf_counter() - self._last_check < LAG_CHECK_INTERVAL:
+            return
+        self._last_check = time.perf_counter()
+        lag = replication_lag(self.db.client)
+        if lag is None:
+            return
+        self.lags.append(lag)
+        limit = self.profile["max_lag_s"]
+        if limit is None:
+            return  # w="majority" : retard mesuré pour le rapport, jamais plafonné
+        if lag <= limit:
+            self.in_flight = min(self.in_flight + 1, self.profile["max_in_flight"])
+            return
+        # Décroissance multiplicative puis attente du rattrapage des secondaires
+        self.in_flight = max(self.in_flight // 2, 1)
+        start = time.perf_counter()
+        while lag is not None and lag > limit / 2:
+            time.sleep(LAG_POLL_INTERVAL)
+            lag = replication_lag(self.db.client)
+            if lag is not None:
+                self.lags.append(lag)
+        self.throttled_s += time.perf_counter() - start
+
+    def run_batch(self, write, count):
+        """Lot écrit hors insert_batches ($merge, bulk_write) : chronométré, puis contrôle du retard."""
+        start = time.perf_counter()
+        write()
+        self.seconds += time.perf_counter() - start
+        self.documents += count
+        self._check_lag()
+
+    # --- Écriture -------------------------------------------------------------
+
+    def insert_batches(self, name, batches, on_commit=None):
+        """
+        insert_many de chaque lot, jusqu'à in_flight lots en parallèle.
+
+        Args:
+            batches: itérable de listes de documents
+            on_commit: appelé avec (nombre de documents, dernier _id) pour chaque
+                lot, dans l'ordre d'envoi, une fois ce lot et tous les précédents écrits
+        """
+        collection = self.collection(name)
+        start = time.perf_counter()
+        pending = {}
+        finished = {}
+        next_sent, next_commit = 0, 0
+        with ThreadPoolExecutor(max_workers=self.profile["max_in_flight"]) as pool:
+            batches = iter(batches)
+            exhausted = False
+            while not exhausted or pending:
+                while not exhausted and len(pending) < self.in_flight:
+                    documents = next(batches, None)
+                    if documents is None:
+                        exhausted = True
+                        break
+                    for document in documents:
+                        document.setdefault("_id", ObjectId())
+                    future = pool.submit(collection.insert_many, documents, ordered=False)
+                    pending[future] = (next_sent, len(documents), documents[-1]["_id"])
+                    next_sent += 1
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    index, count, last_id = pending.pop(future)
+                    finished[index] = (count, last_id)
+                while next_commit in finished:
+                    count, last_id = finished.pop(next_commit)
+                    self.documents += count
+                    if on_commit is not None:
+                        on_commit(count, last_id)
+                    next_commit += 1
+                self._check_lag()
+        self.seconds += time.perf_counter() - start
+
+    def stats(self):
+        return {
+            "profile": self.profile["name"],
+            "documents": self.documents,
+            "seconds": round(self.seconds, 2),
+            "rate": round(self.documents / self.seconds, 1) if self.seconds else 0.0,
+            "max_lag_s": round(max(self.lags), 2) if self.lags else None,
+            "mean_lag_s": round(sum(self.lags) / len(self.lags), 2) if self.lags else None,
+            "throttled_s": round(self.throttled_s, 2),
+        }
+
+    def report(self):
+        stats = self.stats()
+        lag = "non mesuré" if stats["max_lag_s"] is None else \
+            f"max {stats['max_lag_s']} s, moyen {stats['mean_lag_s']} s"
+        print(f"    Profil {stats['profile']} : {stats['documents']:,} documents, {stats['rate']:,.0f} docs/s, "
+              f"retard de réplication {lag}, pauses {stats['throttled_s']} s")
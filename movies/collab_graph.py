@@ -0,0 +1,243 @@
+"""
+Graphe de collaborations (personnes <-> films) pour Q4 et les requêtes de réseau.
+
+Le graphe biparti est stocké en CSR (Compressed Sparse Row) dans des tableaux
+NumPy d'entiers, dans les deux sens :
+    personne -> films  : person_indptr, person_movies, person_roles
+    film -> personnes  : movie_indptr, movie_people, movie_roles
+Les identifiants IMDb sont réduits à leur partie numérique (tt0002130 -> 2130,
+nm0655824 -> 655824) et les personnes/films à un ordinal dense.
+
+Il est construit depuis MoviePrincipal et les crédits directors.csv/writers.csv,
+sauvegardé en fichiers .npy et rechargé en mémoire mappée (mmap) : les requêtes
+"top collaborateurs", "films en commun" et "degrés de séparation" (BFS)
+ne touchent ni SQLite ni MongoDB.
+"""
+
+import csv
+import os
+import sqlite3
+
+import numpy as np
+
+ARRAYS = (
+    "person_ids", "movie_ids", "categories",
+    "person_indptr", "person_movies", "person_roles",
+    "movie_indptr", "movie_people", "movie_roles",
+)
+
+
+def imdb_to_int(imdb_id):
+    """'tt0002130' -> 2130, 'nm0655824' -> 655824"""
+    return int(str(imdb_id)[2:])
+
+
+def int_to_imdb(prefix, number):
+    """('nm', 655824) -> 'nm0655824'"""
+    return f"{prefix}{number:07d}"
+
+
+def _read_credits(csv_path, category):
+    """Crédits (mid, pid) d'un CSV aux en-têtes "('mid',)" ; fichier absent = aucun crédit."""
+    if not os.path.exists(csv_path):
+        return
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [h.strip("(),'") for h in next(reader)]
+        mid_col, pid_col = header.index('mid'), header.index('pid')
+        for row in reader:
+            if row[mid_col] and row[pid_col]:
+                yield row[mid_col], row[pid_col], category
+
+
+def _csr(rows, cols, roles, num_rows):
+    """Trie les arêtes par ligne et construit (indptr, colonnes, rôles)."""
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32), roles[order]
+
+
+def _gather(indptr, values, rows):
+    """Concatène values[indptr[r]:indptr[r+1]] pour toutes les lignes `rows` (vectorisé)."""
+    starts, ends = indptr[rows], indptr[rows + 1]
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=values.dtype), np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    index = offsets + np.arange(total)
+    return values[index], index
+
+
+class CollaborationGraph:
+
+    def __init__(self, arrays):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.categories = [str(c) for c in self.categories]
+
+    # --- Construction / persistance ---------------------------------------
+
+    @classmethod
+    def build(cls, db_path, csv_dir=None):
+        """Construit le graphe depuis SQLite (MoviePrincipal) et les CSV de crédits."""
+        conn = sqlite3.connect(db_path)
+        try:
+            credits = conn.execute(
+                "SELECT movie_id, person_id, COALESCE(category, '') FROM MoviePrincipal"
+            ).fetchall()
+        finally:
+            conn.close()
+        if csv_dir:
+            credits += list(_read_credits(os.path.join(csv_dir, 'directors.csv'), 'director'))
+            credits += list(_read_credits(os.path.join(csv_dir, 'writers.csv'), 'writer'))
+
+        movies = np.array([imdb_to_int(c[0]) for c in credits], dtype=np.int64)
+        people = np.array([imdb_to_int(c[1]) for c in credits], dtype=np.int64)
+        categories, roles = np.unique(np.array([c[2] for c in credits], dtype=str), return_inverse=True)
+
+        movie_ids, movie_ord = np.unique(movies, return_inverse=True)
+        person_ids, person_ord = np.unique(people, return_inverse=True)
+
+        # Un même crédit peut figurer dans MoviePrincipal et dans directors.csv
+        edges = np.unique(np.stack([person_ord, movie_ord, roles]), axis=1)
+        person_ord, movie_ord, roles = edges[0], edges[1], edges[2].astype(np.uint8)
+
+        arrays = {
+            "person_ids": person_ids,
+            "movie_ids": movie_ids,
+            "categories": categories,
+        }
+        arrays["person_indptr"], arrays["person_movies"], arrays["person_roles"] = _csr(
+            person_ord, movie_ord, roles, len(person_ids))
+        arrays["movie_indptr"], arrays["movie_people"], arrays["movie_roles"] = _csr(
+            movie_ord, person_ord, roles, len(movie_ids))
+        return cls(arrays)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            value = getattr(self, name)
+            if name == "categories":
+                value = np.array(value, dtype=str)
+            np.save(os.path.join(directory, f"{name}.npy"), value)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Charge le graphe ; avec mmap=True les tableaux restent sur disque (page cache)."""
+        mode = "r" if mmap else None
+        return cls({
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in ARRAYS
+        })
+
+    # --- Accès ---------------------------------------------------------------
+
+    def person_ordinal(self, person_id):
+        """Ordinal dense d'une personne ('nm...' ou entier), ou None si inconnue."""
+        number = imdb_to_int(person_id) if isinstance(person_id, str) else int(person_id)
+        i = int(np.searchsorted(self.person_ids, number))
+        if i < len(self.person_ids) and self.person_ids[i] == number:
+            return i
+        return None
+
+    def _role_codes(self, roles):
+        if roles is None:
+            return None
+        return np.array([self.categories.index(r) for r in roles if r in self.categories], dtype=np.uint8)
+
+    def films_of(self, person_id, roles=None):
+        """Ordinaux des films d'une personne, éventuellement filtrés par catégorie."""
+        p = self.person_ordinal(person_id)
+        if p is None:
+            return np.empty(0, dtype=np.int32)
+        start, end = self.person_indptr[p], self.person_indptr[p + 1]
+        movies = np.asarray(self.person_movies[start:end])
+        codes = self._role_codes(roles)
+        if codes is not None:
+            movies = movies[np.isin(self.person_roles[start:end], codes)]
+        return np.unique(movies)
+
+    # --- Requêtes -----------------------------------------------------------
+
+    def top_collaborators(self, person_id, k=10, roles=("actor", "actress"), collaborator_roles=("director",),
+                          exclude_self=False):
+        """
+        Personnes ayant le plus de films en commun avec `person_id` (un identifiant
+        ou une liste, par exemple tous les homonymes d'un nom).
+        Par défaut (Q4) : réalisateurs des films où la personne est acteur/actrice,
+        elle-même comprise pour les films qu'elle a réalisés, comme en SQL ;
+        exclude_self=True la retire (réseau de collaborateurs).
+
+        Returns:
+            liste de tuples ('nm...', nombre de films) triés par nombre décroissant
+            puis par identifiant
+        """
+        ids = [person_id] if isinstance(person_id, (str, int, np.integer)) else list(person_id)
+        ordinals = [o for o in map(self.person_ordinal, ids) if o is not None]
+        if not ordinals:
+            return []
+        movies = np.unique(np.concatenate([self.films_of(i, roles) for i in ids]))
+        if len(movies) == 0:
+            return []
+        people, index = _gather(self.movie_indptr, self.movie_people, movies)
+        codes = self._role_codes(collaborator_roles)
+        keep = ~np.isin(people, ordinals) if exclude_self else np.ones(len(people), dtype=bool)
+        if codes is not None:
+            keep &= np.isin(self.movie_roles[index], codes)
+        # Une personne peut avoir deux rôles dans le même film : on compte des couples uniques
+        lengths = self.movie_indptr[movies + 1] - self.movie_indptr[movies]
+        movie_of_edge = np.repeat(movies, lengths)
+        pairs = np.unique(people[keep].astype(np.int64) * len(self.movie_ids) + movie_of_edge[keep])
+        collaborators, counts = np.unique(pairs // len(self.movie_ids), return_counts=True)
+        order = np.lexsort((collaborators, -counts))[:k]
+        return [(int_to_imdb("nm", self.person_ids[c]), int(n)) for c, n in zip(collaborators[order], counts[order])]
+
+    def shared_films(self, person_a, person_b):
+        """Films ('tt...') communs à deux personnes."""
+        common = np.intersect1d(self.films_of(person_a), self.films_of(person_b), assume_unique=True)
+        return [int_to_imdb("tt", m) for m in self.movie_ids[common]]
+
+    def degrees_of_separation(self, person_a, person_b, max_depth=6):
+        """
+        Nombre minimal de films qui relient deux personnes (BFS par niveaux,
+        chaque niveau étendu en une seule opération vectorisée).
+
+        Returns:
+            int (0 si même personne), ou None si non reliées en max_depth étapes
+        """
+        source, target = self.person_ordinal(person_a), self.person_ordinal(person_b)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return 0
+
+        seen_people = np.zeros(len(self.person_ids), dtype=bool)
+        seen_movies = np.zeros(len(self.movie_ids), dtype=bool)
+        seen_people[source] = True
+        frontier = np.array([source], dtype=np.int64)
+
+        for depth in range(1, max_depth + 1):
+            movies, _ = _gather(self.person_indptr, self.person_movies, frontier)
+            movies = np.unique(movies)
+            movies = movies[~seen_movies[movies]]
+            seen_movies[movies] = True
+
+            people, _ = _gather(self.movie_indptr, self.movie_people, movies)
+            people = np.unique(people)
+            people = people[~seen_people[people]]
+            if np.any(people == target):
+                return depth
+            if len(people) == 0:
+                return None
+            seen_people[people] = True
+            frontier = people
+        return None
+
+
+def build_graph(db_path, csv_dir, graph_dir):
+    """Étape du pipeline d'import : reconstruit et sauvegarde le graphe."""
+    graph = CollaborationGraph.build(db_path, csv_dir)
+    graph.save(graph_dir)
+    return graph
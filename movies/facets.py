@@ -0,0 +1,261 @@
+"""
+Navigation à facettes (/browse/) sur des bitmaps précalculés.
+
+Les films reçoivent un ordinal dense par votes décroissants : l'ordre des bits
+est l'ordre d'affichage. Pour chaque valeur de facette (genre « Drama »,
+décennie « 1990 », tranche de durée, titleType, isAdult, tranche de note), un
+bitmap de N bits (np.packbits, N/8 octets) marque les films concernés.
+
+Une sélection se résout sans SQL :
+    - dans une facette, les valeurs cochées sont combinées par OU ;
+    - entre facettes, par ET ;
+    - le compteur d'une valeur est popcount(bitmap_valeur & filtre des AUTRES
+      facettes), comme sur les sites marchands : cocher « Drama » ne fait pas
+      tomber les autres genres à zéro.
+Les résultats d'une page sont les premiers bits à 1 du filtre, convertis en
+movie_id puis chargés par l'ORM.
+
+Les bitmaps sont construits en fin d'import (build_facet_index) et sauvegardés
+en .npy dans data/facets/, rechargés en mémoire mappée.
+"""
+
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from movies.collab_graph import imdb_to_int, int_to_imdb
+from movies.suggest import BlobStrings, encode_strings
+
+ARRAYS = ("movie_ids", "bitmaps", "value_blob", "value_offsets", "value_facets")
+
+# Facette -> libellé affiché ; l'ordre est celui de la page
+FACETS = {
+    "genre": "Genre",
+    "decade": "Décennie",
+    "runtime": "Durée",
+    "titleType": "Type",
+    "isAdult": "Adulte",
+    "rating": "Note",
+}
+UNKNOWN = "inconnue"
+# (borne basse incluse, libellé) ; la dernière tranche est ouverte
+RUNTIME_BUCKETS = [(0, "< 90 min"), (90, "90-120 min"), (120, "120-150 min"), (150, "> 150 min")]
+RATING_BANDS = [(0, "< 5"), (5, "5-6"), (6, "6-7"), (7, "7-8"), (8, "8+")]
+
+
+def _bucket(value, buckets):
+    if value is None:
+        return UNKNOWN
+    label = buckets[0][1]
+    for low, name in buckets:
+        if value >= low:
+            label = name
+    return label
+
+
+def popcount(bits):
+    """Nombre de bits à 1 sur le dernier axe d'un tableau d'octets."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+    return np.unpackbits(bits, axis=-1).sum(axis=-1, dtype=np.int64)
+
+
+def movie_facet_values(start_year, runtime, title_type, is_adult, rating):
+    """Valeurs des facettes scalaires d'un film (le genre est multivalué, à part)."""
+    return {
+        "decade": UNKNOWN if start_year is None else str(start_year // 10 * 10),
+        "runtime": _bucket(runtime, RUNTIME_BUCKETS),
+        "titleType": title_type or UNKNOWN,
+        "isAdult": "oui" if is_adult else "non",
+        "rating": "sans note" if rating is None else _bucket(rating, RATING_BANDS),
+    }
+
+
+class FacetIndex:
+
+    def __init__(self, arrays):
+        for name in ARRAYS:
+            setattr(self, name, np.asarray(arrays[name]))
+        labels = BlobStrings(self.value_blob, self.value_offsets)
+        facet_names = list(FACETS)
+        # (facette, valeur) -> ligne de bitmaps ; facette -> lignes dans l'ordre d'affichage
+        self.rows = {}
+        self.facet_rows = {facet: [] for facet in FACETS}
+        for row in range(len(labels)):
+            facet = facet_names[int(self.value_facets[row])]
+            value = labels[row].decode("utf-8")
+            self.rows[(facet, value)] = row
+            self.facet_rows[facet].append((value, row))
+        self.num_movies = len(self.movie_ids)
+        self.all_bits = np.packbits(np.ones(self.num_movies, dtype=bool))
+
+    # --- Construction / persistance ---------------------------------------
+
+    @classmethod
+    def build(cls, db_path):
+        """Construit les bitmaps depuis SQLite (Movie, Rating, MovieGenre)."""
+        conn = sqlite3.connect(db_path)
+        try:
+            movies = conn.execute("""
+                SELECT m.movie_id, m.startYear, m.runtimeMinutes, m.titleType, m.isAdult, r.averageRating
+                FROM Movie m LEFT JOIN Rating r ON r.movie_id = m.movie_id
+                ORDER BY COALESCE(r.numVotes, 0) DESC, m.movie_id
+            """).fetchall()
+            movie_genres = conn.execute("SELECT movie_id, genre_name FROM MovieGenre").fetchall()
+        finally:
+            conn.close()
+
+        ordinal = {row[0]: i for i, row in enumerate(movies)}
+        members = {}
+        for i, (_, *columns) in enumerate(movies):
+            for facet, value in movie_facet_values(*columns).items():
+                members.setdefault((facet, value), []).append(i)
+        for movie_id, genre in movie_genres:
+            if movie_id in ordinal and genre:
+                members.setdefault(("genre", genre), []).append(ordinal[movie_id])
+
+        facet_order = list(FACETS)
+        keys = sorted(members, key=lambda k: (facet_order.index(k[0]), cls._sort_key(k[0], k[1])))
+        bitmaps = np.zeros((len(keys), (len(movies) + 7) // 8), dtype=np.uint8)
+        for row, key in enumerate(keys):
+            bits = np.zeros(len(movies), dtype=bool)
+            bits[members[key]] = True
+            bitmaps[row] = np.packbits(bits)
+
+        arrays = {
+            "movie_ids": np.array([imdb_to_int(row[0]) for row in movies], dtype=np.int32),
+            "bitmaps": bitmaps,
+            "value_facets": np.array([facet_order.index(facet) for facet, _ in keys], dtype=np.int8),
+        }
+        arrays["value_blob"], arrays["value_offsets"] = encode_strings([value for _, value in keys])
+        return cls(arrays)
+
+    @staticmethod
+    def _sort_key(facet, value):
+        """Ordre d'affichage : tranches dans l'ordre des bornes, le reste alphabétique, « inconnue » à la fin."""
+        buckets = {"runtime": RUNTIME_BUCKETS, "rating": RATING_BANDS}.get(facet)
+        if buckets is not None:
+            names = [name for _, name in buckets]
+            return (0, names.index(value), "") if value in names else (1, 0, value)
+        return (value == UNKNOWN, 0, value)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Charge l'index ; avec mmap=True les bitmaps restent sur disque (page cache)."""
+        mode = "r" if mmap else None
+        return cls({
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in ARRAYS
+        })
+
+    # --- Requêtes ------------------------------------------------------------
+
+    def _facet_mask(self, facet, values):
+        """OU des valeurs cochées d'une facette (valeur inconnue : aucun film) ; None = pas de filtre."""
+        rows = [self.rows[(facet, v)] for v in values if (facet, v) in self.rows]
+        if not values:
+            return None
+        if not rows:
+            return np.zeros_like(self.all_bits)
+        return np.bitwise_or.reduce(self.bitmaps[rows], axis=0)
+
+    def query(self, filters):
+        """
+        Args:
+            filters: {facette: [valeurs]} (facettes absentes ou listes vides = pas de filtre)
+        Returns:
+            (bitmap du résultat, {facette: [(valeur, compteur, cochée)]})
+        """
+        masks = {facet: self._facet_mask(facet, filters.get(facet) or []) for facet in FACETS}
+        active = {facet: mask for facet, mask in masks.items() if mask is not None}
+
+        result = self.all_bits
+        for mask in active.values():
+            result = result & mask
+
+        counts = {}
+        for facet, values in self.facet_rows.items():
+            # Filtre des autres facettes seulement
+            others = self.all_bits
+            for other, mask in active.items():
+                if other != facet:
+                    others = others & mask
+            rows = [row for _, row in values]
+            facet_counts = popcount(self.bitmaps[rows] & others) if rows else []
+            selected = set(filters.get(facet) or [])
+            counts[facet] = [(value, int(count), value in selected)
+                             for (value, _), count in zip(values, facet_counts)]
+        return result, counts
+
+    def count(self, bits):
+        return int(popcount(bits))
+
+    def movie_ids_at(self, bits, start, stop):
+        """movie_id des résultats de rang start..stop-1 (ordre des votes décroissants)."""
+        ordinals = np.flatnonzero(np.unpackbits(bits, count=self.num_movies))[start:stop]
+        return [int_to_imdb("tt", int(number)) for number in self.movie_ids[ordinals]]
+
+
+class FacetResults:
+    """Résultats paginables (django.core.paginator) : films chargés page par page."""
+
+    def __init__(self, index, bits):
+        self.index = index
+        self.bits = bits
+        self._count = index.count(bits)
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, page):
+        from .models import Movie
+
+        start, stop, _ = page.indices(self._count)
+        ids = self.index.movie_ids_at(self.bits, start, stop)
+        movies = Movie.objects.select_related('rating').in_bulk(ids)
+        return [movies[movie_id] for movie_id in ids if movie_id in movies]
+
+
+def build_facet_index(db_path, index_dir):
+    """Étape du pipeline d'import : reconstruit et sauvegarde les bitmaps de facettes."""
+    index = FacetIndex.build(db_path)
+    index.save(index_dir)
+    return index
+
+
+def has_facet_index(index_dir):
+    return all(os.path.exists(os.path.join(index_dir, f"{name}.npy")) for name in ARRAYS)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_facet_index(index_dir=None, db_path=None):
+    """
+    Instance partagée, chargée une seule fois en mémoire mappée (par défaut :
+    settings.FACETS_DIR) ; construite depuis la base si les fichiers manquent.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if index_dir is None:
+                    from django.conf import settings
+                    index_dir = str(settings.FACETS_DIR)
+                    db_path = db_path or settings.DATABASES['default']['NAME']
+                if has_facet_index(index_dir):
+                    _index = FacetIndex.load(index_dir)
+                else:
+                    _index = build_facet_index(db_path, index_dir)
+    return _index
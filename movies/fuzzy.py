@@ -0,0 +1,256 @@
+"""
+Recherche floue (accents, fautes de frappe) par trigrammes de caractères.
+
+Titres, alias et noms sont normalisés comme pour l'autocomplétion
+(movies/suggest.normalize : « Fantômas - À l'ombre » -> « fantomas a l ombre »)
+puis découpés en trigrammes à la manière de pg_trgm : chaque mot est bordé de
+deux espaces devant et d'un derrière (« fantomas » -> « __f », « _fa », « fan »,
+..., « as_ »). L'index inversé trigramme -> documents est stocké en CSR
+(postings_indptr, postings), avec le nombre de trigrammes de chaque document.
+
+Une requête :
+    1. prend ses trigrammes du plus rare au plus fréquent et lit les listes
+       tant que POSTINGS_BUDGET n'est pas atteint (les trigrammes très courants,
+       « _th », « the »..., ne sont pas parcourus) ;
+    2. garde au plus MAX_CANDIDATES documents ayant le plus de trigrammes en commun ;
+    3. complète leur compte avec les trigrammes non parcourus (searchsorted
+       dans chaque liste triée) ;
+    4. classe par similarité de mots, à la manière de word_similarity de
+       pg_trgm : part des trigrammes de la requête présents dans le document
+       (|q ∩ d| / |q|, seuil MIN_SIMILARITY), qu'un titre long ne pénalise pas
+       (« shawshank » -> « The Shawshank Redemption » : 1,0, « Shank » : 0,67) ;
+       puis Jaccard (|q ∩ d| / |q ∪ d|, pondéré par JACCARD_WEIGHT) pour préférer
+       le document le plus proche en entier à couverture égale, plus un bonus
+       de popularité (log des votes) pondéré par POPULARITY_WEIGHT.
+Le travail est borné par le budget et le nombre de candidats, pas par la taille
+du catalogue. Les tableaux .npy sont rechargés en mémoire mappée.
+"""
+
+import bisect
+import os
+import threading
+
+import numpy as np
+
+from movies.suggest import BlobStrings, encode_strings, normalize, read_catalog, target_dict
+
+ARRAYS = (
+    "trigram_blob", "trigram_offsets", "postings_indptr", "postings",
+    "doc_targets", "doc_sizes",
+    "target_kinds", "target_ids", "target_years", "target_weights",
+    "label_blob", "label_offsets",
+)
+MOVIE, PERSON = 0, 1
+POSTINGS_BUDGET = 20000
+MAX_CANDIDATES = 2000
+MIN_SIMILARITY = 0.5
+JACCARD_WEIGHT = 0.2
+POPULARITY_WEIGHT = 0.15
+MIN_QUERY_LENGTH = 3
+
+
+def trigrams(normalized):
+    """Trigrammes d'un texte déjà normalisé (mots bordés de '  ' et ' ')."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class FuzzyIndex:
+
+    def __init__(self, arrays):
+        for name in ARRAYS:
+            setattr(self, name, np.asarray(arrays[name]))
+        self.vocabulary = BlobStrings(self.trigram_blob, self.trigram_offsets)
+        self.labels = BlobStrings(self.label_blob, self.label_offsets)
+        weights = self.target_weights.astype(np.float64)
+        self.popularity = np.log1p(weights) / np.log1p(max(weights.max(initial=0), 1))
+
+    # --- Construction / persistance ---------------------------------------
+
+    @classmethod
+    def build(cls, db_path):
+        """Construit l'index depuis SQLite (titres, alias et noms)."""
+        catalog, labels, aliases = read_catalog(db_path)
+        return cls.from_catalog(catalog, labels, aliases)
+
+    @classmethod
+    def from_catalog(cls, catalog, labels, aliases=()):
+        """Index d'un catalogue (voir suggest.read_catalog) ; un document par texte distinct d'une cible."""
+        documents = {}
+        for target, label in list(enumerate(labels)) + list(aliases):
+            normalized = normalize(label)
+            if normalized:
+                documents.setdefault((normalized, target), None)
+
+        doc_grams = [trigrams(text) for text, _ in documents]
+        vocabulary = sorted(set().union(*doc_grams), key=lambda g: g.encode("utf-8"))
+        codes = {gram: code for code, gram in enumerate(vocabulary)}
+
+        sizes = np.array([len(grams) for grams in doc_grams], dtype=np.int16)
+        doc_of_pair = np.repeat(np.arange(len(doc_grams), dtype=np.int32), sizes)
+        code_of_pair = np.fromiter((codes[g] for grams in doc_grams for g in grams),
+                                   dtype=np.int32, count=len(doc_of_pair))
+        order = np.lexsort((doc_of_pair, code_of_pair))
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(code_of_pair, minlength=len(vocabulary)), out=indptr[1:])
+
+        arrays = dict(catalog)
+        arrays["trigram_blob"], arrays["trigram_offsets"] = encode_strings(vocabulary)
+        arrays["postings_indptr"] = indptr
+        arrays["postings"] = doc_of_pair[order]
+        arrays["doc_targets"] = np.array([target for _, target in documents], dtype=np.int32)
+        arrays["doc_sizes"] = sizes
+        return cls(arrays)
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Charge l'index ; avec mmap=True les tableaux restent sur disque (page cache)."""
+        mode = "r" if mmap else None
+        return cls({
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in ARRAYS
+        })
+
+    # --- Accès ---------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.doc_targets)
+
+    def _code(self, gram):
+        needle = gram.encode("utf-8")
+        i = bisect.bisect_left(self.vocabulary, needle)
+        return i if i < len(self.vocabulary) and self.vocabulary[i] == needle else None
+
+    def _postings(self, code):
+        return self.postings[self.postings_indptr[code]:self.postings_indptr[code + 1]]
+
+    def matches(self, query, limit=20, kind=None, min_similarity=MIN_SIMILARITY):
+        """
+        Cibles les plus proches de `query`.
+
+        Args:
+            kind: MOVIE, PERSON ou None (les deux)
+        Returns:
+            liste de tuples (cible, score, similarité) par score décroissant
+        """
+        grams = trigrams(normalize(query))
+        if not grams:
+            return []
+        codes = sorted((c for c in map(self._code, grams) if c is not None),
+                       key=lambda c: self.postings_indptr[c + 1] - self.postings_indptr[c])
+        if not codes:
+            return []
+
+        # 1. Trigrammes rares d'abord, dans la limite du budget (au moins un)
+        scanned, budget = [], 0
+        for code in codes:
+            length = int(self.postings_indptr[code + 1] - self.postings_indptr[code])
+            if scanned and budget + length > POSTINGS_BUDGET:
+                break
+            scanned.append(code)
+            budget += length
+        docs, shared = np.unique(np.concatenate([self._postings(c) for c in scanned]), return_counts=True)
+
+        # 2. Candidats les plus prometteurs
+        if len(docs) > MAX_CANDIDATES:
+            keep = np.argpartition(-shared, MAX_CANDIDATES)[:MAX_CANDIDATES]
+            docs, shared = docs[keep], shared[keep]
+
+        # 3. Trigrammes non parcourus : recherche des candidats dans leurs listes triées
+        for code in codes[len(scanned):]:
+            postings = self._postings(code)
+            positions = np.searchsorted(postings, docs)
+            found = positions < len(postings)
+            found[found] = postings[positions[found]] == docs[found]
+            shared = shared + found
+
+        # 4. Similarité de mots (couverture de la requête) + Jaccard + popularité, meilleur document par cible
+        similarity = shared / len(grams)
+        jaccard = shared / (len(grams) + self.doc_sizes[docs] - shared)
+        targets = self.doc_targets[docs]
+        mask = similarity >= min_similarity
+        if kind is not None:
+            mask &= self.target_kinds[targets] == kind
+        targets, similarity, jaccard = targets[mask], similarity[mask], jaccard[mask]
+        scores = similarity + JACCARD_WEIGHT * jaccard + POPULARITY_WEIGHT * self.popularity[targets]
+        order = np.argsort(-scores, kind="stable")
+        results, seen = [], set()
+        for i in order:
+            target = int(targets[i])
+            if target not in seen:
+                seen.add(target)
+                results.append((target, float(scores[i]), float(similarity[i])))
+                if len(results) == limit:
+                    break
+        return results
+
+    def search(self, query, limit=20, kind=None):
+        """Comme matches(), au format des suggestions ({type, id, label, year, votes} + similarity)."""
+        return [dict(target_dict(self, target), similarity=round(similarity, 3))
+                for target, _, similarity in self.matches(query, limit, kind)]
+
+    def movie_ids(self, query, limit=20):
+        return [target_dict(self, target)["id"] for target, _, _ in self.matches(query, limit, MOVIE)]
+
+    def person_names(self, query, limit=5):
+        """Noms (primaryName) des personnes les plus proches, pour résoudre un nom saisi approximativement."""
+        return [self.labels[target].decode("utf-8") for target, _, _ in self.matches(query, limit, PERSON)]
+
+
+def search_movies(query, limit=20):
+    """
+    Films de la page Recherche : recherche floue (FUZZY_SEARCH) dès MIN_QUERY_LENGTH
+    caractères utiles ; saisie plus courte ou sans résultat : icontains comme avant.
+    """
+    from django.conf import settings
+    from .models import Movie
+
+    if settings.FUZZY_SEARCH and len(normalize(query)) >= MIN_QUERY_LENGTH:
+        ids = get_fuzzy_index().movie_ids(query, limit)
+        if ids:
+            movies = Movie.objects.in_bulk(ids)
+            return [movies[movie_id] for movie_id in ids if movie_id in movies]
+    return list(Movie.objects.filter(primaryTitle__icontains=query)[:limit])
+
+
+def build_fuzzy_index(db_path, index_dir):
+    """Étape du pipeline d'import : reconstruit et sauvegarde l'index de trigrammes."""
+    index = FuzzyIndex.build(db_path)
+    index.save(index_dir)
+    return index
+
+
+def has_fuzzy_index(index_dir):
+    return all(os.path.exists(os.path.join(index_dir, f"{name}.npy")) for name in ARRAYS)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_fuzzy_index(index_dir=None, db_path=None):
+    """
+    Instance partagée, chargée une seule fois en mémoire mappée (par défaut :
+    settings.FUZZY_DIR) ; construite depuis la base si les fichiers manquent.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if index_dir is None:
+                    from django.conf import settings
+                    index_dir = str(settings.FUZZY_DIR)
+                    db_path = db_path or settings.DATABASES['default']['NAME']
+                if has_fuzzy_index(index_dir):
+                    _index = FuzzyIndex.load(index_dir)
+                else:
+                    _index = build_fuzzy_index(db_path, index_dir)
+    return _index
@@ -0,0 +1,255 @@
+"""
+Instrumentation des requêtes HTTP de CineExplore.
+
+Pour chaque requête on mesure : la vue appelée, le temps total, le nombre et
+la durée des requêtes SQLite (hook `execute_wrapper` posé sur chaque connexion),
+le nombre et la durée des commandes MongoDB (`CommandListener` de pymongo) et
+le temps passé dans les appels HTTP sortants (OMDb).
+
+Les mesures sont agrégées par vue dans une fenêtre glissante et exposées au
+format texte Prometheus par la vue `/metrics`.
+"""
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Statistiques de la requête en cours (None hors d'une requête instrumentée)
+_current = contextvars.ContextVar("cineexplore_request_stats", default=None)
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Réduit une requête SQL à son empreinte (littéraux et listes IN remplacés par ?)."""
+    sql = _LITERAL_RE.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST_RE.sub("(?)", sql)
+    return _SPACES_RE.sub(" ", sql).strip()
+
+
+class RequestStats:
+    """Compteurs collectés pendant le traitement d'une seule requête."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.mongo_count = 0
+        self.mongo_time = 0.0
+        self.http_count = 0
+        self.http_time = 0.0
+        self.fingerprints = Counter()
+
+    def suspected_n_plus_one(self, threshold):
+        """Empreintes exécutées plus de `threshold` fois dans la requête."""
+        return {fp: n for fp, n in self.fingerprints.items() if n > threshold}
+
+
+class MetricsRegistry:
+    """Agrégats par vue : compteurs cumulés et durées récentes pour les percentiles."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def record(self, view, duration, stats, n_plus_one):
+        with self._lock:
+            self._durations[view].append(duration)
+            totals = self._totals[view]
+            totals["requests"] += 1
+            totals["duration"] += duration
+            totals["sql_queries"] += stats.sql_count
+            totals["sql_seconds"] += stats.sql_time
+            totals["mongo_commands"] += stats.mongo_count
+            totals["mongo_seconds"] += stats.mongo_time
+            totals["http_calls"] += stats.http_count
+            totals["http_seconds"] += stats.http_time
+            totals["n_plus_one"] += len(n_plus_one)
+
+    def snapshot(self):
+        """Copie cohérente des agrégats : {vue: (durées triées, totaux)}."""
+        with self._lock:
+            return {
+                view: (sorted(self._durations[view]), dict(self._totals[view]))
+                for view in self._totals
+            }
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+
+
+registry = MetricsRegistry(window=getattr(settings, "METRICS_WINDOW", 1000))
+
+
+def percentile(sorted_values, q):
+    """Percentile par rang le plus proche sur une liste déjà triée."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def render_prometheus():
+    """Sérialise le registre au format d'exposition texte de Prometheus."""
+    snapshot = registry.snapshot()
+    lines = [
+        "# HELP cineexplore_request_duration_seconds Durée des requêtes par vue (fenêtre glissante).",
+        "# TYPE cineexplore_request_duration_seconds summary",
+    ]
+    for view, (durations, totals) in sorted(snapshot.items()):
+        for q in QUANTILES:
+            lines.append(
+                f'cineexplore_request_duration_seconds{{view="{view}",quantile="{q}"}} '
+                f"{percentile(durations, q):.6f}"
+            )
+        lines.append(f'cineexplore_request_duration_seconds_sum{{view="{view}"}} {totals["duration"]:.6f}')
+        lines.append(f'cineexplore_request_duration_seconds_count{{view="{view}"}} {int(totals["requests"])}')
+
+    counters = [
+        ("sql_queries", "cineexplore_sqlite_queries_total", "Requêtes SQLite exécutées."),
+        ("sql_seconds", "cineexplore_sqlite_seconds_total", "Temps cumulé dans SQLite."),
+        ("mongo_commands", "cineexplore_mongo_commands_total", "Commandes MongoDB envoyées."),
+        ("mongo_seconds", "cineexplore_mongo_seconds_total", "Temps cumulé dans MongoDB."),
+        ("http_calls", "cineexplore_http_calls_total", "Appels HTTP sortants."),
+        ("http_seconds", "cineexplore_http_seconds_total", "Temps cumulé dans les appels HTTP sortants."),
+        ("n_plus_one", "cineexplore_n_plus_one_total", "Motifs N+1 détectés."),
+    ]
+    for key, name, help_text in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for view, (_, totals) in sorted(snapshot.items()):
+            value = totals.get(key, 0)
+            value = f"{value:.6f}" if key.endswith("seconds") else str(int(value))
+            lines.append(f'{name}{{view="{view}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - start
+        stats.fingerprints["sql:" + normalize_sql(sql)] += 1
+
+
+def _install_sql_wrapper(sender, connection, **kwargs):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Comptabilise les commandes MongoDB dans les statistiques de la requête en cours."""
+
+    def started(self, event):
+        stats = _current.get()
+        if stats is not None:
+            collection = event.command.get(event.command_name)
+            stats.fingerprints[f"mongo:{event.command_name}:{collection}"] += 1
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.mongo_count += 1
+            stats.mongo_time += event.duration_micros / 1_000_000
+
+
+mongo_listener = MongoCommandListener()
+
+
+@contextmanager
+def track_http():
+    """Mesure un appel HTTP sortant : `with track_http(): requests.get(...)`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.http_count += 1
+            stats.http_time += time.perf_counter() - start
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match.url_name or "unresolved"
+
+
+class RequestMetricsMiddleware:
+    """Middleware (sync et async) qui instrumente chaque requête et alimente le registre."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, "N_PLUS_ONE_THRESHOLD", 10)
+        connection_created.connect(_install_sql_wrapper, dispatch_uid="cineexplore_sql_wrapper")
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _install_sql_wrapper(None, connection)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        # Les requêtes SQLite passent par le pool de threads : le wrapper est posé
+        # sur leurs connexions par le signal connection_created.
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, time.perf_counter() - start, stats)
+        return response
+
+    def _record(self, request, duration, stats):
+        view = _view_name(request)
+        n_plus_one = stats.suspected_n_plus_one(self.threshold)
+        for fingerprint, count in n_plus_one.items():
+            logger.warning("N+1 suspecté dans %s : %d x %s", view, count, fingerprint)
+        registry.record(view, duration, stats, n_plus_one)
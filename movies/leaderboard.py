@@ -0,0 +1,252 @@
+"""
+Classements Top N précalculés par (genre, décennie, titleType).
+
+Trier sur la note brute favorise les films obscurs : 9,6 avec 40 votes passe
+devant un classique à 8,9 avec un million de votes. Le score utilisé est la
+moyenne bayésienne d'IMDb :
+    score = (v * R + m * C) / (v + m)
+R note du film, v ses votes, C la note moyenne de la base et m les votes
+« a priori » (PRIOR_VOTES_PERCENTILE des votes : un film moins voté est
+ramené vers C).
+
+build_leaderboard() est appelé en fin d'import : il écrit les TOP_K meilleurs
+films de chaque (genre, décennie, titleType) dans la table Leaderboard, clé
+primaire (genre, decade, titleType, rank) en WITHOUT ROWID, avec titre, année,
+note et votes recopiés (aucune jointure à la lecture). genre = '*' regroupe
+tous les genres, decade = -1 les films sans année.
+
+top_n() fusionne (heapq.merge) les listes des décennies couvertes par la
+fenêtre d'années au lieu de trier la jointure Movie x MovieGenre x Rating.
+Une décennie coupée par la fenêtre dont la liste tronquée ne suffit pas est
+recalculée en SQL sur ses seules années ; au-delà de TOP_K résultats, tout
+passe par le calcul exact (top_n_exact).
+
+Seul top_movies() (page d'accueil) importe Django ; les autres fonctions
+acceptent une connexion sqlite3 ou django.db.connection.
+"""
+
+import heapq
+import re
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+TABLE = "Leaderboard"
+META_TABLE = "LeaderboardMeta"
+ALL_GENRES = "*"
+NO_DECADE = -1
+TOP_K = 100
+PRIOR_VOTES_PERCENTILE = 0.75
+
+COLUMNS = ("movie_id", "primaryTitle", "startYear", "averageRating", "numVotes", "score")
+SCORE = COLUMNS.index("score")
+
+# Score bayésien d'un film, paramètres nommés :c (note moyenne) et :m (votes a priori)
+SCORE_SQL = "(r.numVotes * r.averageRating + :m * :c) / (r.numVotes + :m)"
+DECADE_SQL = f"COALESCE(m.startYear / 10 * 10, {NO_DECADE})"
+
+
+def _fetch(conn, sql, params=()):
+    if hasattr(conn, "ops"):
+        # django.db.connection : paramètres au format %s / %(nom)s
+        sql = re.sub(r":(\w+)", r"%(\1)s", sql) if isinstance(params, dict) else sql.replace("?", "%s")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _decade(year):
+    return year // 10 * 10
+
+
+# --- Construction -------------------------------------------------------------
+
+def score_parameters(conn):
+    """(C, m) : note moyenne des films notés et votes au centile PRIOR_VOTES_PERCENTILE."""
+    count, mean = conn.execute(
+        "SELECT COUNT(*), AVG(averageRating) FROM Rating "
+        "WHERE averageRating IS NOT NULL AND numVotes IS NOT NULL").fetchone()
+    if not count:
+        return 0.0, 1
+    prior_votes = conn.execute(
+        "SELECT numVotes FROM Rating WHERE averageRating IS NOT NULL AND numVotes IS NOT NULL "
+        "ORDER BY numVotes LIMIT 1 OFFSET ?", (int((count - 1) * PRIOR_VOTES_PERCENTILE),)).fetchone()[0]
+    return mean, max(prior_votes, 1)
+
+
+def build_leaderboard(conn, top_k=TOP_K):
+    """
+    (Re)construit Leaderboard et LeaderboardMeta dans une transaction.
+
+    Returns:
+        dict (rows, lists, mean_rating, prior_votes, seconds)
+    """
+    start = time.perf_counter()
+    mean_rating, prior_votes = score_parameters(conn)
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {META_TABLE}")
+        conn.execute(f"""
+            CREATE TABLE {TABLE} (
+                genre TEXT NOT NULL,
+                decade INTEGER NOT NULL,
+                titleType TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                movie_id TEXT NOT NULL,
+                primaryTitle TEXT,
+                startYear INTEGER,
+                averageRating REAL,
+                numVotes INTEGER,
+                score REAL NOT NULL,
+                PRIMARY KEY (genre, decade, titleType, rank)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(f"""
+            CREATE TABLE {META_TABLE} (
+                mean_rating REAL NOT NULL,
+                prior_votes INTEGER NOT NULL,
+                top_k INTEGER NOT NULL,
+                built_at TEXT
+            )
+        """)
+        conn.execute(f"""
+            INSERT INTO {TABLE}
+            SELECT genre, decade, titleType, rank, movie_id, primaryTitle, startYear,
+                   averageRating, numVotes, score
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                           PARTITION BY genre, decade, titleType
+                           ORDER BY score DESC, numVotes DESC, movie_id) AS rank
+                FROM (
+                    SELECT g.genre, {DECADE_SQL} AS decade, COALESCE(m.titleType, '') AS titleType,
+                           m.movie_id, m.primaryTitle, m.startYear, r.averageRating, r.numVotes,
+                           {SCORE_SQL} AS score
+                    FROM Movie m
+                    JOIN Rating r ON r.movie_id = m.movie_id
+                    JOIN (SELECT movie_id, genre_name AS genre FROM MovieGenre
+                          UNION ALL
+                          SELECT movie_id, '{ALL_GENRES}' FROM Movie) g ON g.movie_id = m.movie_id
+                    WHERE r.averageRating IS NOT NULL AND r.numVotes IS NOT NULL
+                )
+            )
+            WHERE rank <= :k
+        """, {"c": mean_rating, "m": prior_votes, "k": top_k})
+        conn.execute(f"INSERT INTO {META_TABLE} VALUES (?, ?, ?, ?)",
+                     (mean_rating, prior_votes, top_k, datetime.now(timezone.utc).isoformat()))
+    rows, lists = conn.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT genre || '/' || decade || '/' || titleType) FROM {TABLE}").fetchone()
+    return {"rows": rows, "lists": lists, "mean_rating": mean_rating, "prior_votes": prior_votes,
+            "seconds": time.perf_counter() - start}
+
+
+# --- Lecture ------------------------------------------------------------------
+
+def load_meta(conn):
+    """(mean_rating, prior_votes, top_k) ou None si le classement n'a pas été construit."""
+    try:
+        rows = _fetch(conn, f"SELECT mean_rating, prior_votes, top_k FROM {META_TABLE}")
+    except Exception:
+        return None
+    return tuple(rows[0]) if rows else None
+
+
+def top_n_exact(conn, n, genre=None, start_year=None, end_year=None, title_type="movie", meta=None):
+    """Même résultat que top_n, calculé sur la jointure complète (référence et repli)."""
+    meta = meta or load_meta(conn)
+    mean_rating, prior_votes = (meta[0], meta[1]) if meta else score_parameters(conn)
+    conditions = ["r.averageRating IS NOT NULL", "r.numVotes IS NOT NULL", "COALESCE(m.titleType, '') = :title_type"]
+    if genre is not None:
+        conditions.append("m.movie_id IN (SELECT movie_id FROM MovieGenre WHERE genre_name = :genre)")
+    if start_year is not None:
+        conditions.append("m.startYear >= :start_year")
+    if end_year is not None:
+        conditions.append("m.startYear <= :end_year")
+    sql = f"""
+        SELECT m.movie_id, m.primaryTitle, m.startYear, r.averageRating, r.numVotes, {SCORE_SQL} AS score
+        FROM Movie m
+        JOIN Rating r ON r.movie_id = m.movie_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY score DESC, r.numVotes DESC, m.movie_id
+        LIMIT :n
+    """
+    return _fetch(conn, sql, {"c": mean_rating, "m": prior_votes, "title_type": title_type, "genre": genre,
+                              "start_year": start_year, "end_year": end_year, "n": n})
+
+
+def top_n(conn, n, genre=None, start_year=None, end_year=None, title_type="movie"):
+    """
+    N meilleurs films au score bayésien, pour un genre (None = tous) et une
+    fenêtre d'années (bornes incluses, None = ouverte).
+
+    Returns:
+        liste de tuples (movie_id, primaryTitle, startYear, averageRating, numVotes, score)
+    """
+    meta = load_meta(conn)
+    if meta is None:
+        raise LookupError(f"Table {TABLE} absente : lancer `python cli.py leaderboard`")
+    top_k = meta[2]
+    if n > top_k:
+        return top_n_exact(conn, n, genre, start_year, end_year, title_type, meta)
+
+    # Sans fenêtre, les films sans année (decade = -1) sont aussi classés
+    low = NO_DECADE if start_year is None and end_year is None else _decade(start_year or 0)
+    high = _decade(end_year) if end_year is not None else 1 << 30
+    # Décennie entière : ses n premiers rangs suffisent ; décennie coupée par la fenêtre : toute sa liste
+    partial = set()
+    if start_year is not None and start_year % 10:
+        partial.add(low)
+    if end_year is not None and end_year % 10 != 9:
+        partial.add(high)
+    rows = _fetch(conn, f"""
+        SELECT decade, rank, {', '.join(COLUMNS)} FROM {TABLE}
+        WHERE genre = ? AND titleType = ? AND decade BETWEEN ? AND ?
+          AND (rank <= ? OR decade IN ({', '.join('?' * len(partial)) or 'NULL'}))
+        ORDER BY decade, rank
+    """, (genre or ALL_GENRES, title_type, low, high, n, *partial))
+
+    lists = {}
+    for row in rows:
+        decade, rank, values = row[0], row[1], tuple(row[2:])
+        candidates = lists.setdefault(decade, {"size": 0, "rows": []})
+        candidates["size"] = rank
+        year = values[2]
+        if decade in partial and not ((start_year is None or year >= start_year)
+                                      and (end_year is None or year <= end_year)):
+            continue
+        candidates["rows"].append(values)
+
+    for decade in partial & lists.keys():
+        candidates = lists[decade]
+        # Liste tronquée à top_k et trop peu de films dans la fenêtre : calcul exact sur ces années
+        if len(candidates["rows"]) < n and candidates["size"] >= top_k:
+            first = decade if start_year is None else max(decade, start_year)
+            last = decade + 9 if end_year is None else min(decade + 9, end_year)
+            candidates["rows"] = [tuple(r) for r in top_n_exact(conn, n, genre, first, last, title_type, meta)]
+
+    merged = heapq.merge(*(lists[d]["rows"] for d in sorted(lists)),
+                         key=lambda r: (-r[SCORE], -(r[4] or 0), r[0]))
+    return list(islice(merged, n))
+
+
+def top_movie_ids(conn, n, genre=None, start_year=None, end_year=None, title_type="movie"):
+    return [row[0] for row in top_n(conn, n, genre, start_year, end_year, title_type)]
+
+
+def top_movies(n=10):
+    """
+    Top N de la page d'accueil : objets Movie (avec leur Rating) dans l'ordre du
+    classement. Sans table Leaderboard, tri ORM sur la note brute comme avant.
+    """
+    from django.db import connection
+    from .models import Movie
+
+    queryset = Movie.objects.select_related('rating')
+    try:
+        ids = top_movie_ids(connection, n)
+    except LookupError:
+        return list(queryset.order_by('-rating__averageRating')[:n])
+    movies = queryset.in_bulk(ids)
+    return [movies[movie_id] for movie_id in ids if movie_id in movies]
@@ -0,0 +1,233 @@
+"""
+Index MongoDB déclarés en un seul endroit.
+
+INDEXES liste, par collection, les index dont a besoin la charge de travail :
+    - collections plates (migrate_flat) : clés movie_id / person_id utilisées
+      par les $lookup de migrate_structured ;
+    - movies_complete et persons_complete : index composé et multiclé des
+      requêtes Q1-Q9 (queries_mongo.py).
+
+sync_indexes() crée les index manquants. Depuis MongoDB 4.2 l'option
+`background` est ignorée : toute construction est « hybride » (verrou exclusif
+au début et à la fin seulement). Sur un Replica Set, l'index est construit
+simultanément sur chaque membre et validé quand tous les membres votants l'ont
+terminé (commitQuorum="votingMembers").
+
+check_indexes() confronte la déclaration à la base :
+    - manquants : déclarés mais absents ;
+    - non déclarés : présents mais absents de INDEXES ;
+    - inutilisés : aucun accès dans $indexStats (sommé sur tous les membres
+      joignables) et jamais retenu par le plan d'une requête Q1-Q9 ;
+    - requêtes sans index : plan gagnant (explain queryPlanner) en COLLSCAN
+      alors que la requête devrait utiliser un index.
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+
+# Collection -> [(nom, clés, options)]
+INDEXES = {
+    "Movie": [("movie_id_1", [("movie_id", ASCENDING)], {"unique": True})],
+    "Rating": [("movie_id_1", [("movie_id", ASCENDING)], {})],
+    "MovieGenre": [("movie_id_1", [("movie_id", ASCENDING)], {})],
+    # $lookup de la distribution : égalité sur movie_id puis tri sur ordering
+    "MoviePrincipal": [
+        ("movie_id_1_ordering_1", [("movie_id", ASCENDING), ("ordering", ASCENDING)], {}),
+        ("person_id_1", [("person_id", ASCENDING)], {}),
+    ],
+    "Person": [("person_id_1", [("person_id", ASCENDING)], {"unique": True})],
+    "Character": [
+        ("movie_id_1_person_id_1", [("movie_id", ASCENDING), ("person_id", ASCENDING)], {}),
+        ("person_id_1", [("person_id", ASCENDING)], {}),
+    ],
+    # $lookup des films similaires : égalité sur movie_id puis tri sur rank
+    "MovieSimilar": [("movie_id_1_rank_1", [("movie_id", ASCENDING), ("rank", ASCENDING)], {})],
+    "movies_complete": [
+        # Q2 : égalité (genres, multiclé), tri (rating.average), intervalle (year) — règle ESR
+        ("genres_1_rating.average_-1_year_1",
+         [("genres", ASCENDING), ("rating.average", DESCENDING), ("year", ASCENDING)], {}),
+        # Q1, Q4, Q6 : recherche d'une personne dans la distribution (multiclé)
+        ("cast.name_1", [("cast.name", ASCENDING)], {}),
+        # Q8 : films à plus de N votes
+        ("rating.votes_-1", [("rating.votes", DESCENDING)], {}),
+        # Q9 : films les plus longs (tri + limite)
+        ("runtime_-1", [("runtime", DESCENDING)], {}),
+    ],
+    # Q1, Q4, Q6 par nom (un document par homonyme) ; par person_id, l'index _id suffit
+    "persons_complete": [("name_1", [("name", ASCENDING)], {})],
+}
+STRUCTURED_COLLECTIONS = ["movies_complete", "persons_complete"]
+FLAT_COLLECTIONS = [name for name in INDEXES if name not in STRUCTURED_COLLECTIONS]
+
+
+def _key(keys):
+    # Direction 1 / -1, ou type d'index ("hashed", "text"...)
+    return tuple((field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys)
+
+
+def is_replica_set(db):
+    return "setName" in db.client.admin.command("hello")
+
+
+def shard_key(collection):
+    """Clés de l'index de la clé de shard (sur mongos, collection shardée), sinon None."""
+    info = collection.database.client.config.collections.find_one({"_id": collection.full_name})
+    return _key(info["key"].items()) if info else None
+
+
+def existing_indexes(collection):
+    """{nom: clés} des index présents, hors _id_ et index de la clé de shard (gérés par mongo_sharding)."""
+    sharding = shard_key(collection) if collection.database.client.is_mongos else None
+    return {name: _key(info["key"]) for name, info in collection.index_information().items()
+            if name != "_id_" and _key(info["key"]) != sharding}
+
+
+def sync_indexes(db, collections=None, drop_undeclared=False, verbose=True):
+    """
+    Crée les index déclarés manquants (et supprime les non déclarés si demandé).
+
+    Returns:
+        liste de (collection, nom, action) avec action 'créé', 'supprimé' ou 'présent'
+    """
+    quorum = {"commitQuorum": "votingMembers"} if is_replica_set(db) else {}
+    present = set(db.list_collection_names())
+    actions = []
+    for name in collections or INDEXES:
+        if name not in present:
+            if verbose:
+                print(f"    {name} : collection absente, index ignorés")
+            continue
+        collection = db[name]
+        existing = existing_indexes(collection)
+        existing_keys = set(existing.values())
+        declared = {_key(keys) for _, keys, _ in INDEXES[name]}
+
+        models = [IndexModel(keys, name=index_name, **options)
+                  for index_name, keys, options in INDEXES[name] if _key(keys) not in existing_keys]
+        if models:
+            collection.create_indexes(models, **quorum)
+        for index_name, keys, _ in INDEXES[name]:
+            actions.append((name, index_name, "présent" if _key(keys) in existing_keys else "créé"))
+        if drop_undeclared:
+            for index_name, keys in existing.items():
+                if keys not in declared:
+                    collection.drop_index(index_name)
+                    actions.append((name, index_name, "supprimé"))
+
+    if verbose:
+        for name, index_name, action in actions:
+            if action != "présent":
+                print(f"    Index {action} : {name}.{index_name}")
+    return actions
+
+
+# --- Vérification ---------------------------------------------------------------
+
+def member_clients(client):
+    """Un client en connexion directe par membre du Replica Set (le client lui-même en standalone)."""
+    hello = client.admin.command("hello")
+    if "setName" not in hello:
+        return [client]
+    return [MongoClient(f"mongodb://{host}/", directConnection=True, serverSelectionTimeoutMS=2000)
+            for host in hello.get("hosts", [])]
+
+
+def index_usage(db, collections=None):
+    """
+    Accès par index depuis le dernier redémarrage, sommés sur les membres joignables.
+
+    Returns:
+        ({(collection, nom): ops}, [membres interrogés])
+    """
+    usage, hosts = {}, []
+    for client in member_clients(db.client):
+        member_db = client[db.name]
+        try:
+            present = set(member_db.list_collection_names())
+            for name in collections or INDEXES:
+                if name not in present:
+                    continue
+                for stats in member_db[name].aggregate([{"$indexStats": {}}]):
+                    key = (name, stats["name"])
+                    usage[key] = usage.get(key, 0) + int(stats["accesses"]["ops"])
+            hosts.append(f"{client.address[0]}:{client.address[1]}")
+        except Exception as e:
+            print(f"    Membre injoignable, ignoré : {e}")
+        finally:
+            if client is not db.client:
+                client.close()
+    return usage, hosts
+
+
+def _plan_nodes(node):
+    """Parcourt un arbre de plan (inputStage / inputStages / queryPlan)."""
+    if not isinstance(node, dict):
+        return
+    if "stage" in node:
+        yield node
+    for child in ("inputStage", "queryPlan"):
+        yield from _plan_nodes(node.get(child))
+    for child in node.get("inputStages", []):
+        yield from _plan_nodes(child)
+
+
+def _winning_plans(explain):
+    """Plans gagnants d'un explain find ou aggregate (curseur en tête de pipeline, SBE ou classique)."""
+    if isinstance(explain, dict):
+        if "winningPlan" in explain:
+            yield explain["winningPlan"]
+        for value in explain.values():
+            if isinstance(value, (dict, list)):
+                yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from _winning_plans(value)
+
+
+def explain_plan(db, command):
+    """
+    Args:
+        command: commande find ou aggregate (voir queries_mongo.workload)
+    Returns:
+        (index utilisés, scan complet) du plan gagnant
+    """
+    explain = db.command("explain", command, verbosity="queryPlanner")
+    indexes, collscan = set(), False
+    for plan in _winning_plans(explain):
+        for node in _plan_nodes(plan):
+            if node.get("indexName"):
+                indexes.add(node["indexName"])
+            if node["stage"] == "COLLSCAN":
+                collscan = True
+    return indexes, collscan
+
+
+def check_indexes(db, workload):
+    """
+    Args:
+        workload: liste de (nom, commande, utilise_un_index) — requêtes Q1-Q9
+    Returns:
+        dict missing, undeclared, unused, plans, hosts
+    """
+    report = {"missing": [], "undeclared": [], "unused": [], "plans": []}
+    present = set(db.list_collection_names())
+    for name in INDEXES:
+        if name not in present:
+            continue
+        existing = existing_indexes(db[name])
+        declared = {_key(keys) for _, keys, _ in INDEXES[name]}
+        report["missing"] += [(name, index_name) for index_name, keys, _ in INDEXES[name]
+                              if _key(keys) not in set(existing.values())]
+        report["undeclared"] += [(name, index_name) for index_name, keys in existing.items()
+                                 if keys not in declared]
+
+    used_by_workload = set()
+    for query, command, expects_index in workload:
+        collection = command.get("find") or command.get("aggregate")
+        indexes, collscan = explain_plan(db, command)
+        used_by_workload.update((collection, index_name) for index_name in indexes)
+        report["plans"].append((query, sorted(indexes), collscan, expects_index and collscan))
+
+    usage, report["hosts"] = index_usage(db)
+    report["unused"] = sorted(key for key, ops in usage.items()
+                              if key[1] != "_id_" and ops == 0 and key not in used_by_workload)
+    return report
@@ -1,10 +1,25 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 from django.conf import settings
 import re
 
+from .instrumentation import mongo_listener
+
 class MongoService:
+    GENRE_STATS_PIPELINE = [
+        {"$unwind": "$genres"},
+        {"$group": {"_id": "$genres", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 10},
+
+        {"$project": {
+            "_id": 0,
+            "name": "$_id",
+            "count": 1
+        }}
+    ]
+
     def __init__(self):
-        self.client = MongoClient(settings.MONGO_URI)
+        self.client = MongoClient(settings.MONGO_URI, event_listeners=[mongo_listener])
         self.db = self.client[settings.MONGO_DB_NAME]
         self.collection = self.db['movies_complete'] 
 
@@ -48,19 +63,52 @@ class MongoService:
         Correction : Ajout de $project pour renommer '_id' en 'name' afin d'éviter 
         les erreurs de template Django.
         """
-        pipeline = [
-            {"$unwind": "$genres"},
-            {"$group": {"_id": "$genres", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10},
-        
-            {"$project": {
-                "_id": 0,
-                "name": "$_id",
-                "count": 1
-            }}
-        ]
-        return list(self.collection.aggregate(pipeline))
+        return list(self.collection.aggregate(self.GENRE_STATS_PIPELINE))
+
+
+class AsyncMongoService:
+    """
+    Équivalent asynchrone de MongoService (driver PyMongo async) pour les vues ASGI.
+    Le client est créé à la première utilisation, dans la boucle d'événements du serveur.
+    """
+    def __init__(self):
+        self._client = None
+
+    @property
+    def collection(self):
+        if self._client is None:
+            self._client = AsyncMongoClient(settings.MONGO_URI, event_listeners=[mongo_listener])
+        return self._client[settings.MONGO_DB_NAME]['movies_complete']
+
+    async def get_movie_by_id(self, tconst):
+        if not tconst:
+            return None
+
+        clean_id = str(tconst).strip()
+
+        movie = await self.collection.find_one({"_id": clean_id})
+
+        if not movie:
+            movie = await self.collection.find_one({"movie_id": clean_id})
+
+        if not movie:
+            regex_id = re.compile(f"^{re.escape(clean_id)}$", re.I)
+            movie = await self.collection.find_one({
+                "$or": [
+                    {"_id": regex_id},
+                    {"movie_id": regex_id}
+                ]
+            })
+
+        return movie
+
+    async def get_movies_count(self):
+        return await self.collection.count_documents({})
+
+    async def get_genre_stats(self):
+        cursor = await self.collection.aggregate(MongoService.GENRE_STATS_PIPELINE)
+        return await cursor.to_list()
 
 
-mongo_service = MongoService()
\ No newline at end of file
+mongo_service = MongoService()
+async_mongo_service = AsyncMongoService()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Partitionnement des collections sur un cluster shardé (mongos).
+
+Clés de shard :
+    - collections plates : movie_id (ou person_id) hashé. Les $lookup de
+      migrate_structured filtrent par égalité sur cette clé et ne visent qu'un
+      shard ;
+    - movies_complete, selon MOVIES_SHARD_KEY (CINEEXPLORE_SHARD_KEY) :
+        * "hashed_id" : _id hashé. La page Détails (find_one par _id) est
+          ciblée et l'écriture est répartie uniformément ;
+        * "year_zones" : (year, _id) par intervalles. Les années sont
+          découpées en autant de zones que de shards, à effectifs égaux
+          ($bucketAuto sur Movie), et chaque zone est épinglée à un shard : une
+          analyse sur une période ne lit que les shards concernés.
+
+prepare_collection() est appelé par les migrations juste après la suppression
+d'une collection et avant le chargement en masse. Sur mongos, il shard la
+collection vide et la pré-découpe : chunks initiaux répartis par le hachage,
+ou coupures aux bornes de zones. Le chargement écrit donc d'emblée sur tous les
+shards, sans attendre que le balancer découpe et déplace des chunks pleins.
+Hors mongos (Replica Set rs0, standalone), les fonctions ne font rien.
+"""
+
+import os
+
+from bson import MaxKey, MinKey
+from pymongo.errors import OperationFailure
+
+HASHED_ID = "hashed_id"
+YEAR_ZONES = "year_zones"
+MOVIES_SHARD_KEY = os.environ.get("CINEEXPLORE_SHARD_KEY", HASHED_ID)
+CHUNKS_PER_SHARD = 4
+
+SHARD_KEYS = {
+    "Movie": {"movie_id": "hashed"},
+    "Rating": {"movie_id": "hashed"},
+    "MovieGenre": {"movie_id": "hashed"},
+    "MoviePrincipal": {"movie_id": "hashed"},
+    "Character": {"movie_id": "hashed"},
+    "TitleAlias": {"movie_id": "hashed"},
+    "MovieWriter": {"movie_id": "hashed"},
+    "MovieSimilar": {"movie_id": "hashed"},
+    "Person": {"person_id": "hashed"},
+}
+MOVIES_SHARD_KEYS = {
+    HASHED_ID: {"_id": "hashed"},
+    YEAR_ZONES: {"year": 1, "_id": 1},
+}
+
+
+def is_mongos(db):
+    return db.client.admin.command("hello").get("msg") == "isdbgrid"
+
+
+def shard_key_for(name, profile=None):
+    """Clé de shard d'une collection ; `profile` (HASHED_ID, YEAR_ZONES) impose une clé de movies_complete."""
+    if profile is not None or name == "movies_complete":
+        return MOVIES_SHARD_KEYS[profile or MOVIES_SHARD_KEY]
+    return SHARD_KEYS.get(name)
+
+
+def shard_names(db):
+    return [shard["_id"] for shard in db.client.admin.command("listShards")["shards"]]
+
+
+def year_boundaries(db, num_zones, source="Movie", field="startYear"):
+    """Années de coupure donnant `num_zones` intervalles d'effectifs proches (films de `source`)."""
+    buckets = db[source].aggregate([
+        {"$project": {"year": {"$convert": {"input": f"${field}", "to": "int", "onError": None, "onNull": None}}}},
+        {"$match": {"year": {"$ne": None}}},
+        {"$bucketAuto": {"groupBy": "$year", "buckets": num_zones}},
+    ])
+    return [bucket["_id"]["min"] for bucket in buckets][1:]
+
+
+def _shard_hashed(db, name, key, shards):
+    namespace = f"{db.name}.{name}"
+    try:
+        db.client.admin.command("shardCollection", namespace, key=key,
+                                numInitialChunks=CHUNKS_PER_SHARD * len(shards))
+    except OperationFailure:
+        # numInitialChunks n'est plus accepté par les versions récentes (un chunk par shard)
+        db.client.admin.command("shardCollection", namespace, key=key)
+
+
+def _shard_year_zones(db, name, key, shards, boundaries):
+    """Une zone par shard, intervalles d'années contigus ; coupure des chunks aux bornes."""
+    admin = db.client.admin
+    namespace = f"{db.name}.{name}"
+    edges = [MinKey()] + list(boundaries) + [MaxKey()]
+    # Plages d'un chargement précédent (elles survivent à la suppression de la collection)
+    for tag in list(db.client.config.tags.find({"ns": namespace})):
+        admin.command("updateZoneKeyRange", namespace, min=tag["min"], max=tag["max"], zone=None)
+    zones = []
+    for i, shard in enumerate(shards[:len(edges) - 1]):
+        zone = f"{name}_years_{i}"
+        admin.command("addShardToZone", shard, zone=zone)
+        low = {"year": edges[i], "_id": MinKey()}
+        high = {"year": edges[i + 1], "_id": MinKey() if i + 2 < len(edges) else MaxKey()}
+        admin.command("updateZoneKeyRange", namespace, min=low, max=high, zone=zone)
+        zones.append((zone, low, high))
+    # Collection vide avec zones : chunks créés et placés aux bornes des zones par shardCollection
+    admin.command("shardCollection", namespace, key=key, unique=True)
+    return zones
+
+
+def prepare_collection(db, name, profile=None, boundaries=None, verbose=True):
+    """
+    Shard une collection vide avant son chargement (no-op hors mongos ou sans clé déclarée).
+
+    Returns:
+        la clé de shard appliquée, ou None
+    """
+    key = shard_key_for(name, profile)
+    if key is None or not is_mongos(db):
+        return None
+    admin = db.client.admin
+    shards = shard_names(db)
+    try:
+        admin.command("enableSharding", db.name)
+    except OperationFailure:
+        pass  # Déjà activé, ou implicite (MongoDB 6.0+)
+
+    if "hashed" in key.values():
+        _shard_hashed(db, name, key, shards)
+    else:
+        if boundaries is None:
+            boundaries = year_boundaries(db, len(shards))
+        _shard_year_zones(db, name, key, shards, boundaries)
+    if verbose:
+        print(f"    {name} shardée sur {key} ({len(shards)} shards, chunks pré-découpés)")
+    return key
+
+
+def range_shard_key(db, name):
+    """
+    Champs identifiant un document d'une collection shardée par intervalles
+    (clé de shard + _id), sinon None (collection non shardée ou clé hashée sur _id).
+    Un $merge vers une telle collection devrait porter `on` sur ces champs, or
+    `on` refuse les valeurs nulles (films sans année) : les migrations écrivent
+    alors par ReplaceOne(filtre = ces champs, upsert) côté client.
+    """
+    if not is_mongos(db):
+        return None
+    info = db.client.config.collections.find_one({"_id": f"{db.name}.{name}"})
+    if not info or "hashed" in info["key"].values():
+        return None
+    return list(dict.fromkeys(list(info["key"]) + ["_id"]))
+
+
+def chunk_distribution(db, name):
+    """{shard: nombre de chunks} d'une collection shardée."""
+    config = db.client.config
+    info = config.collections.find_one({"_id": f"{db.name}.{name}"})
+    if info is None:
+        return {}
+    # Depuis MongoDB 5.0 les chunks référencent la collection par uuid
+    query = {"uuid": info["uuid"]} if "uuid" in info else {"ns": info["_id"]}
+    return {row["_id"]: row["count"] for row in
+            config.chunks.aggregate([{"$match": query}, {"$group": {"_id": "$shard", "count": {"$sum": 1}}}])}
+
+
+def targeted_shards(explain):
+    """Shards lus par une requête d'après son explain via mongos (winningPlan.shards)."""
+    shards = set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            if isinstance(node.get("shards"), list):
+                shards.update(shard["shardName"] for shard in node["shards"] if "shardName" in shard)
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(explain)
+    return shards
@@ -0,0 +1,94 @@
+import logging
+import threading
+
+import httpx
+import requests
+from django.conf import settings
+
+from .instrumentation import track_http
+
+logger = logging.getLogger(__name__)
+
+
+class OmdbService:
+    """
+    Accès à l'API OMDb (affiches). En mode bouchon, aucun appel réseau n'est fait.
+    Les réponses de l'API (affiche ou absence d'affiche) sont gardées en mémoire
+    (OMDB_CACHE_SIZE entrées) ; les erreurs (réseau, quota) ne sont pas mises en cache.
+    Les résultats passent par le logger movies.omdb_service (DEBUG/INFO, rien
+    sur la sortie standard à chaque affiche).
+    """
+
+    def __init__(self):
+        self.api_key = settings.OMDB_API_KEY
+        self.stub = settings.OMDB_STUB
+        self.cache_size = settings.OMDB_CACHE_SIZE
+        self._async_client = None
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+    def _remember(self, movie_identifier, response):
+        """Extrait l'affiche et la met en cache si l'API a répondu pour ce film."""
+        poster = self._extract_poster(movie_identifier, response)
+        if response.get('Response') != "True":
+            return poster
+        with self._cache_lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[movie_identifier] = poster
+        return poster
+
+    def cached_count(self):
+        return len(self._cache)
+
+    def _url(self, movie_identifier):
+        return f"http://www.omdbapi.com/?i={movie_identifier}&apikey={self.api_key}"
+
+    def get_poster(self, movie_id):
+        """Retourne l'URL de l'affiche du film, ou None si elle est indisponible."""
+        movie_identifier = str(movie_id).strip()
+        if self.stub:
+            return None
+        if movie_identifier in self._cache:
+            return self._cache[movie_identifier]
+
+        try:
+            with track_http():
+                response = requests.get(self._url(movie_identifier), timeout=5).json()
+            return self._remember(movie_identifier, response)
+        except Exception as e:
+            logger.info("OMDb injoignable pour %s : %s", movie_identifier, e)
+        return None
+
+    async def aget_poster(self, movie_id):
+        """Version asynchrone de get_poster (client httpx partagé)."""
+        movie_identifier = str(movie_id).strip()
+        if self.stub:
+            return None
+        if movie_identifier in self._cache:
+            return self._cache[movie_identifier]
+
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=5)
+        try:
+            with track_http():
+                response = (await self._async_client.get(self._url(movie_identifier))).json()
+            return self._remember(movie_identifier, response)
+        except Exception as e:
+            logger.info("OMDb injoignable pour %s : %s", movie_identifier, e)
+        return None
+
+    @staticmethod
+    def _extract_poster(movie_identifier, response):
+        if response.get('Response') == "True":
+            poster = response.get('Poster')
+            if poster and poster != "N/A":
+                logger.debug("Affiche trouvée pour %s", movie_identifier)
+                return poster
+            logger.debug("Pas d'affiche pour %s", movie_identifier)
+        else:
+            logger.info("Erreur OMDb pour %s : %s", movie_identifier, response.get('Error'))
+        return None
+
+
+omdb_service = OmdbService()
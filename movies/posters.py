@@ -0,0 +1,133 @@
+"""
+Miniatures locales des affiches OMDb.
+
+L'accueil affichait l'affiche OMDb en taille réelle, chargée depuis le serveur
+d'images distant à chaque visite. PosterCache télécharge l'affiche une fois,
+la réduit à POSTER_THUMB_SIZE (JPEG progressif) et l'enregistre dans
+POSTER_DIR sous <tconst>-<empreinte de l'URL>.jpg : servie par l'application
+(/posters/, movies/static_assets.serve_poster) avec un cache d'un an, puisque
+le nom change si OMDb change d'affiche.
+
+Les miniatures présentes sont indexées au premier appel : un film déjà en
+cache ne déclenche ni appel OMDb ni téléchargement. Sans Pillow, ou si le
+téléchargement échoue, l'URL distante est renvoyée comme avant.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+
+import httpx
+import requests
+from django.conf import settings
+
+from .instrumentation import track_http
+from .omdb_service import omdb_service
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+JPEG_QUALITY = 80
+
+
+class PosterCache:
+
+    def __init__(self, directory=None, size=None, url_prefix="/posters/"):
+        self.directory = str(directory or settings.POSTER_DIR)
+        self.size = tuple(size or settings.POSTER_THUMB_SIZE)
+        self.url_prefix = url_prefix
+        self._files = None
+        self._lock = threading.Lock()
+        self._async_client = None
+
+    def _index(self):
+        """{tconst: nom de fichier} des miniatures présentes (lu une fois)."""
+        if self._files is None:
+            with self._lock:
+                if self._files is None:
+                    files = {}
+                    if os.path.isdir(self.directory):
+                        for name in os.listdir(self.directory):
+                            if name.endswith(".jpg"):
+                                files[name.rsplit("-", 1)[0]] = name
+                    self._files = files
+        return self._files
+
+    def local_url(self, movie_id):
+        name = self._index().get(str(movie_id).strip())
+        return self.url_prefix + name if name else None
+
+    def _file_name(self, movie_id, remote_url):
+        return f"{movie_id}-{hashlib.sha1(remote_url.encode()).hexdigest()[:12]}.jpg"
+
+    def _store(self, movie_id, remote_url, data):
+        """Réduit et enregistre l'image ; renvoie l'URL locale."""
+        image = Image.open(io.BytesIO(data))
+        image = image.convert("RGB")
+        image.thumbnail(self.size)
+        name = self._file_name(movie_id, remote_url)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        temporary = path + ".tmp"
+        image.save(temporary, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        os.replace(temporary, path)
+        files = self._index()
+        with self._lock:
+            previous = files.get(movie_id)
+            files[movie_id] = name
+        if previous and previous != name:
+            try:
+                os.remove(os.path.join(self.directory, previous))
+            except OSError:
+                pass
+        return self.url_prefix + name
+
+    def thumbnail(self, movie_id, remote_url):
+        """URL de la miniature locale de `remote_url`, créée si besoin ; l'URL distante en cas d'échec."""
+        movie_id = str(movie_id).strip()
+        if not remote_url or Image is None:
+            return remote_url
+        try:
+            with track_http():
+                response = requests.get(remote_url, timeout=10)
+            response.raise_for_status()
+            return self._store(movie_id, remote_url, response.content)
+        except Exception as e:
+            logger.info("Miniature impossible pour %s : %s", movie_id, e)
+        return remote_url
+
+    async def athumbnail(self, movie_id, remote_url):
+        movie_id = str(movie_id).strip()
+        if not remote_url or Image is None:
+            return remote_url
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=10)
+        try:
+            with track_http():
+                response = await self._async_client.get(remote_url)
+            response.raise_for_status()
+            # Décodage et réduction hors de la boucle d'événements
+            return await asyncio.to_thread(self._store, movie_id, remote_url, response.content)
+        except Exception as e:
+            logger.info("Miniature impossible pour %s : %s", movie_id, e)
+        return remote_url
+
+    def poster_url(self, movie_id):
+        """Miniature locale si présente, sinon affiche OMDb mise en cache localement."""
+        return self.local_url(movie_id) or self.thumbnail(movie_id, omdb_service.get_poster(movie_id))
+
+    async def aposter_url(self, movie_id):
+        local = self.local_url(movie_id)
+        if local:
+            return local
+        return await self.athumbnail(movie_id, await omdb_service.aget_poster(movie_id))
+
+
+poster_cache = PosterCache()
@@ -0,0 +1,177 @@
+"""
+Page Détails précalculée : fragments HTML rendus à l'avance.
+
+Le contenu de la page Détails ne change qu'à la migration (movies_complete).
+prerender() rend, après migrate_structured, le fragment
+movies/detail_fragment.html de chaque film (ou des top_k films les plus
+votés) et le stocke compressé (zlib) dans la table DetailFragment de la base
+SQLite : une ligne par film, clé primaire movie_id en WITHOUT ROWID.
+
+À l'affichage, FragmentStore.page() lit la ligne par sa clé, décompresse le
+fragment et l'insère entre l'en-tête et le pied de detail.html, rendus une
+seule fois par processus : ni MongoDB ni moteur de templates. Un film absent
+(hors top_k, ajouté depuis) est rendu en direct par la vue.
+
+DetailFragmentMeta garde l'empreinte du template du fragment : si le
+template a changé depuis le précalcul, les fragments sont ignorés jusqu'au
+prochain `python cli.py prerender`. Un processus en cours relit
+DetailFragmentMeta toutes les META_CHECK_SECONDS secondes et après un film
+absent : un prerender ou une invalidation ultérieurs sont pris en compte sans
+redémarrage.
+"""
+
+import hashlib
+import threading
+import time
+import zlib
+
+from movies.leaderboard import _fetch
+
+TABLE = "DetailFragment"
+META_TABLE = "DetailFragmentMeta"
+FRAGMENT_TEMPLATE = "movies/detail_fragment.html"
+PAGE_TEMPLATE = "movies/detail.html"
+COMPRESSION_LEVEL = 9
+BATCH_SIZE = 1000
+META_CHECK_SECONDS = 30
+_MARKER = "\x00fragment\x00"
+
+
+def template_hash():
+    """Empreinte du source du template du fragment (invalide les fragments quand il change)."""
+    from django.template.loader import get_template
+    with open(get_template(FRAGMENT_TEMPLATE).origin.name, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def create_tables(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            movie_id TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            raw_size INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {META_TABLE} (
+            template_hash TEXT NOT NULL,
+            movies INTEGER NOT NULL,
+            rendered_at TEXT NOT NULL
+        )
+    """)
+
+
+def render_fragment(movie):
+    from django.template.loader import render_to_string
+    return render_to_string(FRAGMENT_TEMPLATE, {"movie": movie})
+
+
+def prerender(conn, collection, top_k=None, verbose=True):
+    """
+    Rend et stocke les fragments des films de `collection` (movies_complete),
+    par votes décroissants ; remplace le contenu précédent.
+
+    Returns:
+        (films, octets rendus, octets stockés)
+    """
+    start = time.perf_counter()
+    create_tables(conn)
+    conn.execute(f"DELETE FROM {TABLE}")
+    cursor = collection.find().sort("rating.votes", -1)
+    if top_k:
+        cursor = cursor.limit(top_k)
+
+    movies, raw_bytes, stored_bytes, batch = 0, 0, 0, []
+    for movie in cursor:
+        html = render_fragment(movie).encode("utf-8")
+        body = zlib.compress(html, COMPRESSION_LEVEL)
+        batch.append((str(movie["_id"]), body, len(html)))
+        movies, raw_bytes, stored_bytes = movies + 1, raw_bytes + len(html), stored_bytes + len(body)
+        if len(batch) == BATCH_SIZE:
+            conn.executemany(f"INSERT OR REPLACE INTO {TABLE} VALUES (?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany(f"INSERT OR REPLACE INTO {TABLE} VALUES (?, ?, ?)", batch)
+    conn.execute(f"DELETE FROM {META_TABLE}")
+    conn.execute(f"INSERT INTO {META_TABLE} VALUES (?, ?, datetime('now'))", (template_hash(), movies))
+    conn.commit()
+    if verbose:
+        ratio = raw_bytes / stored_bytes if stored_bytes else 0.0
+        print(f" Fragments précalculés : {movies:,} films, {raw_bytes / 1e6:.1f} Mo rendus, "
+              f"{stored_bytes / 1e6:.1f} Mo stockés (x{ratio:.1f}) en {time.perf_counter() - start:.1f} s")
+    return movies, raw_bytes, stored_bytes
+
+
+def invalidate(conn):
+    """Désactive les fragments (movies_complete reconstruite) jusqu'au prochain prerender()."""
+    create_tables(conn)
+    conn.execute(f"DELETE FROM {META_TABLE}")
+    conn.execute(f"DELETE FROM {TABLE}")
+    conn.commit()
+
+
+class FragmentStore:
+    """Lecture des fragments ; `connection` : django.db.connection ou connexion sqlite3."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._enabled = None
+        self._checked_at = 0.0
+        self._layout = None
+
+    @property
+    def enabled(self):
+        """Table présente et template inchangé depuis le précalcul (revérifié périodiquement)."""
+        now = time.monotonic()
+        if self._enabled is None or now - self._checked_at >= META_CHECK_SECONDS:
+            try:
+                rows = _fetch(self.connection, f"SELECT template_hash FROM {META_TABLE}")
+            except Exception:
+                rows = []  # Table absente : prerender jamais lancé
+            self._enabled = bool(rows) and rows[0][0] == template_hash()
+            self._checked_at = now
+        return self._enabled
+
+    def layout(self):
+        """(en-tête, pied) de detail.html autour du fragment, rendus une fois."""
+        if self._layout is None:
+            from django.template.loader import render_to_string
+            head, tail = render_to_string(PAGE_TEMPLATE, {"fragment": _MARKER}).split(_MARKER)
+            self._layout = (head, tail)
+        return self._layout
+
+    def fragment(self, movie_id):
+        if not self.enabled:
+            return None
+        rows = _fetch(self.connection, f"SELECT body FROM {TABLE} WHERE movie_id = ?", (movie_id,))
+        if not rows:
+            self._enabled = None  # Absent : fragments peut-être invalidés, revérifier au prochain appel
+            return None
+        return zlib.decompress(rows[0][0]).decode("utf-8")
+
+    def page(self, movie_id):
+        """Page Détails complète, ou None si le film n'a pas de fragment."""
+        fragment = self.fragment(str(movie_id).strip())
+        if fragment is None:
+            return None
+        head, tail = self.layout()
+        return head + fragment + tail
+
+    def stats(self):
+        rows = _fetch(self.connection, f"SELECT COUNT(*), SUM(raw_size), SUM(LENGTH(body)) FROM {TABLE}")
+        return rows[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_fragment_store():
+    """Magasin de fragments sur la base Django (singleton par processus)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from django.db import connection
+                _store = FragmentStore(connection)
+    return _store
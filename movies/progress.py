@@ -0,0 +1,164 @@
+"""
+Progression et points de reprise des scripts d'import/migration.
+
+ProgressReporter affiche débit et ETA, soit en barre rich (terminal), soit en
+lignes JSON (CINEEXPLORE_PROGRESS=json, ou sortie non interactive) :
+    {"task": "Movie", "done": 20000, "total": 36859, "rate": 41250.3, "eta_s": 0.4}
+
+Les points de reprise mémorisent, par (job, table), la dernière clé traitée et
+le nombre de lignes faites :
+    SqliteCheckpoints  table _migration_checkpoint de la base importée
+                       (même transaction que les lignes insérées)
+    MongoCheckpoints   collection _migration_checkpoints de la base cible
+Après un plantage, le script relance à partir de last_key au lieu de tout
+supprimer et recommencer.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+JSON_INTERVAL = 2.0
+
+
+def _json_mode():
+    mode = os.environ.get("CINEEXPLORE_PROGRESS")
+    if mode:
+        return mode == "json"
+    return not sys.stdout.isatty()
+
+
+class ProgressReporter:
+    """Suivi d'une tâche : advance(n) après chaque lot, close() à la fin."""
+
+    def __init__(self, task, total=None, done=0, json_lines=None):
+        self.task = task
+        self.total = total
+        self.done = done
+        self.initial = done
+        self.started = time.perf_counter()
+        self.json_lines = _json_mode() if json_lines is None else json_lines
+        self._last_emit = 0.0
+        self._progress = None
+        if not self.json_lines:
+            try:
+                from rich.progress import (BarColumn, MofNCompleteColumn, Progress, TextColumn,
+                                           TimeRemainingColumn, TransferSpeedColumn)
+            except ImportError:
+                self.json_lines = True
+            else:
+                self._progress = Progress(
+                    TextColumn("[bold]{task.description}"), BarColumn(), MofNCompleteColumn(),
+                    TextColumn("{task.fields[rate]:,.0f} lignes/s"), TimeRemainingColumn(),
+                )
+                self._progress.start()
+                self._task_id = self._progress.add_task(task, total=total, completed=done, rate=0.0)
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return (self.done - self.initial) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        if self.total is None or self.rate == 0:
+            return None
+        return max(self.total - self.done, 0) / self.rate
+
+    def snapshot(self):
+        eta = self.eta
+        return {
+            "task": self.task, "done": self.done, "total": self.total,
+            "rate": round(self.rate, 1), "eta_s": round(eta, 1) if eta is not None else None,
+        }
+
+    def advance(self, n):
+        self.done += n
+        if self._progress is not None:
+            self._progress.update(self._task_id, completed=self.done, rate=self.rate)
+        elif time.perf_counter() - self._last_emit >= JSON_INTERVAL:
+            self._emit()
+
+    def _emit(self, **extra):
+        self._last_emit = time.perf_counter()
+        print(json.dumps({**self.snapshot(), **extra}), flush=True)
+
+    def close(self):
+        if self._progress is not None:
+            self._progress.stop()
+        else:
+            self._emit(finished=True)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SqliteCheckpoints:
+    """Points de reprise stockés dans la base SQLite importée."""
+
+    TABLE = "_migration_checkpoint"
+
+    def __init__(self, conn):
+        self.conn = conn
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                job TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                last_key TEXT,
+                rows_done INTEGER NOT NULL DEFAULT 0,
+                finished INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT,
+                PRIMARY KEY (job, table_name)
+            )
+        """)
+        conn.commit()
+
+    def get(self, job, table):
+        """{'last_key', 'rows_done', 'finished'} ou None si la table n'a jamais été commencée."""
+        row = self.conn.execute(
+            f"SELECT last_key, rows_done, finished FROM {self.TABLE} WHERE job = ? AND table_name = ?",
+            (job, table)).fetchone()
+        if row is None:
+            return None
+        return {"last_key": row[0], "rows_done": row[1], "finished": bool(row[2])}
+
+    def save(self, job, table, last_key, rows_done, finished=False, commit=True):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {self.TABLE} (job, table_name, last_key, rows_done, finished, updated_at) "
+            f"VALUES (?, ?, ?, ?, ?, ?)",
+            (job, table, None if last_key is None else str(last_key), rows_done, int(finished), _now()))
+        if commit:
+            self.conn.commit()
+
+    def clear(self, job):
+        self.conn.execute(f"DELETE FROM {self.TABLE} WHERE job = ?", (job,))
+        self.conn.commit()
+
+
+class MongoCheckpoints:
+    """Points de reprise stockés dans la base MongoDB cible."""
+
+    COLLECTION = "_migration_checkpoints"
+
+    def __init__(self, db):
+        self.collection = db[self.COLLECTION]
+
+    def get(self, job, table):
+        doc = self.collection.find_one({"_id": f"{job}:{table}"})
+        if doc is None:
+            return None
+        return {"last_key": doc.get("last_key"), "rows_done": doc.get("rows_done", 0),
+                "finished": doc.get("finished", False)}
+
+    def save(self, job, table, last_key, rows_done, finished=False):
+        self.collection.replace_one(
+            {"_id": f"{job}:{table}"},
+            {"job": job, "table": table, "last_key": last_key, "rows_done": rows_done,
+             "finished": finished, "updated_at": _now()},
+            upsert=True)
+
+    def clear(self, job):
+        self.collection.delete_many({"job": job})
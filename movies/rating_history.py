@@ -0,0 +1,325 @@
+"""
+Historique des notes : un instantané de Rating à chaque import.
+
+Rating ne garde que la dernière note ; record_snapshot() ajoute l'état
+courant à l'historique, daté du jour de l'import. Pour rester compact sur des
+années d'instantanés quotidiens :
+    - seuls les changements sont stockés (un film dont note et votes n'ont
+      pas bougé ne coûte rien) ; la valeur d'un jour est le dernier point
+      antérieur ;
+    - les points d'un film sont regroupés par année (bucket) dans une ligne de
+      RatingHistory, clé primaire (movie_id, bucket) en WITHOUT ROWID ;
+    - chaque point est codé en deltas par rapport au précédent du bucket
+      (jours, note x 10, votes) en varints zigzag : 3 à 6 octets par point.
+La ligne garde aussi le dernier point en clair (last_day, last_rating,
+last_votes) : l'ajout et les tendances sur des buckets entiers ne décodent rien.
+
+RatingSnapshot liste les instantanés enregistrés (date, films, changements).
+Les deux tables survivent à la reconstruction du schéma (`python cli.py
+schema` recrée data/imdb.db et y recopie l'historique par copy_history()).
+Les fonctions acceptent une connexion sqlite3 ; les lectures acceptent aussi
+django.db.connection.
+"""
+
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from movies.leaderboard import _fetch
+
+TABLE = "RatingHistory"
+SNAPSHOT_TABLE = "RatingSnapshot"
+EPOCH = date(1970, 1, 1)
+NO_RATING = -1
+
+
+# --- Codage -------------------------------------------------------------------
+
+def _day(value):
+    return (value - EPOCH).days
+
+
+def _date(day):
+    return EPOCH + timedelta(days=day)
+
+
+def _rating10(rating):
+    return NO_RATING if rating is None else int(round(rating * 10))
+
+
+def _rating(rating10):
+    return None if rating10 == NO_RATING else rating10 / 10
+
+
+def _put_varint(out, value):
+    """Entier signé -> zigzag -> varint LEB128."""
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_points(points, previous=(0, 0, 0)):
+    """[(jour, note x 10, votes)] -> octets (deltas par rapport à `previous`)."""
+    out = bytearray()
+    last_day, last_rating, last_votes = previous
+    for day, rating10, votes in points:
+        _put_varint(out, day - last_day)
+        _put_varint(out, rating10 - last_rating)
+        _put_varint(out, votes - last_votes)
+        last_day, last_rating, last_votes = day, rating10, votes
+    return bytes(out)
+
+
+def decode_points(blob):
+    """Inverse de encode_points : [(jour, note x 10, votes)]."""
+    values, value, shift = [], 0, 0
+    for byte in blob:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append((value >> 1) ^ -(value & 1))
+        value, shift = 0, 0
+    points, day, rating10, votes = [], 0, 0, 0
+    for i in range(0, len(values), 3):
+        day += values[i]
+        rating10 += values[i + 1]
+        votes += values[i + 2]
+        points.append((day, rating10, votes))
+    return points
+
+
+# --- Écriture -----------------------------------------------------------------
+
+def create_tables(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            movie_id TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            points BLOB NOT NULL,
+            num_points INTEGER NOT NULL,
+            last_day INTEGER NOT NULL,
+            last_rating INTEGER NOT NULL,
+            last_votes INTEGER NOT NULL,
+            PRIMARY KEY (movie_id, bucket)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+            snapshot_date TEXT PRIMARY KEY,
+            movies INTEGER NOT NULL,
+            changed INTEGER NOT NULL
+        )
+    """)
+
+
+def copy_history(conn, source_path):
+    """
+    Recopie RatingHistory et RatingSnapshot de la base `source_path` dans `conn`
+    (reconstruction du schéma). Returns: nombre d'instantanés recopiés.
+    """
+    create_tables(conn)
+    conn.execute("ATTACH DATABASE ? AS source", (str(source_path),))
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM source.sqlite_master WHERE type = 'table'")}
+        if not {TABLE, SNAPSHOT_TABLE} <= existing:
+            return 0
+        with conn:
+            conn.execute(f"INSERT OR REPLACE INTO {TABLE} SELECT * FROM source.{TABLE}")
+            conn.execute(f"INSERT OR REPLACE INTO {SNAPSHOT_TABLE} SELECT * FROM source.{SNAPSHOT_TABLE}")
+        return conn.execute(f"SELECT COUNT(*) FROM {SNAPSHOT_TABLE}").fetchone()[0]
+    finally:
+        conn.execute("DETACH DATABASE source")
+
+
+def latest_state(conn):
+    """movie_id -> (bucket, points, num_points, last_day, last_rating, last_votes) du dernier bucket."""
+    rows = conn.execute(f"""
+        SELECT h.movie_id, h.bucket, h.points, h.num_points, h.last_day, h.last_rating, h.last_votes
+        FROM {TABLE} h
+        JOIN (SELECT movie_id, MAX(bucket) AS bucket FROM {TABLE} GROUP BY movie_id) l
+          ON l.movie_id = h.movie_id AND l.bucket = h.bucket
+    """)
+    return {row[0]: row[1:] for row in rows}
+
+
+def record_snapshot(conn, snapshot_date=None, ratings=None):
+    """
+    Ajoute l'état de Rating (ou `ratings` : [(movie_id, note, votes)]) daté de
+    `snapshot_date` (défaut : aujourd'hui). Les dates doivent être croissantes ;
+    une date déjà enregistrée n'est pas rejouée.
+
+    Returns:
+        dict (date, movies, changed, seconds, skipped)
+    """
+    start = time.perf_counter()
+    snapshot_date = snapshot_date or date.today()
+    day, bucket = _day(snapshot_date), snapshot_date.year
+    create_tables(conn)
+
+    last = conn.execute(f"SELECT MAX(snapshot_date) FROM {SNAPSHOT_TABLE}").fetchone()[0]
+    if last is not None and date.fromisoformat(last) >= snapshot_date:
+        if date.fromisoformat(last) > snapshot_date:
+            raise ValueError(f"Instantané du {snapshot_date} antérieur au dernier enregistré ({last})")
+        return {"date": snapshot_date, "movies": 0, "changed": 0, "skipped": True,
+                "seconds": time.perf_counter() - start}
+
+    if ratings is None:
+        ratings = conn.execute("SELECT movie_id, averageRating, numVotes FROM Rating").fetchall()
+    state = latest_state(conn)
+
+    rows = []
+    for movie_id, rating, votes in ratings:
+        rating10, votes = _rating10(rating), votes or 0
+        previous = state.get(movie_id)
+        if previous is not None and previous[4:] == (rating10, votes):
+            continue
+        point = (day, rating10, votes)
+        if previous is not None and previous[0] == bucket:
+            # Même année : le point s'ajoute au bucket, en delta du dernier point
+            blob = previous[1] + encode_points([point], previous[3:])
+            count = previous[2] + 1
+        else:
+            blob, count = encode_points([point]), 1
+        rows.append((movie_id, bucket, blob, count, *point))
+
+    with conn:
+        conn.executemany(f"INSERT OR REPLACE INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.execute(f"INSERT INTO {SNAPSHOT_TABLE} VALUES (?, ?, ?)",
+                     (snapshot_date.isoformat(), len(ratings), len(rows)))
+    return {"date": snapshot_date, "movies": len(ratings), "changed": len(rows), "skipped": False,
+            "seconds": time.perf_counter() - start}
+
+
+# --- Lecture ------------------------------------------------------------------
+
+def history(conn, movie_id, start=None, end=None):
+    """
+    Évolution d'un film entre deux dates (incluses, None = ouverte).
+
+    Returns:
+        liste de (date, note, votes) : la valeur en vigueur à `start` puis chaque changement
+    """
+    rows = _fetch(conn, f"SELECT points FROM {TABLE} WHERE movie_id = ? AND bucket <= ? ORDER BY bucket",
+                  (movie_id, end.year if end else 1 << 30))
+    first, last = _day(start) if start else None, _day(end) if end else None
+    result, carried = [], None
+    for (blob,) in rows:
+        for day, rating10, votes in decode_points(blob):
+            if last is not None and day > last:
+                break
+            if first is not None and day < first:
+                carried = (start, _rating(rating10), votes)
+                continue
+            result.append((_date(day), _rating(rating10), votes))
+    if carried and (not result or result[0][0] > start):
+        result.insert(0, carried)
+    return result
+
+
+def decode_many(blobs):
+    """
+    Décodage vectorisé de plusieurs buckets (mêmes valeurs que decode_points).
+
+    Returns:
+        (indptr, jours, notes x 10, votes) : les points du bucket i sont indptr[i]:indptr[i + 1]
+    """
+    if not blobs:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros(1, dtype=np.int64), empty, empty, empty
+    data = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+    # Varints : un octet < 0x80 termine une valeur ; position de l'octet dans sa valeur
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, ends - starts + 1))
+    raw = np.add.reduceat((data & 0x7F).astype(np.int64) << shifts, starts)
+    deltas = ((raw >> 1) ^ -(raw & 1)).reshape(-1, 3)
+
+    # Sommes cumulées par bucket : cumsum global moins le cumul au début du bucket
+    counts = np.array([0] + [len(b) for b in blobs], dtype=np.int64)
+    byte_ends = np.cumsum(counts)
+    values_per_blob = np.diff(np.searchsorted(ends, byte_ends - 1, side="right"), prepend=0)[1:]
+    indptr = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum(values_per_blob // 3, out=indptr[1:])
+    totals = np.cumsum(deltas, axis=0)
+    offsets = np.vstack(([0, 0, 0], totals))[indptr[:-1]]
+    points = totals - np.repeat(offsets, np.diff(indptr), axis=0)
+    return indptr, points[:, 0], points[:, 1], points[:, 2]
+
+
+def _votes_at(bound, bound_year, buckets, last_days, last_votes, decoded, decode_rows):
+    """
+    Votes en vigueur à `bound` selon chaque ligne (NaN si la ligne ne dit rien :
+    bucket postérieur, ou premier point du bucket après `bound`).
+    """
+    values = np.full(len(buckets), np.nan)
+    full = last_days <= bound
+    values[full] = last_votes[full]
+    indptr, days, _, votes = decoded
+    if len(decode_rows):
+        # Nombre de points au plus tard à `bound` dans chaque bucket à décoder
+        seen = np.add.reduceat((days <= bound).astype(np.int64), indptr[:-1])
+        inside = (buckets[decode_rows] <= bound_year) & ~full[decode_rows] & (seen > 0)
+        rows = decode_rows[inside]
+        values[rows] = votes[indptr[:-1][inside] + seen[inside] - 1]
+    return values
+
+
+def vote_growth(conn, start, end, limit=20, min_votes=0):
+    """
+    Films ayant gagné le plus de votes entre `start` et `end`. Seuls les buckets
+    coupés par une borne sont décodés (en un seul passage vectorisé) ; pour les
+    autres, le dernier point en clair suffit.
+
+    Returns:
+        liste de (movie_id, votes à start, votes à end, gain) par gain décroissant
+    """
+    rows = _fetch(conn, f"""
+        SELECT movie_id, bucket, points, last_day, last_votes FROM {TABLE} h
+        WHERE bucket BETWEEN ? AND ?
+           OR bucket = (SELECT MAX(bucket) FROM {TABLE} p WHERE p.movie_id = h.movie_id AND p.bucket < ?)
+        ORDER BY movie_id, bucket
+    """, (start.year, end.year, start.year))
+    if not rows:
+        return []
+    movie_ids, movie_of_row = np.unique(np.array([row[0] for row in rows], dtype=object), return_inverse=True)
+    buckets = np.array([row[1] for row in rows], dtype=np.int64)
+    last_days = np.array([row[3] for row in rows], dtype=np.int64)
+    last_votes = np.array([row[4] for row in rows], dtype=np.int64)
+
+    bounds = ((_day(start), start.year), (_day(end), end.year))
+    # Buckets à décoder : coupés par au moins une borne
+    cut = np.zeros(len(rows), dtype=bool)
+    for bound, bound_year in bounds:
+        cut |= (last_days > bound) & (buckets <= bound_year)
+    decode_rows = np.flatnonzero(cut)
+    decoded = decode_many([rows[i][2] for i in decode_rows])
+
+    before, after = (
+        _last_known(movie_of_row, len(movie_ids),
+                    _votes_at(bound, bound_year, buckets, last_days, last_votes, decoded, decode_rows))
+        for bound, bound_year in bounds)
+    gain = after - before
+    keep = np.flatnonzero((gain > 0) & (after >= min_votes))
+    # Gain décroissant puis movie_id (movie_ids est trié)
+    order = keep[np.lexsort((keep, -gain[keep]))][:limit]
+    return [(movie_ids[i], int(before[i]), int(after[i]), int(gain[i])) for i in order]
+
+
+def _last_known(movie_of_row, num_movies, values):
+    """Par film, la valeur de sa dernière ligne renseignée (lignes triées par bucket) ; 0 sinon."""
+    result = np.zeros(num_movies, dtype=np.int64)
+    known = np.flatnonzero(~np.isnan(values))
+    # Dernière occurrence de chaque film : première dans l'ordre inverse
+    movies, first = np.unique(movie_of_row[known][::-1], return_index=True)
+    result[movies] = values[known[::-1][first]]
+    return result
+
+
+def snapshots(conn):
+    """[(date, films, changements)] des instantanés enregistrés."""
+    return [(date.fromisoformat(d), movies, changed) for d, movies, changed in
+            _fetch(conn, f"SELECT snapshot_date, movies, changed FROM {SNAPSHOT_TABLE} ORDER BY snapshot_date")]
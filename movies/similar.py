@@ -0,0 +1,280 @@
+"""
+Films similaires : K plus proches voisins précalculés hors ligne.
+
+Chaque film est un vecteur creux pondéré :
+    - une colonne par personne (acteur, actrice, réalisateur, scénariste...,
+      crédits du graphe de collaborations, movies/collab_graph.py), poids
+      ROLE_WEIGHTS du rôle x idf (log(films / films de la personne)) ; les
+      personnes d'un seul film (jamais partagées) et celles de plus de
+      MAX_PERSON_MOVIES films (trop fréquentes pour distinguer) sont ignorées ;
+    - une colonne par genre (MovieGenre), GENRE_WEIGHT x idf du genre ;
+    - une colonne par décennie, DECADE_WEIGHT.
+La similarité est le cosinus entre vecteurs.
+
+Les colonnes genres + décennie sont denses à l'échelle de la base (tous les
+drames partagent une colonne) : le produit complet X @ X.T serait quadratique.
+Les candidats d'un film sont donc :
+    - les films qui partagent au moins une personne, par produit creux
+      P[lot] @ P.T (scipy.sparse) sur des lots de BATCH_SIZE films ;
+    - K films de son « seau » (même ensemble de genres et même décennie),
+      pour les films sans personne partagée : les mieux placés pour le
+      cosinus (plus petite norme), puis les plus votés.
+Leur cosinus complet (personnes + genres + décennie) est calculé par paires,
+puis les K meilleurs (à égalité, les plus votés) sont gardés par tri NumPy.
+
+build_similar() écrit le résultat dans la table MovieSimilar de la base
+SQLite (movie_id, rank, similar_id, score), clé primaire (movie_id, rank) en
+WITHOUT ROWID. migrate_flat la copie dans MongoDB et migrate_structured
+l'intègre aux documents movies_complete (champ `similar` : identifiant, titre,
+année, score) : la page Détails affiche les voisins sans requête de plus que
+la lecture du film (ou du fragment précalculé, movies/prerender.py).
+"""
+
+import time
+
+import numpy as np
+from scipy import sparse
+
+from .collab_graph import imdb_to_int
+
+TABLE = "MovieSimilar"
+TOP_K = 10
+BATCH_SIZE = 2048
+# Paires candidates traitées à la fois pour la partie genres + décennie (mémoire bornée)
+PAIR_CHUNK = 1 << 20
+MAX_PERSON_MOVIES = 1000
+ROLE_WEIGHTS = {"director": 2.0, "writer": 1.5, "actor": 1.0, "actress": 1.0}
+OTHER_ROLE_WEIGHT = 0.5
+GENRE_WEIGHT = 3.0
+DECADE_WEIGHT = 3.0
+
+_MOVIES_SQL = """
+    SELECT m.movie_id, m.startYear, COALESCE(r.numVotes, 0)
+    FROM Movie m LEFT JOIN Rating r ON r.movie_id = m.movie_id
+"""
+
+
+class SimilarityFeatures:
+    """
+    Matrices de caractéristiques, films dans l'ordre numérique de leur identifiant :
+        movie_ids (textes), votes, persons (CSR films x personnes),
+        dense (genres puis décennies, float32), inv_norm (1 / norme du vecteur
+        complet, 0 pour un vecteur nul), bucket (seau genres + décennie).
+    """
+
+    def __init__(self, movie_ids, votes, persons, dense, bucket):
+        self.movie_ids = movie_ids
+        self.votes = votes
+        self.persons = persons
+        self.persons_t = persons.T.tocsr()
+        self.dense = dense
+        self.bucket = bucket
+        squared = np.asarray(persons.multiply(persons).sum(axis=1)).ravel()
+        norm = np.sqrt(squared + (dense.astype(np.float64) ** 2).sum(axis=1))
+        self.inv_norm = np.divide(1.0, norm, out=np.zeros_like(norm), where=norm > 0)
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    @classmethod
+    def build(cls, conn, graph, max_person_movies=MAX_PERSON_MOVIES):
+        """Films, genres et décennies depuis SQLite ; crédits depuis le graphe de collaborations."""
+        movies = conn.execute(_MOVIES_SQL).fetchall()
+        numbers = np.array([imdb_to_int(row[0]) for row in movies], dtype=np.int64)
+        order = np.argsort(numbers, kind="stable")
+        numbers = numbers[order]
+        movie_ids = [movies[i][0] for i in order]
+        years = np.array([row[1] if isinstance(row[1], int) else -1 for row in movies], dtype=np.int64)[order]
+        votes = np.array([row[2] or 0 for row in movies], dtype=np.int64)[order]
+        n = len(movie_ids)
+        position = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        # Genres : un bit par genre (seaux) et une colonne dense pondérée par l'idf
+        genre_rows = conn.execute("SELECT movie_id, genre_name FROM MovieGenre").fetchall()
+        genre_names = sorted({genre for _, genre in genre_rows if genre})
+        genre_index = {genre: i for i, genre in enumerate(genre_names)}
+        pairs = np.array([(position[m], genre_index[g]) for m, g in genre_rows if g and m in position],
+                         dtype=np.int64).reshape(-1, 2)
+        genres = np.zeros((n, len(genre_names)), dtype=bool)
+        genres[pairs[:, 0], pairs[:, 1]] = True
+        genre_df = genres.sum(axis=0)
+        genre_weight = GENRE_WEIGHT * np.log(max(n, 1) / np.maximum(genre_df, 1))
+
+        decades, decade_code = np.unique(np.where(years > 0, years // 10 * 10, -1), return_inverse=True)
+        dense = np.zeros((n, len(genre_names) + len(decades)), dtype=np.float32)
+        dense[:, :len(genre_names)] = genres * genre_weight
+        has_decade = decades[decade_code] >= 0
+        dense[np.flatnonzero(has_decade), len(genre_names) + decade_code[has_decade]] = DECADE_WEIGHT
+
+        # Seau : ensemble de genres (masque de bits) et décennie
+        mask = np.zeros(n, dtype=np.int64)
+        for column in range(len(genre_names)):
+            mask |= genres[:, column].astype(np.int64) << (column % 63)
+        _, bucket = np.unique(np.stack([mask, decade_code]), axis=1, return_inverse=True)
+
+        persons = cls._person_matrix(graph, numbers, max_person_movies)
+        return cls(movie_ids, votes, persons, dense, bucket.ravel())
+
+    @staticmethod
+    def _person_matrix(graph, numbers, max_person_movies):
+        """CSR films x personnes : poids du rôle (le plus fort si plusieurs) x idf de la personne."""
+        n = len(numbers)
+        graph_movies = np.asarray(graph.movie_ids, dtype=np.int64)
+        indptr = np.asarray(graph.movie_indptr)
+        rows = np.repeat(np.arange(len(graph_movies)), np.diff(indptr))
+        people = np.asarray(graph.movie_people, dtype=np.int64)
+        role_weight = np.array([ROLE_WEIGHTS.get(c, OTHER_ROLE_WEIGHT) for c in graph.categories],
+                               dtype=np.float64)
+        weights = role_weight[np.asarray(graph.movie_roles)] if len(graph.categories) else np.zeros(0)
+
+        # Films du graphe -> lignes ; crédits de films absents de Movie ignorés
+        target = np.searchsorted(numbers, graph_movies)
+        known = target < n
+        known[known] &= numbers[target[known]] == graph_movies[known]
+        keep = known[rows]
+        rows, people, weights = target[rows[keep]], people[keep], weights[keep]
+
+        # Une entrée par (film, personne) : rôle le plus fort
+        key = rows * (int(people.max()) + 1 if len(people) else 1) + people
+        order = np.argsort(key, kind="stable")
+        key, rows, people, weights = key[order], rows[order], people[order], weights[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.zeros(0, dtype=np.int64)
+        weights = np.maximum.reduceat(weights, starts) if len(key) else weights
+        rows, people = rows[starts], people[starts]
+
+        df = np.bincount(people, minlength=int(people.max()) + 1 if len(people) else 0)
+        useful = (df[people] >= 2) & (df[people] <= max_person_movies)
+        rows, people, weights = rows[useful], people[useful], weights[useful]
+        columns, people = np.unique(people, return_inverse=True)
+        weights = weights * np.log(n / df[columns][people])
+        return sparse.csr_matrix((weights.astype(np.float32), (rows, people.ravel())),
+                                 shape=(n, len(columns)))
+
+    # --- Voisins -----------------------------------------------------------
+
+    def bucket_members(self, k):
+        """
+        (seaux x k) : les k meilleurs candidats de chaque seau, -1 en complément.
+
+        Dans un seau, la partie genres + décennie du produit scalaire est la
+        même pour tous : sans personne partagée, le cosinus ne dépend que de la
+        norme du candidat. Les plus petites normes d'abord, puis les plus votés.
+        """
+        order = np.lexsort((-self.votes, -self.inv_norm, self.bucket))
+        bucket = self.bucket[order]
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        members = np.full((int(self.bucket.max()) + 1 if len(self.bucket) else 0, k), -1, dtype=np.int64)
+        top = rank < k
+        members[bucket[top], rank[top]] = order[top]
+        return members
+
+    def _dense_dot(self, rows, cols):
+        out = np.empty(len(rows), dtype=np.float64)
+        for start in range(0, len(rows), PAIR_CHUNK):
+            stop = start + PAIR_CHUNK
+            out[start:stop] = np.einsum("ij,ij->i", self.dense[rows[start:stop]], self.dense[cols[start:stop]])
+        return out
+
+    def neighbours_batch(self, start, stop, k, members):
+        """Films start..stop-1 : (voisins, scores) de forme (stop - start, k), -1 / 0 en complément."""
+        n = len(self)
+        product = (self.persons[start:stop] @ self.persons_t).tocoo()
+        fill = members[self.bucket[start:stop]]
+        fill_rows = np.repeat(np.arange(start, stop), fill.shape[1])
+        fill = fill.ravel()
+        rows = np.concatenate([product.row.astype(np.int64) + start, fill_rows[fill >= 0]])
+        cols = np.concatenate([product.col.astype(np.int64), fill[fill >= 0]])
+        person_dot = np.concatenate([product.data.astype(np.float64), np.zeros(int((fill >= 0).sum()))])
+
+        # Paires distinctes (un candidat peut venir des deux sources), hors le film lui-même
+        other = rows != cols
+        rows, cols, person_dot = rows[other], cols[other], person_dot[other]
+        key = (rows - start) * n + cols
+        order = np.argsort(key, kind="stable")
+        key, rows, cols, person_dot = key[order], rows[order], cols[order], person_dot[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.zeros(0, dtype=np.int64)
+        person_dot = np.add.reduceat(person_dot, starts) if len(key) else person_dot
+        rows, cols = rows[starts], cols[starts]
+
+        score = (person_dot + self._dense_dot(rows, cols)) * self.inv_norm[rows] * self.inv_norm[cols]
+        positive = score > 0
+        rows, cols, score = rows[positive], cols[positive], score[positive]
+
+        # K meilleurs par film : score décroissant, puis votes décroissants
+        order = np.lexsort((cols, -self.votes[cols], -score, rows))
+        rows, cols, score = rows[order], cols[order], score[order]
+        first = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.zeros(0, dtype=np.int64)
+        rank = np.arange(len(rows)) - np.repeat(first, np.diff(np.r_[first, len(rows)]))
+        top = rank < k
+        neighbours = np.full((stop - start, k), -1, dtype=np.int64)
+        scores = np.zeros((stop - start, k), dtype=np.float32)
+        neighbours[rows[top] - start, rank[top]] = cols[top]
+        scores[rows[top] - start, rank[top]] = score[top]
+        return neighbours, scores
+
+    def neighbours(self, k=TOP_K, batch_size=BATCH_SIZE):
+        """Voisins de tous les films, par lots ; renvoie (voisins, scores) de forme (films, k)."""
+        members = self.bucket_members(k)
+        neighbours = np.full((len(self), k), -1, dtype=np.int64)
+        scores = np.zeros((len(self), k), dtype=np.float32)
+        for start in range(0, len(self), batch_size):
+            stop = min(start + batch_size, len(self))
+            neighbours[start:stop], scores[start:stop] = self.neighbours_batch(start, stop, k, members)
+        return neighbours, scores
+
+
+# --- Stockage -----------------------------------------------------------------
+
+def store(conn, movie_ids, neighbours, scores):
+    """(Re)crée MovieSimilar ; renvoie le nombre de lignes écrites."""
+    rows, ranks = np.nonzero(neighbours >= 0)
+    similar = neighbours[rows, ranks]
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.execute(f"""
+            CREATE TABLE {TABLE} (
+                movie_id TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                similar_id TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (movie_id, rank)
+            ) WITHOUT ROWID
+        """)
+        conn.executemany(f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?)", (
+            (movie_ids[row], rank + 1, movie_ids[other], round(float(score), 4))
+            for row, rank, other, score in zip(rows.tolist(), ranks.tolist(), similar.tolist(),
+                                               scores[rows, ranks].tolist())
+        ))
+    return len(rows)
+
+
+def build_similar(conn, graph, top_k=TOP_K, batch_size=BATCH_SIZE):
+    """
+    Étape du pipeline d'import : caractéristiques, voisins et table MovieSimilar.
+
+    Returns:
+        dict movies, persons (colonnes personnes retenues), with_neighbours,
+        rows, seconds
+    """
+    start = time.perf_counter()
+    features = SimilarityFeatures.build(conn, graph)
+    neighbours, scores = features.neighbours(top_k, batch_size)
+    rows = store(conn, features.movie_ids, neighbours, scores)
+    return {
+        "movies": len(features),
+        "persons": features.persons.shape[1],
+        "with_neighbours": int((neighbours[:, 0] >= 0).sum()),
+        "rows": rows,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def similar_movies(conn, movie_id, limit=TOP_K):
+    """[(similar_id, primaryTitle, startYear, score)] lus dans MovieSimilar (sqlite3 ou django.db.connection)."""
+    from .leaderboard import _fetch
+    return _fetch(conn, f"""
+        SELECT s.similar_id, m.primaryTitle, m.startYear, s.score
+        FROM {TABLE} s JOIN Movie m ON m.movie_id = s.similar_id
+        WHERE s.movie_id = ? ORDER BY s.rank LIMIT ?
+    """, (str(movie_id).strip(), limit))
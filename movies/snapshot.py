@@ -0,0 +1,230 @@
+"""
+Instantané colonnaire (Arrow IPC / Parquet) du jeu de données IMDb.
+
+Chaque table est écrite dans data/snapshot/ avec un schéma typé et normalisé
+(noms de colonnes SQL, entiers/flottants au lieu de texte, '\\N' -> null) :
+    <Table>.arrow    Arrow IPC non compressé : rechargé en mémoire mappée,
+                     sans copie ni analyse de texte (format de travail)
+    <Table>.parquet  Parquet zstd : compact, pour archivage/échange
+
+Sources possibles :
+    export_csv_snapshot     les CSV bruts de data/csv/ (en-têtes "('mid',)")
+    export_sqlite_snapshot  les tables de data/imdb.db (toutes, y compris
+                            Genre, Profession, Character...)
+
+Les consommateurs (import_data.py, migrate_flat.py, AnalyticsEngine) appellent
+is_fresh()/load_table() et retombent sur leur chemin habituel (CSV ou SQLite)
+si l'instantané est absent ou plus ancien que cette source : l'instantané
+exporté depuis SQLite après un import ne doit pas masquer un CSV modifié
+depuis, ni une base modifiée après l'export.
+"""
+
+import os
+import sqlite3
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '../data/snapshot/')
+FORMATS = ("arrow", "parquet")
+PARQUET_COMPRESSION = "zstd"
+BATCH_SIZE = 50000
+
+# Les booléens restent des entiers 0/1, comme dans SQLite, pour que les
+# documents MongoDB et les lignes importées soient identiques quel que soit le chemin
+SCHEMAS = {
+    "Person": pa.schema([
+        ("person_id", pa.string()), ("primaryName", pa.string()),
+        ("birthYear", pa.int32()), ("deathYear", pa.int32()),
+    ]),
+    "Movie": pa.schema([
+        ("movie_id", pa.string()), ("titleType", pa.string()),
+        ("primaryTitle", pa.string()), ("originalTitle", pa.string()),
+        ("isAdult", pa.int8()), ("startYear", pa.int32()),
+        ("endYear", pa.int32()), ("runtimeMinutes", pa.int32()),
+    ]),
+    "Rating": pa.schema([
+        ("movie_id", pa.string()), ("averageRating", pa.float64()), ("numVotes", pa.int64()),
+    ]),
+    "Genre": pa.schema([("genre_name", pa.string())]),
+    "Profession": pa.schema([("job_name", pa.string())]),
+    "TitleAlias": pa.schema([
+        ("movie_id", pa.string()), ("ordering", pa.int32()), ("title", pa.string()),
+        ("region", pa.string()), ("language", pa.string()), ("types", pa.string()),
+        ("attributes", pa.string()), ("isOriginalTitle", pa.int8()),
+    ]),
+    "MovieGenre": pa.schema([("movie_id", pa.string()), ("genre_name", pa.string())]),
+    "PersonProfession": pa.schema([("person_id", pa.string()), ("job_name", pa.string())]),
+    "MoviePrincipal": pa.schema([
+        ("movie_id", pa.string()), ("person_id", pa.string()), ("ordering", pa.int32()),
+        ("category", pa.string()), ("job", pa.string()),
+    ]),
+    "Character": pa.schema([
+        ("movie_id", pa.string()), ("person_id", pa.string()), ("character_name", pa.string()),
+    ]),
+    "MovieWriter": pa.schema([("movie_id", pa.string()), ("person_id", pa.string())]),
+    "MovieDirector": pa.schema([("movie_id", pa.string()), ("person_id", pa.string())]),
+}
+
+# Table -> (fichier CSV, {colonne CSV: colonne SQL}) ; mêmes correspondances que import_data.py
+CSV_SOURCES = {
+    "Person": ("persons.csv", {"pid": "person_id", "primaryName": "primaryName",
+                               "birthYear": "birthYear", "deathYear": "deathYear"}),
+    "Movie": ("movies.csv", {"mid": "movie_id", "titleType": "titleType", "primaryTitle": "primaryTitle",
+                             "originalTitle": "originalTitle", "isAdult": "isAdult", "startYear": "startYear",
+                             "endYear": "endYear", "runtimeMinutes": "runtimeMinutes"}),
+    "Rating": ("ratings.csv", {"mid": "movie_id", "averageRating": "averageRating", "numVotes": "numVotes"}),
+    "TitleAlias": ("titles.csv", {"mid": "movie_id", "ordering": "ordering", "title": "title",
+                                  "region": "region", "language": "language", "types": "types",
+                                  "attributes": "attributes", "isOriginalTitle": "isOriginalTitle"}),
+    "MovieGenre": ("genres.csv", {"mid": "movie_id", "genre": "genre_name"}),
+    "PersonProfession": ("professions.csv", {"pid": "person_id", "jobName": "job_name"}),
+    "MoviePrincipal": ("principals.csv", {"mid": "movie_id", "ordering": "ordering", "pid": "person_id",
+                                          "category": "category", "job": "job"}),
+    "MovieWriter": ("writers.csv", {"mid": "movie_id", "pid": "person_id"}),
+    "MovieDirector": ("directors.csv", {"mid": "movie_id", "pid": "person_id"}),
+}
+
+
+def snapshot_path(table, fmt="arrow", snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f"{table}.{fmt}")
+
+
+def has_snapshot(table, snapshot_dir=SNAPSHOT_DIR):
+    return any(os.path.exists(snapshot_path(table, fmt, snapshot_dir)) for fmt in FORMATS)
+
+
+def _read_path(table, snapshot_dir):
+    """Fichier lu par load_table() : .arrow s'il existe, sinon .parquet."""
+    arrow_file = snapshot_path(table, "arrow", snapshot_dir)
+    return arrow_file if os.path.exists(arrow_file) else snapshot_path(table, "parquet", snapshot_dir)
+
+
+def sqlite_sources(db_path):
+    """Fichiers dont dépend un instantané exporté de SQLite (base et journal WAL)."""
+    return [str(db_path), f"{db_path}-wal"]
+
+
+def is_fresh(table, sources, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Instantané présent et au moins aussi récent (mtime) que chacune des
+    sources existantes (CSV, ou sqlite_sources() de la base).
+    """
+    if not has_snapshot(table, snapshot_dir):
+        return False
+    snapshot_mtime = os.path.getmtime(_read_path(table, snapshot_dir))
+    return all(os.path.getmtime(path) <= snapshot_mtime for path in sources if os.path.exists(path))
+
+
+# --- Écriture -----------------------------------------------------------------
+
+def write_table(table, name, snapshot_dir=SNAPSHOT_DIR, formats=FORMATS):
+    """Écrit une table Arrow dans les formats demandés (fichier temporaire puis renommage)."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for fmt in formats:
+        path = snapshot_path(name, fmt, snapshot_dir)
+        tmp_path = path + ".tmp"
+        if fmt == "arrow":
+            with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=BATCH_SIZE)
+        elif fmt == "parquet":
+            pq.write_table(table, tmp_path, compression=PARQUET_COMPRESSION, row_group_size=BATCH_SIZE)
+        else:
+            raise ValueError(f"Format d'instantané inconnu : {fmt}")
+        os.replace(tmp_path, path)
+
+
+def read_csv_table(csv_path, column_map, schema):
+    """Lit un CSV brut (en-têtes "('mid',)", '\\N' = null) en table Arrow typée."""
+    with open(csv_path, encoding="utf-8") as f:
+        header = [h.strip('"').strip("(),'") for h in f.readline().rstrip("\r\n").split('","')]
+    names = [column_map.get(h, h) for h in header]
+    wanted = [column_map[h] for h in header if h in column_map]
+    table = pa_csv.read_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(skip_rows=1, column_names=names),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=wanted,
+            column_types={field.name: field.type for field in schema if field.name in wanted},
+            null_values=["\\N", ""],
+            strings_can_be_null=True,
+        ),
+    )
+    return table.select([field.name for field in schema if field.name in wanted])
+
+
+def export_csv_snapshot(csv_dir, snapshot_dir=SNAPSHOT_DIR, formats=FORMATS):
+    """CSV bruts -> instantané ; les fichiers absents sont ignorés. Retourne {table: lignes}."""
+    stats = {}
+    for name, (filename, column_map) in CSV_SOURCES.items():
+        csv_path = os.path.join(csv_dir, filename)
+        if not os.path.exists(csv_path):
+            continue
+        table = read_csv_table(csv_path, column_map, SCHEMAS[name])
+        write_table(table, name, snapshot_dir, formats)
+        stats[name] = table.num_rows
+    return stats
+
+
+def export_sqlite_snapshot(db_path, snapshot_dir=SNAPSHOT_DIR, formats=FORMATS, tables=None):
+    """Tables SQLite -> instantané (lecture par lots, tables vides ignorées). Retourne {table: lignes}."""
+    conn = sqlite3.connect(db_path)
+    stats = {}
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        for name in tables or SCHEMAS:
+            if name not in existing:
+                continue
+            schema = SCHEMAS[name]
+            cursor = conn.execute(f"SELECT {', '.join(schema.names)} FROM {name}")
+            batches = []
+            while True:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                batches.append(pa.RecordBatch.from_arrays(
+                    [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+            if not batches:
+                continue
+            table = pa.Table.from_batches(batches, schema=schema)
+            write_table(table, name, snapshot_dir, formats)
+            stats[name] = table.num_rows
+    finally:
+        conn.close()
+    return stats
+
+
+# --- Lecture ------------------------------------------------------------------
+
+def load_table(name, snapshot_dir=SNAPSHOT_DIR, columns=None):
+    """
+    Charge une table de l'instantané.
+
+    Le fichier .arrow est ouvert en mémoire mappée : les colonnes pointent
+    directement dans le page cache (aucune copie, aucune analyse). À défaut,
+    le .parquet est décompressé en mémoire.
+    """
+    path = _read_path(name, snapshot_dir)
+    if path.endswith(".arrow"):
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    else:
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.select(columns) if columns else table
+
+
+def iter_dataframes(name, chunk_size=BATCH_SIZE, snapshot_dir=SNAPSHOT_DIR, offset=0):
+    """
+    Lots pandas d'une table à partir de la ligne `offset`, au format attendu par
+    to_sql : entiers nullables en objets Python (None, pas de flottants 1911.0).
+    """
+    for batch in load_table(name, snapshot_dir).slice(offset).to_batches(max_chunksize=chunk_size):
+        yield batch.to_pandas(integer_object_nulls=True)
+
+
+def load_rows(name, columns, snapshot_dir=SNAPSHOT_DIR):
+    """Lignes (tuples) d'une table, comme un fetchall() SQLite."""
+    table = load_table(name, snapshot_dir, columns)
+    return list(zip(*(table.column(c).to_pylist() for c in columns)))
@@ -0,0 +1,174 @@
+"""
+Fichiers statiques : empreinte dans le nom, précompression et en-têtes de cache.
+
+`python cli.py static` (collectstatic) copie static/ dans STATIC_ROOT via
+PrecompressedManifestStorage :
+    - comme ManifestStaticFilesStorage, chaque fichier reçoit une copie
+      nommée d'après son contenu (style.3f2a91c0d4e5.css), les url() des CSS
+      sont réécrites et staticfiles.json associe nom d'origine et nom haché ;
+      {% static %} renvoie le nom haché, seulement avec DEBUG=False
+      (CINEEXPLORE_DEBUG=0) ;
+    - les fichiers texte (CSS, JS, SVG...) reçoivent en plus des variantes
+      .gz et .br (si le module brotli est installé), conservées seulement si
+      elles sont plus petites.
+
+serve() sert STATIC_ROOT depuis l'application : variante brotli ou gzip
+selon Accept-Encoding et ses q-values (Vary: Accept-Encoding), et Cache-Control d'un an
+(immutable) pour les noms hachés, dont le contenu ne change jamais. Les noms
+d'origine gardent un cache court revalidé par Last-Modified. Les miniatures
+d'affiches (movies/posters.py) passent par serve_poster(). Avec DEBUG=True,
+runserver intercepte /static/ avant ces vues (StaticFilesHandler).
+"""
+
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, StaticFilesStorage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 256
+# Ordre de préférence de la négociation
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE = "public, max-age={}, immutable"
+REVALIDATE = "public, max-age={}, must-revalidate"
+
+
+def _compressible(name):
+    content_type = mimetypes.guess_type(name)[0] or ""
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def precompress(path):
+    """Écrit path.gz et path.br à côté de `path` s'ils sont plus petits ; renvoie les suffixes écrits."""
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = [(".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda: brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compress in variants:
+        target = path + suffix
+        compressed = compress()
+        if len(compressed) < len(data):
+            with open(target, "wb") as f:
+                f.write(compressed)
+            written.append(suffix)
+        elif os.path.exists(target):
+            os.remove(target)
+    return written
+
+
+class PrecompressedManifestStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage + variantes .gz / .br des fichiers texte."""
+
+    manifest_strict = False
+
+    def url(self, name, force=False):
+        try:
+            return super().url(name, force)
+        except ValueError:
+            # collectstatic pas encore lancé : nom d'origine plutôt qu'une erreur 500
+            return StaticFilesStorage.url(self, name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for original, hashed in self.hashed_files.items():
+            for name in (original, hashed):
+                path = self.path(name)
+                if _compressible(name) and os.path.exists(path) and os.path.getsize(path) >= MIN_COMPRESS_SIZE:
+                    precompress(path)
+
+
+_immutable_names = None
+
+
+def immutable_names():
+    """Noms hachés du manifeste (chargé une fois par processus)."""
+    global _immutable_names
+    if _immutable_names is None:
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        # hashed_files : manifeste lu à la création du stockage
+        _immutable_names = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+    return _immutable_names
+
+
+def accepted_encodings(header):
+    """Accept-Encoding -> {codage: q} ("br;q=0" refuse brotli, q absent = 1)."""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name, q = name.strip().lower(), 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name] = q
+    return accepted
+
+
+def negotiate(header, full_path):
+    """Variante précompressée acceptée de plus forte q-value (ENCODINGS départage) : (codage, chemin)."""
+    accepted = accepted_encodings(header)
+    best, best_q = (None, full_path), 0.0
+    for name, suffix in ENCODINGS:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q and os.path.isfile(full_path + suffix):
+            best, best_q = (name, full_path + suffix), q
+    return best
+
+
+def file_response(request, root, path, cache_control):
+    """Fichier de `root`, variante précompressée si acceptée, avec Last-Modified et If-Modified-Since."""
+    try:
+        full_path = safe_join(root, path)
+    except Exception:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+        response = HttpResponseNotModified()
+        response["Cache-Control"] = cache_control
+        return response
+
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    encoding, served = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""), full_path)
+    # filename : Content-Disposition au nom d'origine, pas à celui de la variante .br/.gz
+    response = FileResponse(open(served, "rb"), content_type=content_type, filename=os.path.basename(full_path))
+    if encoding:
+        response["Content-Encoding"] = encoding
+    if _compressible(full_path):
+        response["Vary"] = "Accept-Encoding"
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def serve(request, path):
+    if path in immutable_names():
+        cache_control = IMMUTABLE.format(settings.STATIC_MAX_AGE)
+    else:
+        cache_control = REVALIDATE.format(settings.STATIC_REVALIDATE_AGE)
+    return file_response(request, settings.STATIC_ROOT, path, cache_control)
+
+
+def serve_poster(request, path):
+    # Le nom contient l'empreinte de l'URL de l'affiche : contenu immuable lui aussi
+    return file_response(request, settings.POSTER_DIR, path, IMMUTABLE.format(settings.STATIC_MAX_AGE))
@@ -0,0 +1,173 @@
+"""
+Occupation disque et cache des bases SQLite et MongoDB.
+
+SQLite (table virtuelle dbstat) : pages, octets utiles et octets perdus
+(espace libre des pages) par table et par index, pages libres du fichier
+(récupérées par VACUUM). sqlite_copy() produit une copie VACUUM-ée, avec une
+autre taille de page si demandé, sans toucher à la base d'origine.
+
+MongoDB ($collStats storageStats) : taille des documents non compressés,
+taille sur disque (storageSize, après compression WiredTiger), espace
+réutilisable, taille de chaque index, compresseur de blocs (creationString)
+et octets présents dans le cache WiredTiger. mongo_copy() recopie des
+collections dans une autre base avec un compresseur donné (none, snappy,
+zlib, zstd) et y recrée les index déclarés (movies/mongo_indexes.py).
+"""
+
+import os
+import re
+import sqlite3
+
+COMPRESSORS = ["none", "snappy", "zlib", "zstd"]
+
+
+# --- SQLite -----------------------------------------------------------------------
+
+def sqlite_summary(conn):
+    """Taille de page, pages du fichier, pages libres et cache de la connexion."""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+    return {
+        "page_size": page_size,
+        "pages": page_count,
+        "bytes": page_size * page_count,
+        "free_pages": freelist,
+        "free_bytes": page_size * freelist,
+        "journal_mode": conn.execute("PRAGMA journal_mode").fetchone()[0],
+        # cache_size négatif : en Kio, positif : en pages
+        "cache_bytes": -cache_size * 1024 if cache_size < 0 else cache_size * page_size,
+    }
+
+
+def sqlite_objects(conn):
+    """
+    Une ligne par table et par index (dbstat).
+
+    Returns:
+        liste de dict name, type, table, pages, bytes, payload, unused, fill
+        (octets utiles / octets des pages), triée par taille décroissante
+    """
+    kinds = {name: (kind, table) for name, kind, table in
+             conn.execute("SELECT name, type, tbl_name FROM sqlite_schema WHERE type IN ('table', 'index')")}
+    try:
+        rows = conn.execute("""
+            SELECT name, COUNT(*), SUM(pgsize), SUM(payload), SUM(unused)
+            FROM dbstat GROUP BY name ORDER BY SUM(pgsize) DESC
+        """).fetchall()
+    except sqlite3.OperationalError:
+        raise RuntimeError("dbstat indisponible dans ce build SQLite (SQLITE_ENABLE_DBSTAT_VTAB)")
+    objects = []
+    for name, pages, size, payload, unused in rows:
+        kind, table = kinds.get(name, ("table", name))  # sqlite_schema n'est pas dans sqlite_schema
+        objects.append({
+            "name": name, "type": kind, "table": table, "pages": pages, "bytes": size,
+            "payload": payload, "unused": unused, "fill": payload / size if size else 0.0,
+        })
+    return objects
+
+
+def sqlite_tables(objects):
+    """{table: (octets des données, octets des index)} à partir de sqlite_objects(), par total décroissant."""
+    totals = {}
+    for obj in objects:
+        data, indexes = totals.get(obj["table"], (0, 0))
+        if obj["type"] == "index":
+            indexes += obj["bytes"]
+        else:
+            data += obj["bytes"]
+        totals[obj["table"]] = (data, indexes)
+    return dict(sorted(totals.items(), key=lambda item: -sum(item[1])))
+
+
+def sqlite_copy(source, target, page_size=None):
+    """
+    Copie VACUUM-ée de `source` dans `target` (écrasé), taille de page changée si demandé.
+
+    VACUUM INTO reprend la taille de page de la source : le changement se fait
+    ensuite sur la copie, en mode journal DELETE (WAL interdit de changer la
+    taille de page).
+    """
+    if os.path.exists(target):
+        os.remove(target)
+    conn = sqlite3.connect(source)
+    try:
+        conn.execute("VACUUM INTO ?", (target,))
+    finally:
+        conn.close()
+    if page_size is not None:
+        conn = sqlite3.connect(target)
+        try:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute(f"PRAGMA page_size={int(page_size)}")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    return os.path.getsize(target)
+
+
+# --- MongoDB ----------------------------------------------------------------------
+
+def _compressor(wired_tiger):
+    match = re.search(r"block_compressor=(\w*)", wired_tiger.get("creationString", ""))
+    return (match.group(1) or "none") if match else None
+
+
+def mongo_collection_stats(db, name):
+    """
+    Returns:
+        dict count, size (BSON non compressé), storage (disque), free (réutilisable),
+        indexes ({nom: octets}), index_bytes, compressor, cache (octets dans le cache)
+    """
+    stats = {"count": 0, "size": 0, "storage": 0, "free": 0, "indexes": {}, "cache": 0}
+    compressor = None
+    # Un document par shard sur mongos, un seul sinon
+    for shard in db[name].aggregate([{"$collStats": {"storageStats": {}}}]):
+        storage = shard["storageStats"]
+        stats["count"] += storage.get("count", 0)
+        stats["size"] += storage.get("size", 0)
+        stats["storage"] += storage.get("storageSize", 0)
+        stats["free"] += storage.get("freeStorageSize", 0)
+        for index, size in storage.get("indexSizes", {}).items():
+            stats["indexes"][index] = stats["indexes"].get(index, 0) + size
+        wired_tiger = storage.get("wiredTiger", {})
+        stats["cache"] += wired_tiger.get("cache", {}).get("bytes currently in the cache", 0)
+        compressor = compressor or _compressor(wired_tiger)
+    stats["index_bytes"] = sum(stats["indexes"].values())
+    stats["compressor"] = compressor
+    return stats
+
+
+def mongo_report(db, collections=None):
+    """{collection: mongo_collection_stats} des collections de la base (hors system.*), par taille décroissante."""
+    names = collections or sorted(name for name in db.list_collection_names() if not name.startswith("system."))
+    report = {name: mongo_collection_stats(db, name) for name in names}
+    return dict(sorted(report.items(), key=lambda item: -(item[1]["storage"] + item[1]["index_bytes"])))
+
+
+def mongo_copy(source_db, target_db, collections, compressor, batch_size=5000):
+    """
+    Recopie `collections` dans `target_db` (collections recréées) avec le
+    compresseur de blocs `compressor` pour les données, puis crée les index
+    déclarés (compression par préfixe par défaut de WiredTiger, non modifiée).
+    Renvoie le nombre de documents copiés.
+    """
+    from movies.mongo_indexes import sync_indexes
+
+    engine = {"wiredTiger": {"configString": f"block_compressor={compressor}"}}
+    copied = 0
+    for name in collections:
+        target_db.drop_collection(name)
+        target = target_db.create_collection(name, storageEngine=engine)
+        batch = []
+        for document in source_db[name].find():
+            batch.append(document)
+            if len(batch) == batch_size:
+                target.insert_many(batch, ordered=False)
+                copied, batch = copied + len(batch), []
+        if batch:
+            target.insert_many(batch, ordered=False)
+            copied += len(batch)
+    sync_indexes(target_db, collections, verbose=False)
+    return copied
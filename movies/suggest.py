@@ -0,0 +1,306 @@
+"""
+Index de préfixes pour l'autocomplétion (/api/suggest?q=).
+
+Chaque titre (Movie.primaryTitle, TitleAlias.title) et chaque nom
+(Person.primaryName) est normalisé (minuscules, sans accents ni ponctuation)
+puis indexé sous sa forme complète et à partir de chacun de ses mots
+("the godfather", "godfather") : « godf » et « astaire » trouvent
+« The Godfather » et « Fred Astaire ». Les clés sont triées dans un tableau
+d'octets UTF-8 (key_blob + key_offsets) : un préfixe correspond à l'intervalle
+[bisect(p), bisect(p + 0xFF)[, 0xFF n'apparaissant jamais en UTF-8.
+
+Poids : Rating.numVotes pour un film, somme des votes de ses films
+(MoviePrincipal) pour une personne. Un intervalle d'au plus SCAN_LIMIT clés est
+trié à la volée ; au-delà (préfixes courts, « t », « the »...), les TOP_K
+meilleurs candidats ont été précalculés à la construction (heavy_*).
+
+Tous les tableaux sont des .npy rechargés en mémoire mappée : une suggestion
+ne touche pas SQLite et coûte une vingtaine de comparaisons d'octets.
+"""
+
+import bisect
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+from movies.collab_graph import imdb_to_int, int_to_imdb
+
+ARRAYS = (
+    "key_blob", "key_offsets", "entry_targets",
+    "target_kinds", "target_ids", "target_years", "target_weights",
+    "label_blob", "label_offsets",
+    "heavy_blob", "heavy_offsets", "heavy_top",
+)
+KINDS = ("movie", "person")
+PREFIXES = ("tt", "nm")
+NO_YEAR = -1
+SCAN_LIMIT = 1024
+TOP_K = 32
+MAX_WORD_KEYS = 6
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """'Fantômas - À l'ombre' -> 'fantomas a l ombre' (NFKD sans diacritiques, casefold)."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _SEPARATORS.sub(" ", stripped.casefold()).strip()
+
+
+def index_keys(label):
+    """Clés d'un libellé : la forme normalisée complète puis chaque suffixe commençant à un mot."""
+    normalized = normalize(label)
+    if not normalized:
+        return []
+    words = normalized.split(" ")
+    keys = [" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_KEYS))]
+    return list(dict.fromkeys(keys))
+
+
+def encode_strings(strings):
+    """Liste de str -> (octets UTF-8 concaténés, offsets int64 de longueur n + 1)."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(), offsets
+
+
+class BlobStrings:
+    """Vue séquence (pour bisect) sur un blob d'octets + offsets, sans tout décoder."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+
+def _top_targets(targets, weights, k):
+    """k cibles distinctes de plus fort poids parmi `targets` (tableau d'indices de cibles)."""
+    order = np.argsort(-weights[targets], kind="stable")
+    top = []
+    seen = set()
+    for target in targets[order]:
+        target = int(target)
+        if target not in seen:
+            seen.add(target)
+            top.append(target)
+            if len(top) == k:
+                break
+    return top
+
+
+def read_catalog(db_path):
+    """
+    Cibles communes aux index de recherche : films puis personnes, avec leurs poids.
+
+    Returns:
+        (tableaux target_* et label_*, libellés, [(cible, titre alternatif)])
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        movies = conn.execute("""
+            SELECT m.movie_id, m.primaryTitle, m.startYear, COALESCE(r.numVotes, 0)
+            FROM Movie m LEFT JOIN Rating r ON r.movie_id = m.movie_id
+        """).fetchall()
+        aliases = conn.execute("SELECT DISTINCT movie_id, title FROM TitleAlias").fetchall()
+        people = conn.execute("""
+            SELECT p.person_id, p.primaryName, COALESCE(v.votes, 0)
+            FROM Person p
+            LEFT JOIN (SELECT mp.person_id, SUM(r.numVotes) AS votes
+                       FROM (SELECT DISTINCT movie_id, person_id FROM MoviePrincipal) mp
+                       JOIN Rating r ON r.movie_id = mp.movie_id
+                       GROUP BY mp.person_id) v ON v.person_id = p.person_id
+        """).fetchall()
+    finally:
+        conn.close()
+
+    kinds, ids, years, weights, labels = [], [], [], [], []
+    movie_target = {}
+    for movie_id, title, year, votes in movies:
+        movie_target[movie_id] = len(ids)
+        kinds.append(0)
+        ids.append(imdb_to_int(movie_id))
+        years.append(NO_YEAR if year is None else year)
+        weights.append(votes)
+        labels.append(title or "")
+    for person_id, name, votes in people:
+        kinds.append(1)
+        ids.append(imdb_to_int(person_id))
+        years.append(NO_YEAR)
+        weights.append(votes)
+        labels.append(name or "")
+
+    catalog = {
+        "target_kinds": np.array(kinds, dtype=np.int8),
+        "target_ids": np.array(ids, dtype=np.int32),
+        "target_years": np.array(years, dtype=np.int16),
+        "target_weights": np.array(weights, dtype=np.int64),
+    }
+    catalog["label_blob"], catalog["label_offsets"] = encode_strings(labels)
+    alias_targets = [(movie_target[movie_id], title) for movie_id, title in aliases
+                     if movie_id in movie_target and title]
+    return catalog, labels, alias_targets
+
+
+def target_dict(index, target):
+    """Cible -> dict {type, id, label, year, votes} (index : PrefixIndex ou FuzzyIndex)."""
+    kind = int(index.target_kinds[target])
+    year = int(index.target_years[target])
+    return {
+        "type": KINDS[kind],
+        "id": int_to_imdb(PREFIXES[kind], int(index.target_ids[target])),
+        "label": index.labels[target].decode("utf-8"),
+        "year": None if year == NO_YEAR else year,
+        "votes": int(index.target_weights[target]),
+    }
+
+
+class PrefixIndex:
+
+    def __init__(self, arrays):
+        for name in ARRAYS:
+            # Vue ndarray sur le np.memmap : même mémoire, sans le surcoût de la sous-classe à l'indexation
+            setattr(self, name, np.asarray(arrays[name]))
+        self.keys = BlobStrings(self.key_blob, self.key_offsets)
+        self.heavy = BlobStrings(self.heavy_blob, self.heavy_offsets)
+        self.labels = BlobStrings(self.label_blob, self.label_offsets)
+
+    # --- Construction / persistance ---------------------------------------
+
+    @classmethod
+    def build(cls, db_path):
+        """Construit l'index depuis SQLite (titres, alias, noms et votes)."""
+        catalog, labels, aliases = read_catalog(db_path)
+
+        entries = set()
+        for target, label in enumerate(labels):
+            entries.update((key, target) for key in index_keys(label))
+        for target, title in aliases:
+            entries.update((key, target) for key in index_keys(title))
+        entries = sorted(entries)
+
+        arrays = dict(catalog, entry_targets=np.array([t for _, t in entries], dtype=np.int32))
+        arrays["key_blob"], arrays["key_offsets"] = encode_strings([k for k, _ in entries])
+        heavy, heavy_top = cls._heavy_prefixes([k for k, _ in entries], arrays["entry_targets"],
+                                               arrays["target_weights"])
+        arrays["heavy_blob"], arrays["heavy_offsets"] = encode_strings(heavy)
+        arrays["heavy_top"] = heavy_top
+        return cls(arrays)
+
+    @staticmethod
+    def _heavy_prefixes(keys, entry_targets, target_weights):
+        """
+        Préfixes couvrant plus de SCAN_LIMIT clés, avec leurs TOP_K cibles.
+        Seul un intervalle lourd est redécoupé au caractère suivant.
+        """
+        heavy = {}
+        pending = [("", 0, len(keys))]
+        while pending:
+            prefix, start, end = pending.pop()
+            if prefix:
+                heavy[prefix] = _top_targets(entry_targets[start:end], target_weights, TOP_K)
+            depth = len(prefix)
+            i = start
+            # Clés égales au préfixe (triées en tête de l'intervalle) : pas de caractère suivant
+            while i < end and len(keys[i]) == depth:
+                i += 1
+            while i < end:
+                child = keys[i][:depth + 1]
+                j = bisect.bisect_left(keys, child + "\U0010ffff", i, end)
+                if j - i > SCAN_LIMIT:
+                    pending.append((child, i, j))
+                i = j
+        ordered = sorted(heavy, key=lambda p: p.encode("utf-8"))
+        top = np.full((len(ordered), TOP_K), -1, dtype=np.int32)
+        for row, prefix in enumerate(ordered):
+            top[row, :len(heavy[prefix])] = heavy[prefix]
+        return ordered, top
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Charge l'index ; avec mmap=True les tableaux restent sur disque (page cache)."""
+        mode = "r" if mmap else None
+        return cls({
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in ARRAYS
+        })
+
+    # --- Accès ---------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, prefix, limit=10):
+        """Indices des cibles correspondant au préfixe (déjà normalisé), par poids décroissant."""
+        needle = prefix.encode("utf-8")
+        h = bisect.bisect_left(self.heavy, needle)
+        if h < len(self.heavy) and self.heavy[h] == needle:
+            top = self.heavy_top[h]
+            return [int(t) for t in top[top >= 0][:limit]]
+        start = bisect.bisect_left(self.keys, needle)
+        end = bisect.bisect_left(self.keys, needle + b"\xff", start)
+        if start == end:
+            return []
+        return _top_targets(np.asarray(self.entry_targets[start:end]), self.target_weights, limit)
+
+    def suggest(self, query, limit=10):
+        """
+        Suggestions pour une saisie en cours.
+
+        Returns:
+            liste de dicts {type, id, label, year, votes}, les plus votés d'abord
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        return [target_dict(self, target) for target in self.candidates(prefix, limit)]
+
+
+def build_prefix_index(db_path, index_dir):
+    """Étape du pipeline d'import : reconstruit et sauvegarde l'index de préfixes."""
+    index = PrefixIndex.build(db_path)
+    index.save(index_dir)
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def has_prefix_index(index_dir):
+    return all(os.path.exists(os.path.join(index_dir, f"{name}.npy")) for name in ARRAYS)
+
+
+def get_prefix_index(index_dir=None, db_path=None):
+    """
+    Instance partagée, chargée une seule fois en mémoire mappée (par défaut :
+    settings.SUGGEST_DIR) ; construite depuis la base si les fichiers manquent.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if index_dir is None:
+                    from django.conf import settings
+                    index_dir = str(settings.SUGGEST_DIR)
+                    db_path = db_path or settings.DATABASES['default']['NAME']
+                if has_prefix_index(index_dir):
+                    _index = PrefixIndex.load(index_dir)
+                else:
+                    _index = build_prefix_index(db_path, index_dir)
+    return _index
@@ -1,12 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Vues ASGI natives si CINEEXPLORE_ASYNC_VIEWS=1, vues synchrones sinon
+pages = views
+if settings.ASYNC_VIEWS:
+    from . import async_views as pages
+
 urlpatterns = [
     
-    path('', views.home, name='home'), 
-    path('movies/', views.movie_list, name='movie_list'),
-    path('movie/<str:tconst>/', views.movie_detail, name='movie_detail'),
-    path('search/', views.search_view, name='search'),
-    path('stats/', views.stats_view, name='stats_view'),
-    path('test-db/', views.test_stats_view, name='test_db'),
+    path('', pages.home, name='home'), 
+    path('movies/', pages.movie_list, name='movie_list'),
+    path('browse/', views.browse_view, name='browse'),
+    path('movie/<str:tconst>/', pages.movie_detail, name='movie_detail'),
+    path('search/', pages.search_view, name='search'),
+    path('stats/', pages.stats_view, name='stats_view'),
+    path('test-db/', pages.test_stats_view, name='test_db'),
+    path('api/suggest', views.suggest_view, name='suggest'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
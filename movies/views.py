@@ -1,41 +1,27 @@
-import requests
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
 from django.core.paginator import Paginator
 from .models import Movie  
 from .mongo_service import mongo_service
+from .posters import poster_cache
+from .instrumentation import render_prometheus
+from .analytics_engine import get_engine
+from .facets import FACETS, FacetResults, get_facet_index
+from .fuzzy import search_movies
+from .leaderboard import top_movies as leaderboard_top_movies
+from .prerender import get_fragment_store
+from .suggest import get_prefix_index
 
 def home(request):
-    """Récupère le Top 10 et force l'affichage des affiches"""
+    """Récupère le Top 10 (classement précalculé) et force l'affichage des affiches"""
     print("--- APPEL DE LA VUE HOME ---") 
     
     
-    top_movies = Movie.objects.select_related('rating').order_by('-rating__averageRating')[:10]
-    
-    api_key = "7fca3f7f" 
+    top_movies = leaderboard_top_movies(10)
     
     for movie in top_movies:
-        movie.poster_url = None 
-        try:
-            
-            movie_identifier = str(movie.movie_id).strip()
-            
-           
-            url = f"http://www.omdbapi.com/?i={movie_identifier}&apikey={api_key}"
-            
-            response = requests.get(url, timeout=5).json()
-            
-            if response.get('Response') == "True":
-                poster = response.get('Poster')
-                if poster and poster != "N/A":
-                    movie.poster_url = poster
-                    print(f"SUCCÈS : Image trouvée pour {movie_identifier}")
-                else:
-                    print(f"INFO : Pas de poster dispo pour {movie_identifier}")
-            else:
-                print(f"ERREUR API : {response.get('Error')} pour {movie_identifier}")
-                
-        except Exception as e:
-            print(f"ERREUR CONNEXION : {e}")
+        movie.poster_url = poster_cache.poster_url(movie.movie_id)
 
     return render(request, 'movies/home.html', {'top_movies': top_movies})
 
@@ -47,7 +33,29 @@ def movie_list(request):
     return render(request, 'movies/list.html', {'movies': page_obj})
 
 
+def browse_view(request):
+    """Navigation à facettes : filtres et compteurs calculés sur les bitmaps, sans SQL"""
+    index = get_facet_index()
+    filters = {facet: request.GET.getlist(facet) for facet in FACETS}
+    bits, counts = index.query(filters)
+    page_obj = Paginator(FacetResults(index, bits), 20).get_page(request.GET.get('page'))
+
+    query_string = request.GET.copy()
+    query_string.pop('page', None)
+    context = {
+        'movies': page_obj,
+        'facets': [(facet, label, counts[facet]) for facet, label in FACETS.items()],
+        'query_string': query_string.urlencode(),
+    }
+    return render(request, 'movies/browse.html', context)
+
+
 def movie_detail(request, tconst):
+    """Fragment précalculé (une lecture par clé dans SQLite), sinon rendu depuis MongoDB"""
+    if settings.PRERENDERED_DETAIL:
+        page = get_fragment_store().page(tconst)
+        if page is not None:
+            return HttpResponse(page)
     movie = mongo_service.get_movie_by_id(tconst)
     return render(request, 'movies/detail.html', {'movie': movie})
 
@@ -55,12 +63,26 @@ def movie_detail(request, tconst):
 def search_view(request):
     query = request.GET.get('q', '')
     
-    movies = Movie.objects.filter(primaryTitle__icontains=query)[:20] if query else []
+    movies = search_movies(query, 20) if query else []
     return render(request, 'movies/search.html', {'movies': movies, 'query': query})
 
 
+def suggest_view(request):
+    """Autocomplétion titres/personnes : index de préfixes en mémoire mappée, sans SQLite"""
+    query = request.GET.get('q', '')
+    try:
+        limit = min(int(request.GET.get('limit', 10)), settings.SUGGEST_MAX_RESULTS)
+    except ValueError:
+        limit = 10
+    results = get_prefix_index().suggest(query, limit) if query else []
+    return JsonResponse({'query': query, 'results': results})
+
+
 def stats_view(request):
-    genre_data = mongo_service.get_genre_stats()
+    if settings.ANALYTICS_ENGINE:
+        genre_data = get_engine().genre_counts()
+    else:
+        genre_data = mongo_service.get_genre_stats()
     return render(request, 'movies/stats.html', {'genre_data': genre_data})
 
 def test_stats_view(request):
@@ -72,4 +94,11 @@ def test_stats_view(request):
         'count_sqlite': nb_sqlite,
         'infra_status': "Opérationnel"
     }
-    return render(request, 'movies/test_stats.html', context)
\ No newline at end of file
+    return render(request, 'movies/test_stats.html', context)
+
+
+def metrics_view(request):
+    """Endpoint interne : percentiles et compteurs par vue au format Prometheus"""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Préchauffage après un déploiement ou un redémarrage.
+
+Sans lui, les premiers visiteurs paient : le page cache SQLite froid, le
+working set MongoDB hors du cache WiredTiger, les affiches OMDb pas encore
+récupérées et les plans de requêtes pas encore préparés. warm_up() :
+    1. lit le fichier SQLite puis parcourt les index chauds (idx_rating_ranking,
+       idx_person_name, classements Leaderboard) ;
+    2. exécute les requêtes des pages Accueil (top 10) et Liste (page 1) via
+       l'ORM, ce qui prépare aussi les instructions SQLite ;
+    3. charge dans le cache WiredTiger les documents movies_complete les plus
+       votés et exécute l'agrégation des statistiques ;
+    4. remplit les caches applicatifs (affiches du top 10, moteur analytique,
+       index d'autocomplétion, de recherche floue et de facettes).
+
+Appelé par `python cli.py warmup` ou au démarrage du serveur
+(CINEEXPLORE_WARMUP=1, voir movies/apps.py). Chaque étape est chronométrée ;
+une étape en échec (MongoDB arrêté, index absent...) n'empêche pas les autres.
+"""
+
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+
+# Index -> requête qui le parcourt en entier (index couvrant, pas d'accès à la table)
+HOT_INDEXES = {
+    'idx_rating_ranking': "SELECT COUNT(*) FROM (SELECT averageRating, numVotes FROM Rating "
+                          "INDEXED BY idx_rating_ranking ORDER BY averageRating DESC, numVotes DESC)",
+    'idx_person_name': "SELECT COUNT(*) FROM (SELECT primaryName FROM Person "
+                       "INDEXED BY idx_person_name ORDER BY primaryName)",
+    'Leaderboard': "SELECT COUNT(*), SUM(score) FROM Leaderboard",
+}
+
+FIRST_REQUEST_URLS = ['/', '/movies/', '/stats/']
+READ_BLOCK = 1 << 20
+
+
+def _db_path():
+    return str(settings.DATABASES['default']['NAME'])
+
+
+def warm_sqlite_file(path=None):
+    """Lecture séquentielle du fichier : toutes ses pages passent dans le cache du système."""
+    path = path or _db_path()
+    total = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK)
+            if not block:
+                break
+            total += len(block)
+    return f"{total / 1e6:.1f} Mo lus"
+
+
+def warm_sqlite_indexes(path=None):
+    conn = sqlite3.connect(path or _db_path())
+    warmed = []
+    try:
+        for name, sql in HOT_INDEXES.items():
+            try:
+                conn.execute(sql).fetchone()
+                warmed.append(name)
+            except sqlite3.OperationalError:
+                pass
+    finally:
+        conn.close()
+    return f"index parcourus : {', '.join(warmed) or 'aucun'}"
+
+
+def warm_page_queries():
+    """Requêtes des pages servies par SQLite, sur la connexion Django du thread courant."""
+    from django.core.paginator import Paginator
+    from .leaderboard import top_movies as leaderboard_top_movies
+    from .models import Movie
+
+    top_movies = leaderboard_top_movies(10)
+    page = Paginator(Movie.objects.select_related('rating').order_by('-rating__numVotes'), 20).get_page(1)
+    list(page.object_list)
+    return f"top 10 ({len(top_movies)} films), liste page 1 ({page.paginator.count:,} films)"
+
+
+def warm_mongo(limit=None):
+    """Documents les plus votés de movies_complete et agrégation des statistiques."""
+    from pymongo import MongoClient
+    from .mongo_service import MongoService, mongo_service
+
+    # Test rapide : sans serveur, le client du service attendrait 30 s avant d'échouer
+    probe = MongoClient(settings.MONGO_URI, serverSelectionTimeoutMS=2000)
+    try:
+        probe.admin.command('ping')
+    finally:
+        probe.close()
+
+    limit = limit or settings.WARMUP_TOP_DOCUMENTS
+    collection = mongo_service.collection
+    ids = [doc['_id'] for doc in collection.find({}, {'_id': 1}).sort('rating.votes', -1).limit(limit)]
+    # Lecture complète par _id, comme la page Détails : documents + index _id en cache
+    loaded = sum(1 for _ in collection.find({'_id': {'$in': ids}}))
+    list(collection.aggregate(MongoService.GENRE_STATS_PIPELINE))
+    return f"{loaded:,} documents movies_complete chargés"
+
+
+def warm_application_caches():
+    from .leaderboard import top_movies
+    from .posters import poster_cache
+
+    done = []
+    if settings.ANALYTICS_ENGINE:
+        from .analytics_engine import get_engine
+        done.append(f"moteur analytique ({get_engine().num_movies:,} films)")
+    from .suggest import get_prefix_index
+    done.append(f"autocomplétion ({len(get_prefix_index()):,} clés)")
+    if settings.FUZZY_SEARCH:
+        from .fuzzy import get_fuzzy_index
+        done.append(f"recherche floue ({len(get_fuzzy_index()):,} documents)")
+    from .facets import get_facet_index
+    done.append(f"facettes ({len(get_facet_index().rows)} bitmaps)")
+    if not settings.OMDB_STUB:
+        movies = top_movies(10)
+        for movie in movies:
+            poster_cache.poster_url(movie.movie_id)
+        local = sum(1 for movie in movies if poster_cache.local_url(movie.movie_id))
+        done.append(f"affiches ({local}/{len(movies)} miniatures locales)")
+    return ', '.join(done) or "aucun cache actif"
+
+
+STEPS = [
+    ("fichier SQLite", warm_sqlite_file),
+    ("index SQLite", warm_sqlite_indexes),
+    ("requêtes des pages", warm_page_queries),
+    ("MongoDB", warm_mongo),
+    ("caches applicatifs", warm_application_caches),
+]
+
+
+def warm_up(verbose=True):
+    """
+    Exécute toutes les étapes.
+
+    Returns:
+        liste de tuples (étape, durée en ms, détail ou message d'erreur)
+    """
+    report = []
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            detail = step()
+        except Exception as e:
+            detail = f"ignoré ({type(e).__name__}: {str(e)[:80]})"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        report.append((name, elapsed_ms, detail))
+        if verbose:
+            print(f" Préchauffage - {name} : {elapsed_ms:.0f} ms, {detail}")
+    return report
+
+
+def measure_first_requests(urls=FIRST_REQUEST_URLS):
+    """
+    Latence (ms) de la première requête de chaque page, via le client de test
+    Django ; None si la page est en erreur (MongoDB arrêté par exemple).
+    """
+    from django.test import Client
+
+    client = Client(raise_request_exception=False)
+    latencies = {}
+    for url in urls:
+        start = time.perf_counter()
+        response = client.get(url, HTTP_HOST='localhost')
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        latencies[url] = elapsed_ms if response.status_code == 200 else None
+    return latencies
+
+
+def start_background_warmup():
+    """Préchauffage dans un thread au démarrage, sans retarder la mise en service."""
+    import threading
+
+    def run():
+        from django.db import connection
+        try:
+            report = warm_up(verbose=False)
+            total = sum(ms for _, ms, _ in report)
+            print(f" Préchauffage terminé en {total:.0f} ms (pid {os.getpid()})")
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name="warmup", daemon=True).start()
@@ -0,0 +1,287 @@
+"""
+Test de charge des 5 pages de CineExplore.
+
+Rejoue un mélange de trafic réaliste contre `/`, `/movies/?page=N`,
+`/movie/<tconst>/`, `/search/?q=` et `/stats/`. Les identifiants de films et les
+termes de recherche sont tirés du jeu de données réel (data/csv) selon une loi
+de Zipf sur la popularité (numVotes), pour reproduire la concentration du
+trafic sur quelques titres.
+
+Le serveur doit tourner en local avec l'appel OMDb bouchonné :
+    CINEEXPLORE_OMDB_STUB=1 python manage.py runserver --noreload
+ou laisser le script le démarrer lui-même avec --start-server.
+
+Exemple :
+    python scripts/load_test.py --start-server --concurrency 16 --duration 30
+"""
+
+import argparse
+import bisect
+import csv
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_DIR = os.path.join(BASE_DIR, 'data', 'csv')
+PAGE_SIZE = 20
+
+DEFAULT_MIX = {
+    'home': 10,
+    'list': 20,
+    'detail': 40,
+    'search': 20,
+    'stats': 10,
+}
+
+
+def read_csv(filename):
+    """Lit un CSV de data/csv en nettoyant les en-têtes du type "('mid',)"."""
+    with open(os.path.join(CSV_DIR, filename), newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [h.strip("(),'") for h in next(reader)]
+        for row in reader:
+            yield dict(zip(header, row))
+
+
+class ZipfSampler:
+    """Tirage d'éléments classés par popularité avec P(rang k) proportionnel à 1/k^s."""
+
+    def __init__(self, items, s=1.1, rng=None):
+        if not items:
+            raise ValueError("Aucun élément à échantillonner")
+        self.items = items
+        self.rng = rng or random.Random()
+        self.cum_weights = list(itertools.accumulate(1.0 / (k ** s) for k in range(1, len(items) + 1)))
+
+    def sample(self):
+        x = self.rng.random() * self.cum_weights[-1]
+        return self.items[bisect.bisect_left(self.cum_weights, x)]
+
+
+def load_workload(zipf_s, seed):
+    """Construit les échantillonneurs (films, termes, pages) à partir des CSV."""
+    rng = random.Random(seed)
+    votes = {row['mid']: int(row['numVotes'] or 0) for row in read_csv('ratings.csv')}
+    titles = {row['mid']: row['primaryTitle'] for row in read_csv('movies.csv')}
+
+    ranked = sorted(titles, key=lambda mid: votes.get(mid, 0), reverse=True)
+
+    terms, seen = [], set()
+    for mid in ranked:
+        for word in titles[mid].split():
+            word = word.strip(".,:;!?'\"()").lower()
+            if len(word) >= 4 and word not in seen:
+                seen.add(word)
+                terms.append(word)
+
+    num_pages = max(1, (len(titles) + PAGE_SIZE - 1) // PAGE_SIZE)
+    return {
+        'movies': ZipfSampler(ranked, zipf_s, rng),
+        'terms': ZipfSampler(terms, zipf_s, rng),
+        'pages': ZipfSampler(list(range(1, num_pages + 1)), zipf_s, rng),
+    }
+
+
+def build_path(endpoint, workload):
+    if endpoint == 'home':
+        return '/'
+    if endpoint == 'list':
+        return f"/movies/?page={workload['pages'].sample()}"
+    if endpoint == 'detail':
+        return f"/movie/{workload['movies'].sample()}/"
+    if endpoint == 'search':
+        return f"/search/?q={urllib.parse.quote(workload['terms'].sample())}"
+    if endpoint == 'stats':
+        return '/stats/'
+    raise ValueError(f"Endpoint inconnu : {endpoint}")
+
+
+def parse_mix(text):
+    """'home=10,detail=40' -> {'home': 10, 'detail': 40}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Endpoint inconnu : {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadRunner:
+    """Pool de threads qui envoie des requêtes jusqu'à épuisement du budget (durée ou nombre)."""
+
+    def __init__(self, base_url, workload, mix, concurrency, duration=None, total_requests=None, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.workload = workload
+        self.endpoints = list(mix)
+        self.weights = [mix[e] for e in self.endpoints]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.rng = random.Random(seed)
+        self.results = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _next_request(self, deadline):
+        with self._lock:
+            if self.total_requests is not None and self._issued >= self.total_requests:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            self._issued += 1
+            endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+            return endpoint, build_path(endpoint, self.workload)
+
+    def _worker(self, deadline):
+        session = self._session()
+        while True:
+            job = self._next_request(deadline)
+            if job is None:
+                return
+            endpoint, path = job
+            start = time.perf_counter()
+            try:
+                response = session.get(self.base_url + path, timeout=30)
+                ok = response.status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.results[endpoint].append(elapsed)
+                if not ok:
+                    self.errors[endpoint] += 1
+
+    def run(self):
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self._worker, deadline) for _ in range(self.concurrency)]
+            # Une exception dans un worker réduirait la charge sans le dire : on la propage
+            for future in futures:
+                future.result()
+        return time.perf_counter() - start
+
+    def report(self, elapsed):
+        """Débit et distribution de latence (ms) par endpoint."""
+        rows = []
+        for endpoint in self.endpoints + ['total']:
+            if endpoint == 'total':
+                latencies = sorted(itertools.chain.from_iterable(self.results.values()))
+                errors = sum(self.errors.values())
+            else:
+                latencies = sorted(self.results.get(endpoint, []))
+                errors = self.errors.get(endpoint, 0)
+            if not latencies:
+                continue
+            rows.append({
+                'endpoint': endpoint,
+                'requests': len(latencies),
+                'errors': errors,
+                'rps': len(latencies) / elapsed,
+                'mean_ms': 1000 * sum(latencies) / len(latencies),
+                'p50_ms': 1000 * percentile(latencies, 0.50),
+                'p90_ms': 1000 * percentile(latencies, 0.90),
+                'p95_ms': 1000 * percentile(latencies, 0.95),
+                'p99_ms': 1000 * percentile(latencies, 0.99),
+                'max_ms': 1000 * latencies[-1],
+            })
+        return rows
+
+
+def print_report(rows, elapsed, concurrency):
+    print(f"\n--- Test de charge : {elapsed:.1f}s, {concurrency} clients concurrents ---")
+    print("\n| Endpoint | Requêtes | Erreurs | Req/s | Moy (ms) | p50 | p90 | p95 | p99 | Max |")
+    print("| :--- | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: |")
+    for r in rows:
+        print(f"| {r['endpoint']} | {r['requests']:,} | {r['errors']} | {r['rps']:.1f} | {r['mean_ms']:.1f} "
+              f"| {r['p50_ms']:.1f} | {r['p90_ms']:.1f} | {r['p95_ms']:.1f} | {r['p99_ms']:.1f} | {r['max_ms']:.1f} |")
+
+
+def start_server(port):
+    """Lance `manage.py runserver` avec OMDb bouchonné et attend qu'il réponde."""
+    env = dict(os.environ, CINEEXPLORE_OMDB_STUB='1')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, 'manage.py'), 'runserver', '--noreload', f'127.0.0.1:{port}'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{port}/'
+    for _ in range(100):
+        try:
+            requests.get(url + 'movies/', timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Le serveur Django n'a pas démarré")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge des pages CineExplore")
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30.0, help="Durée du test en secondes")
+    parser.add_argument('--requests', type=int, default=None, help="Nombre total de requêtes (remplace --duration)")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help="ex: home=10,list=20,detail=40,search=20,stats=10")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Exposant s de la loi de Zipf")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start-server', action='store_true', help="Démarre runserver (OMDb bouchonné) le temps du test")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--json', help="Écrit le rapport dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    workload = load_workload(args.zipf, args.seed)
+
+    server = None
+    base_url = args.base_url
+    if args.start_server:
+        server = start_server(args.port)
+        base_url = f'http://127.0.0.1:{args.port}'
+
+    try:
+        runner = LoadRunner(
+            base_url, workload, args.mix, args.concurrency,
+            duration=None if args.requests else args.duration,
+            total_requests=args.requests, seed=args.seed,
+        )
+        elapsed = runner.run()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    rows = runner.report(elapsed)
+    print_report(rows, elapsed, args.concurrency)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'elapsed_s': elapsed, 'concurrency': args.concurrency, 'endpoints': rows}, f, indent=2)
+    return rows
+
+
+if __name__ == '__main__':
+    main()
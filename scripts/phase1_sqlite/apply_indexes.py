@@ -6,8 +6,9 @@ import os
 DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
 SQL_FILE = os.path.join(os.path.dirname(__file__), 'create_indexes.sql')
 
-try:
-    conn = sqlite3.connect(DB_FILE)
+
+def apply_indexes(conn):
+    """Exécute create_indexes.sql sur une connexion ouverte et retourne les index idx_*."""
     cursor = conn.cursor()
     
     with open(SQL_FILE, 'r') as f:
@@ -17,15 +18,21 @@ try:
     cursor.executescript(sql_script)
     conn.commit()
     
-    print(f" Indexation complétée avec succès sur {DB_FILE}.")
-    
-    
     cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'idx_%';")
-    indexes = [row[0] for row in cursor.fetchall()]
-    print(f"Index créés (liste partielle) : {', '.join(indexes[:5])}...")
-    
-except sqlite3.Error as e:
-    print(f" Erreur lors de l'application des index : {e}")
-finally:
-    if conn:
-        conn.close()
\ No newline at end of file
+    return [row[0] for row in cursor.fetchall()]
+
+
+if __name__ == '__main__':
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_FILE)
+        indexes = apply_indexes(conn)
+        
+        print(f" Indexation complétée avec succès sur {DB_FILE}.")
+        print(f"Index créés (liste partielle) : {', '.join(indexes[:5])}...")
+        
+    except sqlite3.Error as e:
+        print(f" Erreur lors de l'application des index : {e}")
+    finally:
+        if conn:
+            conn.close()
\ No newline at end of file
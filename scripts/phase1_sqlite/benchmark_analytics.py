@@ -0,0 +1,89 @@
+"""
+Benchmark du moteur analytique en mémoire (movies/analytics_engine.py) face aux
+requêtes SQL Q5, Q7 et au comptage par genre de la page Statistiques.
+
+Vérifie d'abord que les résultats sont identiques, puis compare les temps moyens.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from queries import query_genre_ranking, query_popular_genres
+from movies.analytics_engine import AnalyticsEngine
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+NUM_RUNS = 5
+
+GENRE_COUNTS_SQL = """
+SELECT genre_name, COUNT(*) AS count
+FROM MovieGenre
+GROUP BY genre_name
+ORDER BY count DESC
+LIMIT 10
+"""
+
+
+def sql_genre_counts(conn):
+    return [{'name': row[0], 'count': row[1]} for row in conn.execute(GENRE_COUNTS_SQL)]
+
+
+def time_call(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        result = func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1000, result
+
+
+def same_popular_genres(sql_rows, engine_rows):
+    if len(sql_rows) != len(engine_rows):
+        return False
+    return all(
+        s[0] == e[0] and abs(s[1] - e[1]) < 1e-9 and s[2] == e[2]
+        for s, e in zip(sql_rows, engine_rows)
+    )
+
+
+def same_genre_ranking(sql_rows, engine_rows):
+    # L'ordre entre ex aequo d'un même rang n'est pas défini en SQL : on compare des ensembles
+    return sorted(tuple(r) for r in sql_rows) == sorted(engine_rows)
+
+
+def same_genre_counts(sql_rows, engine_rows):
+    # Idem pour les genres à égalité de comptage
+    return sorted(r['count'] for r in sql_rows) == sorted(r['count'] for r in engine_rows)
+
+
+def main():
+    conn = sqlite3.connect(DB_FILE)
+
+    start = time.perf_counter()
+    engine = AnalyticsEngine(DB_FILE)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"--- Moteur analytique : {engine.num_movies:,} films, {len(engine.mg_movie):,} paires film/genre, "
+          f"chargement {load_ms:.0f} ms ---")
+
+    cases = [
+        ("Q5 genres populaires", lambda: query_popular_genres(conn), engine.popular_genres, same_popular_genres),
+        ("Q7 top 3 par genre", lambda: query_genre_ranking(conn), engine.genre_ranking, same_genre_ranking),
+        ("Stats films par genre", lambda: sql_genre_counts(conn), engine.genre_counts, same_genre_counts),
+    ]
+
+    print("\n| Requête | SQLite (ms) | Moteur (ms) | Accélération | Résultats identiques |")
+    print("| :--- | :--- | :--- | :--- | :--- |")
+    for name, sql_func, engine_func, compare in cases:
+        sql_ms, sql_rows = time_call(sql_func)
+        engine_ms, engine_rows = time_call(engine_func)
+        identical = "oui" if compare(sql_rows, engine_rows) else "NON"
+        print(f"| {name} | {sql_ms:.2f} | {engine_ms:.2f} | x{sql_ms / max(engine_ms, 1e-6):.1f} | {identical} |")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
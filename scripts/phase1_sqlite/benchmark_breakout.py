@@ -0,0 +1,87 @@
+"""
+Q8, carrières « percée » : détecteur vectorisé (movies/breakout.py) contre
+la référence SQL brute (fenêtre + sous-requêtes corrélées) et l'ancienne
+requête (auto-jointure sans chronologie).
+
+Vérification : pour plusieurs seuils de votes et longueurs de série, les
+percées détectées (personne, film, année, films avant, votes max avant, votes)
+doivent être identiques à celles de la référence, sur toute la base.
+"""
+
+import os
+import sqlite3
+import time
+
+from benchmark import DB_FILE
+from movies.breakout import breakout_careers, detect, load_credits, reference_breakouts
+
+NUM_RUNS = 3
+CASES = [(200000, 3), (50000, 1), (100000, 5), (500000, 3), (10000, 10)]
+
+# Ancienne Q8 : une personne ayant au moins un film sous 200k votes et un au-dessus
+LEGACY_SQL = """
+SELECT DISTINCT pe.primaryName
+FROM Person pe
+JOIN MoviePrincipal mp_low ON pe.person_id = mp_low.person_id
+JOIN Rating r_low ON mp_low.movie_id = r_low.movie_id
+JOIN MoviePrincipal mp_high ON pe.person_id = mp_high.person_id
+JOIN Rating r_high ON mp_high.movie_id = r_high.movie_id
+WHERE r_low.numVotes < 200000 AND r_high.numVotes > 200000
+  AND mp_low.category IN ('actor', 'actress', 'director')
+  AND mp_high.category IN ('actor', 'actress', 'director')
+LIMIT 10
+"""
+
+
+def time_ms(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1000
+
+
+def vectorised(person_ids, movie_ids, credits, threshold, min_low_films):
+    """Percées du noyau NumPy au format de reference_breakouts()."""
+    found = detect(*credits, threshold=threshold, min_low_films=min_low_films)
+    return {
+        person_ids[p]: (movie_ids[m], int(y), int(low), int(prior), int(votes))
+        for p, m, y, low, prior, votes in zip(found["person"], found["movie"], found["year"],
+                                               found["low_films"], found["prior_max"], found["votes"])
+    }
+
+
+def main(db_file=DB_FILE):
+    conn = sqlite3.connect(db_file)
+    try:
+        person_ids, movie_ids, *credits = load_credits(conn)
+        print(f"--- {len(credits[0]):,} crédits, {len(person_ids):,} personnes ---")
+
+        print("\n| Seuil (votes) | Films avant | Percées (NumPy) | Percées (SQL) | Identiques |")
+        print("| :--- | :--- | :--- | :--- | :--- |")
+        for threshold, min_low_films in CASES:
+            mine = vectorised(person_ids, movie_ids, credits, threshold, min_low_films)
+            reference = reference_breakouts(conn, threshold, min_low_films)
+            identical = mine == reference
+            print(f"| {threshold:,} | {min_low_films} | {len(mine):,} | {len(reference):,} | "
+                  f"{'oui' if identical else 'NON'} |")
+            if not identical:
+                for person in sorted(set(mine) ^ set(reference) | {p for p in mine if mine[p] != reference.get(p)})[:5]:
+                    print(f"    {person} : NumPy {mine.get(person)} / SQL {reference.get(person)}")
+
+        print("\n| Méthode | Temps (ms) |")
+        print("| :--- | :--- |")
+        print(f"| Ancienne Q8 (auto-jointure, sans chronologie) | {time_ms(lambda: conn.execute(LEGACY_SQL).fetchall()):.1f} |")
+        print(f"| Référence SQL (fenêtre + sous-requêtes) | {time_ms(reference_breakouts, conn):.1f} |")
+        print(f"| Détecteur NumPy, chargement compris (Top 10) | {time_ms(breakout_careers, conn):.1f} |")
+        print(f"| Noyau NumPy seul (crédits en mémoire) | {time_ms(detect, *credits):.1f} |")
+
+        print("\nTop 5 :")
+        for name, title, year, low_films, prior_max, votes in breakout_careers(conn, 5):
+            print(f"- {name} | {title} ({year}) : {votes:,} votes après {low_films} films (max {prior_max:,})")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Comparaison schéma d'origine (data/imdb.db) / schéma compact (data/imdb_compact.db) :
+taille sur disque par table et index, puis temps des 9 requêtes de queries.py
+(exécutées via les vues de compatibilité) avec vérification des résultats.
+"""
+
+import os
+import sqlite3
+
+from benchmark import TEST_PARAMS, run_benchmark
+from create_schema_compact import COMPACT_DB_FILE, DB_FILE
+from queries import (
+    query_actor_filmography,
+    query_top_n_films,
+    query_multi_role_actors,
+    query_collaborations,
+    query_popular_genres,
+    query_career_evolution,
+    query_genre_ranking,
+    query_breakout_career,
+    query_free_style
+)
+
+
+QUERIES = [
+    (query_actor_filmography, "Q1", TEST_PARAMS['actor_name']),
+    (query_top_n_films, "Q2", TEST_PARAMS['genre'], TEST_PARAMS['start_year'], TEST_PARAMS['end_year'], TEST_PARAMS['n']),
+    (query_multi_role_actors, "Q3"),
+    (query_collaborations, "Q4", TEST_PARAMS['actor_name']),
+    (query_popular_genres, "Q5"),
+    (query_career_evolution, "Q6", TEST_PARAMS['actor_name']),
+    (query_genre_ranking, "Q7"),
+    (query_breakout_career, "Q8"),
+    (query_free_style, "Q9"),
+]
+
+
+def object_sizes(conn):
+    """Taille en octets par table/index (dbstat si disponible, sinon None)."""
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC").fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return dict(rows)
+
+
+def print_sizes():
+    print("--- Taille sur disque ---")
+    print(f"Schéma d'origine : {os.path.getsize(DB_FILE) / 1e6:.1f} Mo")
+    print(f"Schéma compact   : {os.path.getsize(COMPACT_DB_FILE) / 1e6:.1f} Mo")
+
+    for label, path in (("origine", DB_FILE), ("compact", COMPACT_DB_FILE)):
+        conn = sqlite3.connect(path)
+        sizes = object_sizes(conn)
+        conn.close()
+        if sizes is None:
+            print("\n(dbstat indisponible dans ce build SQLite : détail par objet omis)")
+            return
+        compat = sum(size for name, size in sizes.items() if name.startswith('idx_compat_'))
+        print(f"\n| Objet ({label}) | Taille (Ko) |")
+        print("| :--- | :--- |")
+        for name, size in sizes.items():
+            print(f"| {name} | {size / 1024:,.0f} |")
+        if compat:
+            print(f"| (dont index de compatibilité) | {compat / 1024:,.0f} |")
+
+
+def same_results(a, b):
+    normalize = lambda rows: sorted(
+        tuple(round(v, 6) if isinstance(v, float) else v for v in r) for r in rows
+    )
+    return normalize(a) == normalize(b)
+
+
+def main():
+    if not os.path.exists(COMPACT_DB_FILE):
+        print(f"Base compacte introuvable ({COMPACT_DB_FILE}) : lancer create_schema_compact.py")
+        return
+
+    print_sizes()
+
+    original = sqlite3.connect(DB_FILE)
+    compact = sqlite3.connect(COMPACT_DB_FILE)
+
+    print("\n| Requête | Origine (ms) | Compact (ms) | Résultats identiques |")
+    print("| :--- | :--- | :--- | :--- |")
+    for func, name, *args in QUERIES:
+        try:
+            a = run_benchmark(original, func, name, *args)
+            b = run_benchmark(compact, func, name, *args)
+            identical = same_results(func(original, *args), func(compact, *args))
+            print(f"| {name} | {a['avg_time_ms']:.2f} | {b['avg_time_ms']:.2f} | {'oui' if identical else 'NON'} |")
+        except Exception as e:
+            print(f"| {name} | ERREUR | ERREUR | {e} |")
+
+    original.close()
+    compact.close()
+
+
+if __name__ == '__main__':
+    main()
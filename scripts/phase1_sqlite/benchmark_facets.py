@@ -0,0 +1,112 @@
+"""
+Benchmark de la navigation à facettes (movies/facets.py) : une sélection
+(filtre + compteurs de toutes les valeurs de toutes les facettes) résolue par
+ET/OU/popcount sur les bitmaps, comparée au même calcul en SQL dynamique
+(une requête COUNT ... GROUP BY par facette, avec les jointures Rating et
+MovieGenre). Vérifie que les compteurs sont identiques.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.facets import (FACETS, RATING_BANDS, RUNTIME_BUCKETS, UNKNOWN, FacetIndex, build_facet_index,
+                           has_facet_index)
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+FACETS_DIR = os.path.join(os.path.dirname(__file__), '../../data/facets/')
+NUM_RUNS = 20
+
+SELECTIONS = [
+    ("Aucun filtre", {}),
+    ("Drama, années 1990", {"genre": ["Drama"], "decade": ["1990"]}),
+    ("Drama|Crime, 8+, > 150 min", {"genre": ["Drama", "Crime"], "rating": ["8+"], "runtime": ["> 150 min"]}),
+    ("Comedy, 2000|2010, 6-7|7-8", {"genre": ["Comedy"], "decade": ["2000", "2010"], "rating": ["6-7", "7-8"]}),
+]
+
+
+def _case(column, buckets, null_label):
+    """Expression SQL de tranche (mêmes bornes que movies/facets.py)."""
+    branches = " ".join(f"WHEN {column} >= {low} THEN '{name}'" for low, name in reversed(buckets))
+    return f"CASE WHEN {column} IS NULL THEN '{null_label}' {branches} ELSE '{buckets[0][1]}' END"
+
+
+# Facette -> expression SQL de sa valeur pour un film
+SQL_VALUES = {
+    "decade": f"COALESCE(CAST(m.startYear / 10 * 10 AS TEXT), '{UNKNOWN}')",
+    "runtime": _case("m.runtimeMinutes", RUNTIME_BUCKETS, UNKNOWN),
+    "titleType": f"COALESCE(m.titleType, '{UNKNOWN}')",
+    "isAdult": "CASE WHEN m.isAdult THEN 'oui' ELSE 'non' END",
+    "rating": _case("r.averageRating", RATING_BANDS, "sans note"),
+}
+
+
+def sql_facet_counts(conn, filters):
+    """Compteurs par facette en SQL dynamique : filtre des autres facettes + GROUP BY."""
+    def where(excluded):
+        clauses, params = [], []
+        for facet, values in filters.items():
+            if facet == excluded or not values:
+                continue
+            marks = ", ".join("?" * len(values))
+            if facet == "genre":
+                clauses.append(f"m.movie_id IN (SELECT movie_id FROM MovieGenre WHERE genre_name IN ({marks}))")
+            else:
+                clauses.append(f"{SQL_VALUES[facet]} IN ({marks})")
+            params += values
+        return " AND ".join(clauses) or "1", params
+
+    counts = {}
+    for facet in FACETS:
+        condition, params = where(facet)
+        if facet == "genre":
+            sql = f"""SELECT mg.genre_name, COUNT(*) FROM Movie m
+                      LEFT JOIN Rating r ON r.movie_id = m.movie_id
+                      JOIN MovieGenre mg ON mg.movie_id = m.movie_id
+                      WHERE {condition} GROUP BY mg.genre_name"""
+        else:
+            sql = f"""SELECT {SQL_VALUES[facet]}, COUNT(*) FROM Movie m
+                      LEFT JOIN Rating r ON r.movie_id = m.movie_id
+                      WHERE {condition} GROUP BY 1"""
+        counts[facet] = dict(conn.execute(sql, params).fetchall())
+    return counts
+
+
+def time_ms(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        result = func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1000, result
+
+
+def main():
+    if not has_facet_index(FACETS_DIR):
+        start = time.perf_counter()
+        build_facet_index(DB_FILE, FACETS_DIR)
+        print(f"Bitmaps construits en {time.perf_counter() - start:.2f}s")
+    index = FacetIndex.load(FACETS_DIR)
+    print(f"--- {len(index.rows)} bitmaps de {index.num_movies:,} films "
+          f"({index.bitmaps.nbytes / 1024:.0f} Ko) ---")
+
+    conn = sqlite3.connect(DB_FILE)
+    print("\n| Sélection | Résultats | Bitmaps (ms) | SQL dynamique (ms) | Compteurs identiques |")
+    print("| :--- | :--- | :--- | :--- | :--- |")
+    for label, filters in SELECTIONS:
+        bitmap_ms, (bits, counts) = time_ms(index.query, filters)
+        sql_ms, sql_counts = time_ms(sql_facet_counts, conn, filters)
+        identical = all(
+            {value: count for value, count, _ in counts[facet] if count} == sql_counts[facet]
+            for facet in FACETS
+        )
+        print(f"| {label} | {index.count(bits):,} | {bitmap_ms:.2f} | {sql_ms:.1f} | "
+              f"{'oui' if identical else 'NON'} |")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
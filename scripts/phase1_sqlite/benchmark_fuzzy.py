@@ -0,0 +1,91 @@
+"""
+Benchmark de la recherche floue (movies/fuzzy.py) : latence et bon premier
+résultat pour des saisies avec fautes/sans accents, sur le catalogue réel puis
+sur des catalogues synthétiques 2x, 4x, 8x plus grands (titres fabriqués à
+partir des mots des vrais titres). La version bornée (budget de postings,
+MAX_CANDIDATES) est comparée au parcours de toutes les listes de trigrammes.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies import fuzzy
+from movies.fuzzy import FuzzyIndex
+from movies.suggest import encode_strings, read_catalog
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+NUM_RUNS = 10
+GROWTH = (1, 2, 4, 8)
+
+# (saisie, titre attendu en tête)
+QUERIES = [
+    ("the godfahter", "The Godfather"),
+    ("shawshank redemtion", "The Shawshank Redemption"),
+    ("amelie", "Amélie"),
+    ("fantomas a l ombre de la guillotine", "Fantômas: In the Shadow of the Guillotine"),
+    ("lord of the rinsg", "The Lord of the Rings"),
+    ("pulp fictoin", "Pulp Fiction"),
+    ("le samourai", "Le Samouraï"),
+]
+
+
+def grow_catalog(catalog, labels, factor, seed=0):
+    """Catalogue réel + (factor - 1) fois autant de titres synthétiques (mots réels, votes réels)."""
+    if factor == 1:
+        return catalog, labels
+    rng = np.random.default_rng(seed)
+    words = np.array(sorted({w for label in labels for w in label.split()}))
+    extra = len(labels) * (factor - 1)
+    lengths = rng.integers(1, 5, size=extra)
+    picks = rng.integers(0, len(words), size=int(lengths.sum()))
+    synthetic = [" ".join(chunk) for chunk in np.split(words[picks], np.cumsum(lengths)[:-1])]
+    source = rng.integers(0, len(labels), size=extra)
+    grown = {name: np.concatenate([catalog[name], catalog[name][source]])
+             for name in ("target_kinds", "target_ids", "target_years", "target_weights")}
+    all_labels = list(labels) + synthetic
+    grown["label_blob"], grown["label_offsets"] = encode_strings(all_labels)
+    return grown, all_labels
+
+
+def run_queries(index):
+    """(latence moyenne ms, latence max ms, nombre de bons premiers résultats)"""
+    latencies, correct = [], 0
+    for query, expected in QUERIES:
+        index.matches(query, 10)
+        start = time.perf_counter()
+        for _ in range(NUM_RUNS):
+            results = index.search(query, 10)
+        latencies.append((time.perf_counter() - start) / NUM_RUNS * 1000)
+        correct += bool(results) and results[0]["label"] == expected
+    return sum(latencies) / len(latencies), max(latencies), correct
+
+
+def main():
+    catalog, labels, aliases = read_catalog(DB_FILE)
+
+    print("\n| Catalogue | Documents | Bornée moy. (ms) | Bornée max (ms) | Complète moy. (ms) | Bons 1ers résultats |")
+    print("| :--- | :--- | :--- | :--- | :--- | :--- |")
+    for factor in GROWTH:
+        grown, grown_labels = grow_catalog(catalog, labels, factor)
+        index = FuzzyIndex.from_catalog(grown, grown_labels, aliases)
+        bounded_avg, bounded_max, correct = run_queries(index)
+
+        budget, candidates = fuzzy.POSTINGS_BUDGET, fuzzy.MAX_CANDIDATES
+        fuzzy.POSTINGS_BUDGET = fuzzy.MAX_CANDIDATES = sys.maxsize
+        try:
+            full_avg, _, _ = run_queries(index)
+        finally:
+            fuzzy.POSTINGS_BUDGET, fuzzy.MAX_CANDIDATES = budget, candidates
+
+        print(f"| x{factor} | {len(index):,} | {bounded_avg:.2f} | {bounded_max:.2f} | {full_avg:.2f} | "
+              f"{correct}/{len(QUERIES)} |")
+
+
+if __name__ == '__main__':
+    main()
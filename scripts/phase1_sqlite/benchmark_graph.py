@@ -0,0 +1,111 @@
+"""
+Benchmark du graphe de collaborations (movies/collab_graph.py) : chargement
+en mémoire mappée, Q4 SQL vs Q4 sur le graphe, et latence des requêtes
+"top collaborateurs", "films en commun" et "degrés de séparation".
+
+Équivalence vérifiée sur un échantillon d'acteurs réels (les SAMPLE_SIZE plus
+crédités et autant tirés au hasard) : réalisateurs par person_id, puis
+query_collaborations et query_collaborations_graph par nom (LIMIT 10 compris).
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from queries import query_collaborations, query_collaborations_graph
+from movies.collab_graph import CollaborationGraph, build_graph
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+CSV_DIR = os.path.join(os.path.dirname(__file__), '../../data/csv/')
+GRAPH_DIR = os.path.join(os.path.dirname(__file__), '../../data/graph/')
+NUM_RUNS = 20
+SAMPLE_SIZE = 60
+
+# Q4 par person_id (sans regroupement par nom) : référence de top_collaborators
+DIRECTORS_SQL = """
+SELECT mp_d.person_id, COUNT(*)
+FROM MoviePrincipal mp_d
+WHERE mp_d.category = 'director' AND mp_d.movie_id IN (
+    SELECT movie_id FROM MoviePrincipal WHERE person_id = ? AND category IN ('actor', 'actress')
+)
+GROUP BY mp_d.person_id
+"""
+
+
+def time_us(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        result = func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1e6, result
+
+
+def sample_actors(conn):
+    """Les SAMPLE_SIZE acteurs les plus crédités et SAMPLE_SIZE autres tirés au hasard : [(person_id, nom)]."""
+    actors = conn.execute("""
+        SELECT mp.person_id, pe.primaryName FROM MoviePrincipal mp JOIN Person pe ON pe.person_id = mp.person_id
+        WHERE mp.category IN ('actor', 'actress')
+        GROUP BY mp.person_id ORDER BY COUNT(*) DESC, mp.person_id
+    """).fetchall()
+    rest = actors[SAMPLE_SIZE:]
+    return actors[:SAMPLE_SIZE] + random.Random(0).sample(rest, min(SAMPLE_SIZE, len(rest)))
+
+
+def compare_q4(conn, graph, actors):
+    """(identiques par person_id, identiques par nom) sur l'échantillon."""
+    same_ids = same_names = 0
+    for person_id, name in actors:
+        expected = sorted(conn.execute(DIRECTORS_SQL, (person_id,)).fetchall())
+        same_ids += expected == sorted(graph.top_collaborators(person_id, k=None))
+        same_names += [tuple(r) for r in query_collaborations(conn, name)] == query_collaborations_graph(conn, graph, name)
+    return same_ids, same_names
+
+
+def main():
+    if not os.path.exists(os.path.join(GRAPH_DIR, 'person_ids.npy')):
+        start = time.perf_counter()
+        build_graph(DB_FILE, CSV_DIR, GRAPH_DIR)
+        print(f"Graphe construit en {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    graph = CollaborationGraph.load(GRAPH_DIR)
+    print(f"--- Graphe chargé (mmap) en {(time.perf_counter() - start) * 1000:.2f} ms : "
+          f"{len(graph.person_ids):,} personnes, {len(graph.movie_ids):,} films ---")
+
+    conn = sqlite3.connect(DB_FILE)
+    actors = sample_actors(conn)
+    if not actors:
+        print("\nAucun acteur dans MoviePrincipal : rien à comparer")
+        conn.close()
+        return
+    person_id, actor_name = actors[0]
+    sql_us, sql_rows = time_us(query_collaborations, conn, actor_name)
+    graph_us, graph_rows = time_us(query_collaborations_graph, conn, graph, actor_name)
+    same_ids, same_names = compare_q4(conn, graph, actors)
+    conn.close()
+
+    print("\n| Requête | Temps Moyen (µs) | Nb Résultats |")
+    print("| :--- | :--- | :--- |")
+    print(f"| Q4 SQL ({actor_name}) | {sql_us:,.0f} | {len(sql_rows)} |")
+    print(f"| Q4 graphe ({actor_name}) | {graph_us:,.0f} | {len(graph_rows)} |")
+
+    top_us, top = time_us(graph.top_collaborators, person_id, 10, ("actor", "actress"), ("director",), True)
+    print(f"| Top collaborateurs | {top_us:,.0f} | {len(top)} |")
+    if top:
+        other = top[0][0]
+        shared_us, shared = time_us(graph.shared_films, person_id, other)
+        print(f"| Films en commun | {shared_us:,.0f} | {len(shared)} |")
+        bfs_us, degrees = time_us(graph.degrees_of_separation, person_id, other)
+        print(f"| Degrés de séparation | {bfs_us:,.0f} | {degrees} |")
+
+    print(f"\nRésultats Q4 identiques sur {len(actors)} acteurs : {same_ids} par person_id, "
+          f"{same_names} par nom (LIMIT 10)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark des classements précalculés (movies/leaderboard.py) : Q2 par tri
+de la jointure complète vs fusion des listes Top K par décennie, et Top 10
+de la page d'accueil. Vérifie que la fusion donne le même résultat que le
+calcul exact au score bayésien.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from queries import query_top_n_films, query_top_n_films_leaderboard
+from movies.leaderboard import build_leaderboard, load_meta, top_n, top_n_exact
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+NUM_RUNS = 20
+
+# (libellé, genre, année de début, année de fin, N)
+CASES = [
+    ("Q2 Action 2000-2020", "Action", 2000, 2020, 5),
+    ("Q2 Drama 1995-2004", "Drama", 1995, 2004, 10),
+    ("Q2 Comedy 1950-2022", "Comedy", 1950, 2022, 50),
+    ("Accueil (tous genres)", None, None, None, 10),
+]
+
+
+def time_us(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        result = func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1e6, result
+
+
+def main():
+    conn = sqlite3.connect(DB_FILE)
+    if load_meta(conn) is None:
+        stats = build_leaderboard(conn)
+        print(f"Classements construits en {stats['seconds']:.2f}s ({stats['rows']:,} lignes)")
+    mean_rating, prior_votes, top_k = load_meta(conn)
+    print(f"--- Score bayésien : C = {mean_rating:.2f}, m = {prior_votes:,} votes, Top {top_k} par liste ---")
+
+    print("\n| Requête | Tri complet (µs) | Exact bayésien (µs) | Classement (µs) | Identique |")
+    print("| :--- | :--- | :--- | :--- | :--- |")
+    for label, genre, start_year, end_year, n in CASES:
+        if genre is None:
+            raw_us, _ = time_us(lambda: conn.execute(
+                "SELECT movie_id FROM Rating ORDER BY averageRating DESC LIMIT ?", (n,)).fetchall())
+        else:
+            raw_us, _ = time_us(query_top_n_films, conn, genre, start_year, end_year, n)
+        exact_us, exact = time_us(top_n_exact, conn, n, genre, start_year, end_year)
+        board_us, board = time_us(top_n, conn, n, genre, start_year, end_year)
+        identical = [tuple(r) for r in exact] == board
+        print(f"| {label} | {raw_us:,.0f} | {exact_us:,.0f} | {board_us:,.0f} | {'oui' if identical else 'NON'} |")
+
+    genre, start_year, end_year, n = CASES[0][1:]
+    print(f"\nTop {n} {genre} {start_year}-{end_year}, note brute -> score bayésien :")
+    raw = query_top_n_films(conn, genre, start_year, end_year, n)
+    board = query_top_n_films_leaderboard(conn, genre, start_year, end_year, n)
+    for (raw_title, _, raw_rating, raw_votes), (title, _, rating, votes) in zip(raw, board):
+        print(f"- {raw_title} ({raw_rating}, {raw_votes:,} votes) -> {title} ({rating}, {votes:,} votes)")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark de l'historique des notes (movies/rating_history.py) : simule
+NUM_DAYS instantanés quotidiens sur une copie de Rating (une fraction des films
+change chaque jour) et compare au stockage naïf (une ligne par film et par
+jour) : taille sur disque, durée d'ajout, historique d'un film et films ayant
+le plus progressé sur une période. Vérifie que les deux donnent le même résultat.
+
+Vérifie aussi la chaîne complète, par les mêmes appels que `python cli.py
+schema`, `import` et `history` : un ratings.csv modifié après l'export de
+l'instantané Arrow doit être relu, rafraîchir Rating (sans quarantaine des
+films déjà importés) et ajouter des points à l'historique, y compris après une
+reconstruction du schéma, qui conserve l'historique.
+"""
+
+import contextlib
+import csv
+import io
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+import create_schema
+import import_data
+from movies.rating_history import history, record_snapshot, vote_growth
+from movies.snapshot import export_sqlite_snapshot
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+CSV_DIR = os.path.join(os.path.dirname(__file__), '../../data/csv/')
+REIMPORT_CHANGED = 100
+NUM_DAYS = 90
+CHANGED_PER_DAY = 0.05
+FIRST_DAY = date(2025, 11, 1)
+NUM_RUNS = 5
+
+
+def simulate(ratings, seed=42):
+    """Instantanés successifs : chaque jour, CHANGED_PER_DAY des films gagnent des votes (et parfois 0,1 point)."""
+    rng = random.Random(seed)
+    current = {movie_id: (rating, votes or 0) for movie_id, rating, votes in ratings}
+    movie_ids = sorted(current)
+    for day in range(NUM_DAYS):
+        for movie_id in rng.sample(movie_ids, int(len(movie_ids) * CHANGED_PER_DAY)):
+            rating, votes = current[movie_id]
+            if rating is not None and rng.random() < 0.3:
+                rating = round(min(10.0, max(1.0, rating + rng.choice((-0.1, 0.1)))), 1)
+            current[movie_id] = (rating, votes + rng.randint(1, 500))
+        yield FIRST_DAY + timedelta(days=day), [(m, r, v) for m, (r, v) in current.items()]
+
+
+def naive_growth(conn, start, end, limit):
+    return conn.execute("""
+        SELECT e.movie_id, s.numVotes, e.numVotes, e.numVotes - s.numVotes AS gain
+        FROM DailyRating e JOIN DailyRating s ON s.movie_id = e.movie_id AND s.day = ?
+        WHERE e.day = ? AND e.numVotes > s.numVotes
+        ORDER BY gain DESC, e.movie_id LIMIT ?
+    """, (start.isoformat(), end.isoformat(), limit)).fetchall()
+
+
+def naive_history(conn, movie_id, start, end):
+    return conn.execute("SELECT day, averageRating, numVotes FROM DailyRating "
+                        "WHERE movie_id = ? AND day BETWEEN ? AND ? ORDER BY day",
+                        (movie_id, start.isoformat(), end.isoformat())).fetchall()
+
+
+def time_ms(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        result = func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1000, result
+
+
+def file_size(conn):
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    return page_count * conn.execute("PRAGMA page_size").fetchone()[0]
+
+
+def bump_votes(rows, csv_dir):
+    """REIMPORT_CHANGED films de ratings.csv gagnent un vote ; CSV réécrit plus récent que l'instantané."""
+    changed = [row for row in rows[1:] if row[2].isdigit()][:REIMPORT_CHANGED]
+    for row in changed:
+        row[2] = str(int(row[2]) + 1)
+    path = os.path.join(csv_dir, 'ratings.csv')
+    with open(path, 'w', newline='') as f:
+        csv.writer(f, quoting=csv.QUOTE_MINIMAL).writerows(rows)
+    # Plus récent que l'instantané Arrow exporté juste avant, même avec des mtimes à la seconde
+    later = time.time() + 1
+    os.utime(path, (later, later))
+    return changed
+
+
+def run_import(db_file, quarantine_dir, rebuild):
+    """Comme `python cli.py [schema] import` puis `history` : schéma éventuel, prepare_import, import_all."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if rebuild:
+            create_schema.reset_database(db_file)
+        conn = sqlite3.connect(db_file)
+        checkpoints, validator = import_data.prepare_import(conn, quarantine_dir)
+        import_data.import_all(conn, validator, checkpoints)
+    return conn
+
+
+def check_reimport(tmp):
+    """
+    Import complet des CSV et premier instantané de l'historique, puis deux
+    jours où REIMPORT_CHANGED films gagnent un vote : réimport seul, puis
+    schéma reconstruit et import. Chaque jour doit enregistrer exactement ces
+    changements, et l'historique survivre à la reconstruction.
+
+    Returns:
+        ([(étape, films modifiés, changements enregistrés)], movie_id, historique de movie_id)
+    """
+    csv_dir, snapshot_dir = os.path.join(tmp, "csv"), os.path.join(tmp, "snapshot")
+    quarantine_dir = os.path.join(tmp, "quarantine")
+    shutil.copytree(CSV_DIR, csv_dir)
+    import_data.CSV_DIR, import_data.SNAPSHOT_DIR = csv_dir, snapshot_dir
+    with open(os.path.join(csv_dir, 'ratings.csv'), newline='') as f:
+        rows = list(csv.reader(f))
+
+    db_file = os.path.join(tmp, "reimport.db")
+    conn = run_import(db_file, quarantine_dir, rebuild=True)
+    record_snapshot(conn, FIRST_DAY)
+    conn.close()
+
+    results = []
+    for day, (label, rebuild) in enumerate([("réimport", False), ("schéma reconstruit + import", True)], 1):
+        export_sqlite_snapshot(db_file, snapshot_dir, tables=['Rating'])
+        changed = bump_votes(rows, csv_dir)
+        conn = run_import(db_file, quarantine_dir, rebuild)
+        stats = record_snapshot(conn, FIRST_DAY + timedelta(days=day))
+        results.append((label, len(changed), stats['changed']))
+        movie_id = changed[0][0] if changed else None
+        points = history(conn, movie_id) if changed else []
+        conn.close()
+    return results, movie_id, points
+
+
+def main():
+    source = sqlite3.connect(DB_FILE)
+    ratings = source.execute("SELECT movie_id, averageRating, numVotes FROM Rating").fetchall()
+    source.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bucketed = sqlite3.connect(os.path.join(tmp, "bucketed.db"))
+        naive = sqlite3.connect(os.path.join(tmp, "naive.db"))
+        naive.execute("CREATE TABLE DailyRating (movie_id TEXT, day TEXT, averageRating REAL, numVotes INTEGER, "
+                      "PRIMARY KEY (movie_id, day)) WITHOUT ROWID")
+
+        bucketed_s = naive_s = 0.0
+        for snapshot_date, snapshot in simulate(ratings):
+            bucketed_s += record_snapshot(bucketed, snapshot_date, snapshot)["seconds"]
+            start = time.perf_counter()
+            with naive:
+                naive.executemany("INSERT INTO DailyRating VALUES (?, ?, ?, ?)",
+                                  [(m, snapshot_date.isoformat(), r, v) for m, r, v in snapshot])
+            naive_s += time.perf_counter() - start
+
+        print(f"--- {len(ratings):,} films, {NUM_DAYS} instantanés quotidiens, "
+              f"{CHANGED_PER_DAY:.0%} de films modifiés par jour ---")
+        print("\n| Stockage | Taille (Mo) | Ajout moyen (ms/instantané) |")
+        print("| :--- | :--- | :--- |")
+        print(f"| Ligne par film et par jour | {file_size(naive) / 1e6:.1f} | {naive_s / NUM_DAYS * 1000:.0f} |")
+        print(f"| Buckets annuels delta-encodés | {file_size(bucketed) / 1e6:.1f} | "
+              f"{bucketed_s / NUM_DAYS * 1000:.0f} |")
+
+        start, end = FIRST_DAY + timedelta(days=30), FIRST_DAY + timedelta(days=NUM_DAYS - 1)
+        bucketed_ms, growth = time_ms(vote_growth, bucketed, start, end, 20)
+        naive_ms, expected = time_ms(naive_growth, naive, start, end, 20)
+        movie_id = growth[0][0]
+        bucketed_history_ms, points = time_ms(history, bucketed, movie_id, start, end)
+        naive_history_ms, rows = time_ms(naive_history, naive, movie_id, start, end)
+        # L'historique delta ne garde que les changements : on compare les votes aux mêmes dates
+        daily = {day: votes for day, _, votes in rows}
+        same_history = all(daily[d.isoformat()] == votes for d, _, votes in points)
+
+        print(f"\n| Requête ({start} -> {end}) | Naïf (ms) | Buckets (ms) | Identique |")
+        print("| :--- | :--- | :--- | :--- |")
+        print(f"| Top 20 progression des votes | {naive_ms:.1f} | {bucketed_ms:.1f} | "
+              f"{'oui' if [tuple(r) for r in expected] == growth else 'NON'} |")
+        print(f"| Historique de {movie_id} | {naive_history_ms:.2f} | {bucketed_history_ms:.2f} | "
+              f"{'oui' if same_history else 'NON'} |")
+        bucketed.close()
+        naive.close()
+
+        results, movie_id, points = check_reimport(tmp)
+        print("\n| ratings.csv modifié après l'instantané | Films modifiés | Changements enregistrés | Identique |")
+        print("| :--- | :--- | :--- | :--- |")
+        for label, expected, recorded in results:
+            print(f"| {label} | {expected} | {recorded} | {'oui' if expected == recorded else 'NON'} |")
+        for day, rating, votes in points:
+            print(f"- {movie_id} le {day} : {rating} ({votes:,} votes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Films similaires (movies/similar.py) : temps du calcul hors ligne par étape
+et par taille de lot, qualité de l'approximation et coût à l'affichage.
+
+Qualité : pour un échantillon de films, les scores des K voisins retenus sont
+comparés aux K meilleurs cosinus exacts (produit complet de l'échantillon par
+toute la matrice, genres et décennie compris, sans restriction des candidats).
+
+Affichage : lecture des voisins précalculés (MovieSimilar, clé primaire)
+contre le calcul à la demande en SQL (films partageant une personne, classés
+par nombre de personnes communes).
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.collab_graph import CollaborationGraph, build_graph
+from movies.similar import TABLE, TOP_K, SimilarityFeatures, similar_movies, store
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+CSV_DIR = os.path.join(os.path.dirname(__file__), '../../data/csv/')
+GRAPH_DIR = os.path.join(os.path.dirname(__file__), '../../data/graph/')
+BATCH_SIZES = [512, 2048, 8192]
+SAMPLE_SIZE = 500
+NUM_RUNS = 20
+
+# Calcul à la demande : personnes communes, sans genres ni décennie
+ON_THE_FLY_SQL = """
+SELECT other.movie_id, m.primaryTitle, COUNT(DISTINCT other.person_id) AS shared
+FROM MoviePrincipal mine
+JOIN MoviePrincipal other ON other.person_id = mine.person_id AND other.movie_id != mine.movie_id
+JOIN Movie m ON m.movie_id = other.movie_id
+WHERE mine.movie_id = ?
+GROUP BY other.movie_id
+ORDER BY shared DESC
+LIMIT ?
+"""
+
+
+def time_us(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1e6
+
+
+def exact_scores(features, rows, k):
+    """K meilleurs cosinus exacts des films `rows` (force brute, hors le film lui-même)."""
+    matrix = sparse.hstack([features.persons, sparse.csr_matrix(features.dense)]).tocsr()
+    matrix = sparse.diags(features.inv_norm) @ matrix
+    scores = (matrix[rows] @ matrix.T).toarray()
+    scores[np.arange(len(rows)), rows] = 0
+    return -np.sort(-scores, axis=1)[:, :k]
+
+
+def main(db_file=DB_FILE):
+    if not os.path.exists(os.path.join(GRAPH_DIR, 'person_ids.npy')):
+        build_graph(db_file, CSV_DIR, GRAPH_DIR)
+    graph = CollaborationGraph.load(GRAPH_DIR)
+    conn = sqlite3.connect(db_file)
+    try:
+        start = time.perf_counter()
+        features = SimilarityFeatures.build(conn, graph)
+        build_s = time.perf_counter() - start
+        print(f"--- {len(features):,} films, {features.persons.shape[1]:,} personnes retenues, "
+              f"{features.persons.nnz:,} crédits pondérés, {features.dense.shape[1]} colonnes genres + décennies ---")
+
+        print("\n| Étape | Temps (s) |")
+        print("| :--- | :--- |")
+        print(f"| Caractéristiques (SQLite + graphe) | {build_s:.2f} |")
+        results = {}
+        for batch_size in BATCH_SIZES:
+            start = time.perf_counter()
+            results[batch_size] = features.neighbours(TOP_K, batch_size)
+            print(f"| Voisins, lots de {batch_size:,} films | {time.perf_counter() - start:.2f} |")
+        neighbours, scores = results[BATCH_SIZES[0]]
+        same = all(np.array_equal(neighbours, other) for other, _ in results.values())
+        memory = sqlite3.connect(":memory:")
+        start = time.perf_counter()
+        rows = store(memory, features.movie_ids, neighbours, scores)
+        print(f"| Écriture de {TABLE} ({rows:,} lignes, base en mémoire) | {time.perf_counter() - start:.2f} |")
+        memory.close()
+        print(f"\nMêmes voisins quelle que soit la taille des lots : {'oui' if same else 'NON'}")
+
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(features), min(SAMPLE_SIZE, len(features)), replace=False)
+        exact = exact_scores(features, sample, TOP_K)
+        mine = scores[sample]
+        print(f"\nQualité sur {len(sample)} films (K = {TOP_K}) :")
+        print(f"- scores identiques au cosinus exact : {np.mean(np.isclose(mine, exact, atol=1e-4)):.1%}")
+        print(f"- 1er voisin exact : {np.mean(np.isclose(mine[:, 0], exact[:, 0], atol=1e-4)):.1%}")
+        print(f"- écart moyen de score : {np.mean(exact - mine):.4f}")
+
+        exists = conn.execute("SELECT 1 FROM sqlite_schema WHERE name = ?", (TABLE,)).fetchone()
+        if not exists:
+            print(f"\n{TABLE} absente de {db_file} : lancer python cli.py similar")
+            return
+        movie_id = conn.execute("SELECT movie_id FROM Rating ORDER BY numVotes DESC LIMIT 1").fetchone()[0]
+        print(f"\n| Affichage ({movie_id}) | Temps (µs) |")
+        print("| :--- | :--- |")
+        print(f"| Voisins précalculés ({TABLE}) | {time_us(similar_movies, conn, movie_id):.1f} |")
+        print(f"| Calcul SQL à la demande (personnes communes) | "
+              f"{time_us(lambda: conn.execute(ON_THE_FLY_SQL, (movie_id, TOP_K)).fetchall()):.1f} |")
+        print()
+        for similar_id, title, year, score in similar_movies(conn, movie_id, 5):
+            print(f"- {title} ({year}) : {score:.3f}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
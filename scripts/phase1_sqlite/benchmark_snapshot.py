@@ -0,0 +1,78 @@
+"""
+Temps de chargement : CSV bruts (pandas, comme import_data.py) / SQLite
+(SELECT *, comme migrate_flat.py) face à l'instantané Arrow en mémoire mappée
+et au Parquet zstd (movies/snapshot.py).
+
+L'instantané est d'abord exporté depuis data/csv/ dans un répertoire temporaire.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.snapshot import CSV_SOURCES, export_csv_snapshot, load_table, snapshot_path
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+CSV_DIR = os.path.join(os.path.dirname(__file__), '../../data/csv/')
+NUM_RUNS = 5
+
+
+def time_call(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        result = func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1000, result
+
+
+def load_csv(table):
+    filename, column_map = CSV_SOURCES[table]
+    df = pd.read_csv(os.path.join(CSV_DIR, filename), usecols=[f"('{c}',)" for c in column_map],
+                     na_values=['\\N'])
+    return df.rename(columns={f"('{c}',)": s for c, s in column_map.items()})
+
+
+def load_sqlite(conn, table):
+    return conn.execute(f"SELECT * FROM {table}").fetchall()
+
+
+def main():
+    snapshot_dir = tempfile.mkdtemp(prefix="imdb_snapshot_")
+    start = time.perf_counter()
+    stats = export_csv_snapshot(CSV_DIR, snapshot_dir)
+    print(f"--- Export CSV -> Arrow/Parquet : {len(stats)} tables en {time.perf_counter() - start:.2f}s ---")
+
+    conn = sqlite3.connect(DB_FILE)
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    print("\n| Table | Lignes | CSV (Mo) | Arrow (Mo) | Parquet (Mo) | CSV pandas (ms) | SQLite (ms) "
+          "| Arrow mmap (ms) | Parquet (ms) | Arrow -> pandas (ms) |")
+    print("| :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- |")
+    for table, rows in stats.items():
+        csv_mb = os.path.getsize(os.path.join(CSV_DIR, CSV_SOURCES[table][0])) / 1e6
+        arrow_mb = os.path.getsize(snapshot_path(table, "arrow", snapshot_dir)) / 1e6
+        parquet_mb = os.path.getsize(snapshot_path(table, "parquet", snapshot_dir)) / 1e6
+
+        csv_ms, _ = time_call(load_csv, table)
+        sqlite_ms = time_call(load_sqlite, conn, table)[0] if table in existing else None
+        arrow_ms, _ = time_call(load_table, table, snapshot_dir)
+        parquet_ms, _ = time_call(pq.read_table, snapshot_path(table, "parquet", snapshot_dir))
+        pandas_ms, _ = time_call(lambda: load_table(table, snapshot_dir).to_pandas())
+
+        sqlite_cell = f"{sqlite_ms:.2f}" if sqlite_ms is not None else "-"
+        print(f"| {table} | {rows:,} | {csv_mb:.2f} | {arrow_mb:.2f} | {parquet_mb:.2f} | {csv_ms:.2f} | "
+              f"{sqlite_cell} | {arrow_ms:.2f} | {parquet_ms:.2f} | {pandas_ms:.2f} |")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Expériences de stockage SQLite sur des copies de data/imdb.db : VACUUM seul,
+puis VACUUM avec d'autres tailles de page. Pour chaque copie : taille du
+fichier, remplissage moyen des pages (dbstat) et temps des 9 requêtes de
+queries.py, avec vérification des résultats par rapport à la base d'origine.
+Le cache de page est fixé en octets (CACHE_KIB) pour toutes les copies : seule
+la disposition sur disque change. La base d'origine n'est pas modifiée.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from benchmark import DB_FILE, run_benchmark
+from benchmark_compact import QUERIES, same_results
+from movies.storage_report import sqlite_copy, sqlite_objects, sqlite_summary
+
+PAGE_SIZES = [1024, 8192, 16384, 65536]
+CACHE_KIB = 2000
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA cache_size=-{CACHE_KIB}")
+    return conn
+
+
+def fill_ratio(conn):
+    objects = sqlite_objects(conn)
+    total = sum(obj["bytes"] for obj in objects)
+    return sum(obj["payload"] for obj in objects) / total if total else 0.0
+
+
+def measure(path, reference):
+    """Taille, remplissage, 1re exécution (nouvelle connexion) et moyenne de chaque requête."""
+    conn = connect(path)
+    summary = sqlite_summary(conn)
+    row = {"bytes": os.path.getsize(path), "page_size": summary["page_size"], "fill": fill_ratio(conn),
+           "first_ms": {}, "avg_ms": {}, "identical": True}
+    conn.close()
+    for func, name, *args in QUERIES:
+        conn = connect(path)
+        start = time.perf_counter()
+        results = func(conn, *args)
+        row["first_ms"][name] = (time.perf_counter() - start) * 1000
+        row["avg_ms"][name] = run_benchmark(conn, func, name, *args)['avg_time_ms']
+        conn.close()
+        if reference is not None and not same_results(name, reference[name], results):
+            row["identical"] = False
+    return row
+
+
+def main(db_file=DB_FILE):
+    conn = connect(db_file)
+    reference = {name: func(conn, *args) for func, name, *args in QUERIES}
+    conn.close()
+
+    rows = {"origine": measure(db_file, None)}
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(db_file))) as work_dir:
+        copy = os.path.join(work_dir, 'copy.db')
+        print(f"--- Copies de {db_file} dans {work_dir} ---")
+        for label, page_size in [("VACUUM", None)] + [(f"VACUUM, pages {size // 1024} Kio", size)
+                                                      for size in PAGE_SIZES]:
+            start = time.perf_counter()
+            sqlite_copy(db_file, copy, page_size)
+            print(f"  {label} : {time.perf_counter() - start:.1f} s")
+            rows[label] = measure(copy, reference)
+
+    base = rows["origine"]["bytes"]
+    print("\n| Configuration | Page (o) | Taille (Mo) | Gain | Remplissage | Q1-Q9 1re exécution (ms) | Q1-Q9 moyenne (ms) | Résultats identiques |")
+    print("| :--- | :--- | :--- | :--- | :--- | :--- | :--- | :--- |")
+    for label, row in rows.items():
+        print(f"| {label} | {row['page_size']} | {row['bytes'] / 1e6:.1f} | {(1 - row['bytes'] / base) * 100:+.1f} % | "
+              f"{row['fill'] * 100:.1f} % | {sum(row['first_ms'].values()):.1f} | {sum(row['avg_ms'].values()):.1f} | "
+              f"{'oui' if row['identical'] else 'NON'} |")
+
+    labels = list(rows)
+    print("\n| Requête | " + " | ".join(f"{label} (ms)" for label in labels) + " |")
+    print("| :--- |" + " :--- |" * len(labels))
+    for _, name, *_ in QUERIES:
+        print(f"| {name} | " + " | ".join(f"{rows[label]['avg_ms'][name]:.2f}" for label in labels) + " |")
+
+
+if __name__ == '__main__':
+    main()
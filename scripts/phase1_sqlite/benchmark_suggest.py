@@ -0,0 +1,70 @@
+"""
+Benchmark de l'autocomplétion (movies/suggest.py) : latence par frappe de
+l'index de préfixes en mémoire mappée, comparée à une recherche SQLite
+LIKE 'préfixe%' sur les titres et les noms triée par votes.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.suggest import PrefixIndex, build_prefix_index, has_prefix_index
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+SUGGEST_DIR = os.path.join(os.path.dirname(__file__), '../../data/suggest/')
+NUM_RUNS = 200
+# Saisie lettre par lettre : chaque préfixe est une requête
+TYPED = ["godfather", "star wars", "fantomas", "amelie"]
+
+SQL_SUGGEST = """
+    SELECT * FROM (
+        SELECT m.primaryTitle AS label, COALESCE(r.numVotes, 0) AS votes
+        FROM Movie m LEFT JOIN Rating r ON r.movie_id = m.movie_id
+        WHERE m.primaryTitle LIKE ? || '%'
+        UNION ALL
+        SELECT primaryName, 0 FROM Person WHERE primaryName LIKE ? || '%'
+    )
+    ORDER BY votes DESC
+    LIMIT 10
+"""
+
+
+def time_us(func, *args, runs=NUM_RUNS):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func(*args)
+    return (time.perf_counter() - start) / runs * 1e6, result
+
+
+def main():
+    if not has_prefix_index(SUGGEST_DIR):
+        start = time.perf_counter()
+        build_prefix_index(DB_FILE, SUGGEST_DIR)
+        print(f"Index construit en {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    index = PrefixIndex.load(SUGGEST_DIR)
+    print(f"--- Index chargé (mmap) en {(time.perf_counter() - start) * 1000:.2f} ms : "
+          f"{len(index):,} clés, {len(index.heavy):,} préfixes précalculés ---")
+
+    conn = sqlite3.connect(DB_FILE)
+    print("\n| Saisie | Index moyen (µs) | Index max (µs) | SQLite LIKE moyen (µs) | 1re suggestion |")
+    print("| :--- | :--- | :--- | :--- | :--- |")
+    for word in TYPED:
+        prefixes = [word[:i] for i in range(1, len(word) + 1)]
+        index_times = [time_us(index.suggest, p)[0] for p in prefixes]
+        sql_times = [time_us(lambda p: conn.execute(SQL_SUGGEST, (p, p)).fetchall(), p, runs=5)[0]
+                     for p in prefixes]
+        first = index.suggest(word, 1)
+        print(f"| {word} | {sum(index_times) / len(index_times):,.0f} | {max(index_times):,.0f} | "
+              f"{sum(sql_times) / len(sql_times):,.0f} | {first[0]['label'] if first else '-'} |")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,11 @@
 
 import sqlite3
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.rating_history import copy_history
 
 
 DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
@@ -134,20 +139,35 @@ def create_tables(conn):
     except sqlite3.Error as e:
         print(f"Erreur lors de la création des tables: {e}")
 
+def reset_database(db_file):
+    """
+    Recrée db_file avec un schéma vide. L'historique des notes (RatingHistory,
+    RatingSnapshot) est recopié de l'ancienne base : il s'accumule d'un import à
+    l'autre et ne peut pas être reconstruit depuis les CSV.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+    new_file = f"{db_file}.new"
+    if os.path.exists(new_file):
+        os.remove(new_file)
+    conn = create_connection(new_file)
+    if conn is None:
+        return
+    create_tables(conn)
+    if os.path.exists(db_file):
+        kept = copy_history(conn, db_file)
+        conn.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_file + suffix):
+                os.remove(db_file + suffix)
+        print(f"Ancienne base de données supprimée: {db_file} ({kept} instantanés de notes conservés)")
+    else:
+        conn.close()
+    os.replace(new_file, db_file)
+
+
 def main():
     """Fonction principale pour créer la base de données et les tables."""
-   
-    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
-    
-    
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
-        print(f"Ancienne base de données supprimée: {DB_FILE}")
-
-    conn = create_connection(DB_FILE)
-    if conn is not None:
-        create_tables(conn)
-        conn.close()
+    reset_database(DB_FILE)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
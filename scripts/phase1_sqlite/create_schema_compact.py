@@ -0,0 +1,384 @@
+"""
+Variante compacte du schéma SQLite.
+
+- Clés INTEGER dérivées de la partie numérique des identifiants IMDb
+  (tt0002130 -> 2130, nm0655824 -> 655824) au lieu de clés TEXT répétées
+  dans toutes les tables de liaison.
+- Tables de liaison en WITHOUT ROWID (la clé primaire composée EST la table,
+  sans index automatique qui la duplique).
+- Petits codes entiers pour les genres, catégories, professions et titleType
+  (tables *Code), au lieu de répéter les chaînes à chaque ligne.
+- originalTitle stocké à NULL quand il est identique à primaryTitle.
+- Rating reste une vraie table à clé TEXT (en WITHOUT ROWID) : elle est l'opérande
+  droit de LEFT JOIN (Q1, Q6, select_related Django) et SQLite n'utilise pas
+  d'index d'expression à travers une vue dans cette position.
+
+Une couche de vues porte les noms du schéma d'origine (Movie, Person,
+MovieGenre, ...) et reconstitue les identifiants TEXT : queries.py et les
+modèles Django fonctionnent sans modification sur la base compacte. Des index
+sur expression (printf('tt%07d', ...)) permettent aux jointures de ces vues
+d'utiliser un index ; ils ne sont utiles qu'à la couche de compatibilité.
+
+Compromis : la base est plus petite (37,0 -> 22,3 Mo sur la base d'exemple,
+-40 %), mais les requêtes passent par les vues, qui recalculent les
+identifiants TEXT à chaque ligne. Mesuré par python cli.py benchmark compact
+(base d'exemple, SQLite 3.40.1), en ms, origine -> compact :
+    - plus lentes : Q3 9 -> 82, Q5 83 -> 136, Q1 86 -> 129 ;
+      Q7, Q8 et Q9 de 5 à 20 % (314 -> 330, 407 -> 498, 270 -> 310) ;
+    - plus rapides grâce aux clés entières : Q4 74 -> 3, Q6 82 -> 4, Q2 12 -> 8.
+Les résultats de Q1 à Q9 sont identiques sur les deux bases.
+
+Avant SQLite 3.41 (MIN_SQLITE_VERSION), l'ancienne Q8 renvoyait des lignes
+fausses à travers ces vues (filtre de Bloom sur index d'expression) ; la
+requête actuelle (movies/breakout.py) donne les mêmes résultats en 3.40.1.
+La construction avertit seulement sur ces versions : le benchmark compare les
+résultats requête par requête.
+
+Usage : python create_schema_compact.py  (lit data/imdb.db, écrit data/imdb_compact.db)
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.leaderboard import build_leaderboard
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+COMPACT_DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb_compact.db')
+MIN_SQLITE_VERSION = (3, 41, 0)
+
+
+def movie_text(column):
+    """Expression SQL qui reconstitue l'identifiant 'tt...' depuis la clé entière."""
+    return f"printf('tt%07d', {column})"
+
+
+def person_text(column):
+    return f"printf('nm%07d', {column})"
+
+
+def key_of(column):
+    """Expression SQL : partie numérique d'un identifiant IMDb TEXT."""
+    return f"CAST(substr({column}, 3) AS INTEGER)"
+
+
+CODE_TABLES = {
+    # table de codes : (table source, colonne source)
+    'TitleTypeCode': ('Movie', 'titleType'),
+    'GenreCode': ('MovieGenre', 'genre_name'),
+    'CategoryCode': ('MoviePrincipal', 'category'),
+    'ProfessionCode': ('PersonProfession', 'job_name'),
+}
+
+COMPACT_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS Person_c (
+        person_key INTEGER PRIMARY KEY,
+        primaryName TEXT NOT NULL,
+        birthYear INTEGER,
+        deathYear INTEGER
+    );
+    """,
+    # originalTitle est NULL lorsqu'il est identique à primaryTitle
+    """
+    CREATE TABLE IF NOT EXISTS Movie_c (
+        movie_key INTEGER PRIMARY KEY,
+        title_type INTEGER REFERENCES TitleTypeCode (code),
+        primaryTitle TEXT NOT NULL,
+        originalTitle TEXT,
+        isAdult INTEGER,
+        startYear INTEGER,
+        endYear INTEGER,
+        runtimeMinutes INTEGER
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Rating (
+        movie_id TEXT PRIMARY KEY,
+        averageRating REAL,
+        numVotes INTEGER
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS TitleAlias_c (
+        movie_key INTEGER NOT NULL,
+        ordering INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        region TEXT,
+        language TEXT,
+        types TEXT,
+        attributes TEXT,
+        isOriginalTitle INTEGER,
+        PRIMARY KEY (movie_key, ordering, title)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS MovieGenre_c (
+        movie_key INTEGER NOT NULL,
+        genre INTEGER NOT NULL REFERENCES GenreCode (code),
+        PRIMARY KEY (movie_key, genre)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS PersonProfession_c (
+        person_key INTEGER NOT NULL,
+        profession INTEGER NOT NULL REFERENCES ProfessionCode (code),
+        PRIMARY KEY (person_key, profession)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS MoviePrincipal_c (
+        movie_key INTEGER NOT NULL,
+        person_key INTEGER NOT NULL,
+        ordering INTEGER NOT NULL,
+        category INTEGER REFERENCES CategoryCode (code),
+        job TEXT,
+        PRIMARY KEY (movie_key, person_key, ordering)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS MovieWriter_c (
+        movie_key INTEGER NOT NULL,
+        person_key INTEGER NOT NULL,
+        PRIMARY KEY (movie_key, person_key)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Character_c (
+        movie_key INTEGER NOT NULL,
+        person_key INTEGER NOT NULL,
+        character_name TEXT NOT NULL,
+        PRIMARY KEY (movie_key, person_key, character_name)
+    ) WITHOUT ROWID;
+    """,
+]
+
+# Vues de compatibilité : mêmes noms et colonnes que create_schema.py
+COMPAT_VIEWS = [
+    f"""
+    CREATE VIEW IF NOT EXISTS Person AS
+    SELECT {person_text('p.person_key')} AS person_id, p.primaryName, p.birthYear, p.deathYear
+    FROM Person_c p;
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS Movie AS
+    SELECT {movie_text('m.movie_key')} AS movie_id, t.name AS titleType, m.primaryTitle,
+           COALESCE(m.originalTitle, m.primaryTitle) AS originalTitle,
+           m.isAdult, m.startYear, m.endYear, m.runtimeMinutes
+    FROM Movie_c m
+    LEFT JOIN TitleTypeCode t ON t.code = m.title_type;
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS Genre AS
+    SELECT name AS genre_name FROM GenreCode;
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS Profession AS
+    SELECT name AS job_name FROM ProfessionCode;
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS TitleAlias AS
+    SELECT {movie_text('ta.movie_key')} AS movie_id, ta.ordering, ta.title, ta.region, ta.language,
+           ta.types, ta.attributes, ta.isOriginalTitle
+    FROM TitleAlias_c ta;
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS MovieGenre AS
+    SELECT {movie_text('mg.movie_key')} AS movie_id, g.name AS genre_name
+    FROM MovieGenre_c mg
+    JOIN GenreCode g ON g.code = mg.genre;
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS PersonProfession AS
+    SELECT {person_text('pp.person_key')} AS person_id, p.name AS job_name
+    FROM PersonProfession_c pp
+    JOIN ProfessionCode p ON p.code = pp.profession;
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS MoviePrincipal AS
+    SELECT {movie_text('mp.movie_key')} AS movie_id, {person_text('mp.person_key')} AS person_id,
+           mp.ordering, c.name AS category, mp.job
+    FROM MoviePrincipal_c mp
+    LEFT JOIN CategoryCode c ON c.code = mp.category;
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS MovieWriter AS
+    SELECT {movie_text('mw.movie_key')} AS movie_id, {person_text('mw.person_key')} AS person_id
+    FROM MovieWriter_c mw;
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS Character AS
+    SELECT {movie_text('ch.movie_key')} AS movie_id, {person_text('ch.person_key')} AS person_id,
+           ch.character_name
+    FROM Character_c ch;
+    """,
+]
+
+# Équivalents de create_indexes.sql sur les clés entières
+COMPACT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_c_person_name ON Person_c (primaryName);",
+    "CREATE INDEX IF NOT EXISTS idx_c_principal_person_cat ON MoviePrincipal_c (person_key, category);",
+    "CREATE INDEX IF NOT EXISTS idx_c_genre_movie ON MovieGenre_c (genre, movie_key);",
+    "CREATE INDEX IF NOT EXISTS idx_c_titlealias_title ON TitleAlias_c (title);",
+    "CREATE INDEX IF NOT EXISTS idx_rating_ranking ON Rating (averageRating DESC, numVotes DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_rating_numvotes ON Rating (numVotes);",
+    "CREATE INDEX IF NOT EXISTS idx_c_movie_startyear ON Movie_c (startYear);",
+]
+
+# Index sur expression pour les jointures TEXT des vues de compatibilité
+COMPAT_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_compat_movie_id ON Movie_c ({movie_text('movie_key')});",
+    f"CREATE INDEX IF NOT EXISTS idx_compat_person_id ON Person_c ({person_text('person_key')});",
+    f"CREATE INDEX IF NOT EXISTS idx_compat_genre_movie ON MovieGenre_c ({movie_text('movie_key')});",
+    f"CREATE INDEX IF NOT EXISTS idx_compat_principal_movie ON MoviePrincipal_c ({movie_text('movie_key')});",
+    f"CREATE INDEX IF NOT EXISTS idx_compat_principal_person ON MoviePrincipal_c ({person_text('person_key')});",
+]
+
+
+def create_connection(db_file):
+    """Crée une connexion à la base de données SQLite spécifiée par db_file."""
+    try:
+        return sqlite3.connect(db_file)
+    except sqlite3.Error as e:
+        print(f"Erreur de connexion à SQLite: {e}")
+        return None
+
+
+def create_compact_schema(conn):
+    """Crée les tables de codes, les tables compactes, leurs index et les vues."""
+    cursor = conn.cursor()
+    for table in CODE_TABLES:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (code INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);")
+    for statement in COMPACT_TABLES + COMPACT_INDEXES + COMPAT_INDEXES + COMPAT_VIEWS:
+        cursor.execute(statement)
+    conn.commit()
+
+
+def _source_tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM src.sqlite_master WHERE type='table'")}
+
+
+def copy_from_source(conn, source_db):
+    """
+    Remplit la base compacte depuis une base au schéma d'origine.
+    Les identifiants qui ne se reconstituent pas à l'identique (ex: 'tt' mal formé)
+    sont ignorés et comptés.
+
+    Returns:
+        dict {table: lignes copiées}
+    """
+    conn.execute("ATTACH DATABASE ? AS src", (source_db,))
+    tables = _source_tables(conn)
+    stats = {}
+
+    for code_table, (source_table, column) in CODE_TABLES.items():
+        if source_table in tables:
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {code_table} (name)
+                SELECT DISTINCT {column} FROM src.{source_table} WHERE {column} IS NOT NULL ORDER BY {column}
+            """)
+
+    def movie_ok(column):
+        return f"{movie_text(key_of(column))} = {column}"
+
+    def person_ok(column):
+        return f"{person_text(key_of(column))} = {column}"
+
+    copies = {
+        'Person_c': ('Person', f"""
+            INSERT OR IGNORE INTO Person_c
+            SELECT {key_of('person_id')}, primaryName, birthYear, deathYear
+            FROM src.Person WHERE {person_ok('person_id')}"""),
+        'Movie_c': ('Movie', f"""
+            INSERT OR IGNORE INTO Movie_c
+            SELECT {key_of('m.movie_id')}, t.code, m.primaryTitle,
+                   NULLIF(m.originalTitle, m.primaryTitle), m.isAdult, m.startYear, m.endYear, m.runtimeMinutes
+            FROM src.Movie m LEFT JOIN TitleTypeCode t ON t.name = m.titleType
+            WHERE {movie_ok('m.movie_id')}"""),
+        'Rating': ('Rating', """
+            INSERT OR IGNORE INTO Rating
+            SELECT movie_id, averageRating, numVotes FROM src.Rating"""),
+        'TitleAlias_c': ('TitleAlias', f"""
+            INSERT OR IGNORE INTO TitleAlias_c
+            SELECT {key_of('movie_id')}, ordering, title, region, language, types, attributes, isOriginalTitle
+            FROM src.TitleAlias WHERE {movie_ok('movie_id')}"""),
+        'MovieGenre_c': ('MovieGenre', f"""
+            INSERT OR IGNORE INTO MovieGenre_c
+            SELECT {key_of('mg.movie_id')}, g.code
+            FROM src.MovieGenre mg JOIN GenreCode g ON g.name = mg.genre_name
+            WHERE {movie_ok('mg.movie_id')}"""),
+        'PersonProfession_c': ('PersonProfession', f"""
+            INSERT OR IGNORE INTO PersonProfession_c
+            SELECT {key_of('pp.person_id')}, p.code
+            FROM src.PersonProfession pp JOIN ProfessionCode p ON p.name = pp.job_name
+            WHERE {person_ok('pp.person_id')}"""),
+        'MoviePrincipal_c': ('MoviePrincipal', f"""
+            INSERT OR IGNORE INTO MoviePrincipal_c
+            SELECT {key_of('mp.movie_id')}, {key_of('mp.person_id')}, mp.ordering, c.code, mp.job
+            FROM src.MoviePrincipal mp LEFT JOIN CategoryCode c ON c.name = mp.category
+            WHERE {movie_ok('mp.movie_id')} AND {person_ok('mp.person_id')}"""),
+        'MovieWriter_c': ('MovieWriter', f"""
+            INSERT OR IGNORE INTO MovieWriter_c
+            SELECT {key_of('movie_id')}, {key_of('person_id')}
+            FROM src.MovieWriter WHERE {movie_ok('movie_id')} AND {person_ok('person_id')}"""),
+        'Character_c': ('Character', f"""
+            INSERT OR IGNORE INTO Character_c
+            SELECT {key_of('movie_id')}, {key_of('person_id')}, character_name
+            FROM src.Character WHERE {movie_ok('movie_id')} AND {person_ok('person_id')}"""),
+    }
+
+    for compact_table, (source_table, sql) in copies.items():
+        if source_table not in tables:
+            stats[compact_table] = 0
+            continue
+        source_count = conn.execute(f"SELECT COUNT(*) FROM src.{source_table}").fetchone()[0]
+        copied = conn.execute(sql).rowcount
+        stats[compact_table] = copied
+        if copied != source_count:
+            print(f" {source_table} : {source_count - copied:,} lignes ignorées (identifiant non reconstituable ou doublon)")
+
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.execute("ANALYZE")
+    return stats
+
+
+def main():
+    """Construit data/imdb_compact.db à partir de data/imdb.db."""
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        print(f"Attention : SQLite {sqlite3.sqlite_version} a renvoyé des résultats faux à travers les vues "
+              f"(ancienne Q8) ; vérifier la colonne « Résultats identiques » de python cli.py benchmark compact")
+    if not os.path.exists(DB_FILE):
+        print(f"Base source introuvable : {DB_FILE}")
+        return
+
+    if os.path.exists(COMPACT_DB_FILE):
+        os.remove(COMPACT_DB_FILE)
+        print(f"Ancienne base compacte supprimée: {COMPACT_DB_FILE}")
+
+    conn = create_connection(COMPACT_DB_FILE)
+    if conn is None:
+        return
+
+    start_time = time.time()
+    create_compact_schema(conn)
+    stats = copy_from_source(conn, os.path.abspath(DB_FILE))
+    stats['Leaderboard'] = build_leaderboard(conn)['rows']
+    conn.execute("VACUUM")
+    conn.close()
+
+    print("\n--- SCHÉMA COMPACT ---")
+    for table, count in stats.items():
+        print(f"Table {table:<20}: {count:,} lignes")
+    print(f"Temps de construction : {time.time() - start_time:.2f} secondes.")
+    print(f"Taille : {os.path.getsize(DB_FILE) / 1e6:.1f} Mo -> {os.path.getsize(COMPACT_DB_FILE) / 1e6:.1f} Mo")
+    print("Requêtes via les vues de compatibilité : Q1, Q3 et Q5 plus lentes, Q2, Q4 et Q6 plus rapides "
+          "(voir benchmark compact)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Export de l'instantané colonnaire (data/snapshot/) : une table = un fichier
+Arrow IPC (mémoire mappée) + un fichier Parquet zstd, au schéma typé de
+movies/snapshot.py.
+
+    python export_snapshot.py                 # depuis les CSV bruts de data/csv/
+    python export_snapshot.py --source sqlite # depuis data/imdb.db (toutes les tables)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.snapshot import FORMATS, export_csv_snapshot, export_sqlite_snapshot, snapshot_path
+
+
+DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+CSV_DIR = os.path.join(os.path.dirname(__file__), '../../data/csv/')
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '../../data/snapshot/')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Arrow/Parquet des tables IMDb")
+    parser.add_argument('--source', choices=('csv', 'sqlite'), default='csv')
+    parser.add_argument('--format', choices=FORMATS, action='append', dest='formats',
+                        help="format(s) à écrire (défaut : arrow et parquet)")
+    args = parser.parse_args()
+    formats = tuple(args.formats or FORMATS)
+
+    start = time.time()
+    if args.source == 'csv':
+        stats = export_csv_snapshot(CSV_DIR, SNAPSHOT_DIR, formats)
+    else:
+        stats = export_sqlite_snapshot(DB_FILE, SNAPSHOT_DIR, formats)
+
+    print(f"\n| Table | Lignes | {' | '.join(f'{fmt} (Mo)' for fmt in formats)} |")
+    print(f"| :--- | :--- | {' | '.join(':---' for _ in formats)} |")
+    for table, rows in stats.items():
+        sizes = [os.path.getsize(snapshot_path(table, fmt, SNAPSHOT_DIR)) / 1e6 for fmt in formats]
+        print(f"| {table} | {rows:,} | {' | '.join(f'{s:.2f}' for s in sizes)} |")
+    print(f"\nInstantané écrit dans {os.path.abspath(SNAPSHOT_DIR)} en {time.time() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
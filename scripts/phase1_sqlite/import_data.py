@@ -1,12 +1,21 @@
 import sqlite3
 import pandas as pd
 import os
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.progress import ProgressReporter, SqliteCheckpoints
+from movies.snapshot import is_fresh, iter_dataframes, load_table
+from validation import QUARANTINE_DIR, TABLE_SPECS, ImportValidator
+
 
 DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
 CSV_DIR = os.path.join(os.path.dirname(__file__), '../../data/csv/')
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '../../data/snapshot/')
 CHUNK_SIZE = 10000
+CHECKPOINT_JOB = 'import_data'
 
 
 def create_connection(db_file):
@@ -20,38 +29,87 @@ def create_connection(db_file):
 
 
 
-def import_csv_to_db(conn, csv_filename, table_name, column_map, chunk_processor=None):
+def use_snapshot(full_path, table_name):
+    """
+    L'instantané est réexporté depuis SQLite après chaque import : il ne remplace
+    le CSV que s'il est plus récent que lui (un CSV modifié depuis est relu).
+    """
+    return is_fresh(table_name, [full_path], SNAPSHOT_DIR)
+
+
+def count_source_rows(full_path, table_name):
+    """Nombre de lignes de la source (pour l'ETA ; le CSV est compté sans être analysé)."""
+    if use_snapshot(full_path, table_name):
+        return load_table(table_name, SNAPSHOT_DIR).num_rows
+    with open(full_path, 'rb') as f:
+        return max(sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1, 0)
+
+
+def read_chunks(full_path, table_name, column_map, offset=0):
+    """
+    Lots pandas d'une table à partir de la ligne `offset` : depuis l'instantané
+    Arrow (data/snapshot/) s'il est à jour, déjà typé et renommé, sinon depuis le CSV brut.
+    """
+    if use_snapshot(full_path, table_name):
+        for chunk in iter_dataframes(table_name, CHUNK_SIZE, SNAPSHOT_DIR, offset):
+            yield chunk[list(column_map.values())]
+        return
+
+    messy_csv_cols = [f"('{col}',)" for col in column_map.keys()]
+    rename_map = {f"('{csv_name}',)": sql_name for csv_name, sql_name in column_map.items()}
+
+    for chunk in pd.read_csv(
+        full_path, 
+        chunksize=CHUNK_SIZE, 
+        usecols=messy_csv_cols, 
+        na_values=['\\N'],
+        skiprows=range(1, offset + 1)
+    ):
+        chunk = chunk.rename(columns=rename_map)
+        yield chunk.replace({'\\N': None, '': None})
+
+
+def upsert_rows(table, conn, keys, data_iter):
+    """Méthode to_sql des tables 'upsert' (Rating) : un réimport remplace les lignes existantes."""
+    columns, placeholders = ', '.join(keys), ', '.join('?' * len(keys))
+    conn.executemany(f"INSERT OR REPLACE INTO {table.name} ({columns}) VALUES ({placeholders})", list(data_iter))
+
+
+def import_csv_to_db(conn, csv_filename, table_name, column_map, chunk_processor=None, validator=None,
+                     checkpoints=None):
     """
     Lit un fichier CSV en mappant les noms de colonnes CSV (messy) aux noms SQL (clean).
     
     Args:
         column_map (dict): { 'Nom_dans_CSV': 'Nom_dans_SQL' }
+        validator (ImportValidator): si fourni, chaque lot est validé avant insertion
+            et les lignes invalides partent en quarantaine au lieu de faire échouer le lot
+        checkpoints (SqliteCheckpoints): si fourni, la position dans la source est
+            enregistrée après chaque lot et l'import reprend à cette position
     """
     full_path = os.path.join(CSV_DIR, csv_filename)
+    method = upsert_rows if TABLE_SPECS.get(table_name, {}).get('upsert') else None
     start_time = time.time()
     total_rows = 0
+    offset = 0
 
-    try:
-        
-        messy_csv_cols = [f"('{col}',)" for col in column_map.keys()]
-        
-        
-        rename_map = {f"('{csv_name}',)": sql_name for csv_name, sql_name in column_map.items()}
+    state = checkpoints.get(CHECKPOINT_JOB, table_name) if checkpoints else None
+    if state is not None:
+        if state['finished']:
+            print(f" {table_name} déjà importée ({state['rows_done']:,} lignes) : étape sautée")
+            return state['rows_done']
+        offset, total_rows = int(state['last_key']), state['rows_done']
+        print(f" Reprise de {table_name} à la ligne {offset:,} de {csv_filename}")
 
+    try:
+        progress = ProgressReporter(table_name, total=count_source_rows(full_path, table_name), done=offset)
         
-        for chunk in pd.read_csv(
-            full_path, 
-            chunksize=CHUNK_SIZE, 
-            usecols=messy_csv_cols, 
-            na_values=['\\N']
-        ):
-            
+        for chunk in read_chunks(full_path, table_name, column_map, offset):
             
-            chunk = chunk.rename(columns=rename_map)
-            
-            
-            chunk = chunk.replace({'\\N': None, '': None})
+            offset += len(chunk)
             
+            if validator:
+                chunk = validator.validate(table_name, chunk)
             
             if chunk_processor:
                 chunk = chunk_processor(chunk)
@@ -61,12 +119,21 @@ def import_csv_to_db(conn, csv_filename, table_name, column_map, chunk_processor
             
            
             try:
-                chunk.to_sql(table_name, conn, if_exists='append', index=False)
+                chunk.to_sql(table_name, conn, if_exists='append', index=False, method=method)
                 total_rows += len(chunk)
             except sqlite3.Error as e:
                 
                 print(f"Erreur d'insertion dans {table_name} pour le chunk de {len(chunk)} lignes: {e}")
+            
+            # Un plantage entre to_sql et ce point fait relire le lot : ses lignes
+            # déjà insérées sont alors écartées par le dédoublonnage du validateur
+            if checkpoints:
+                checkpoints.save(CHECKPOINT_JOB, table_name, offset, total_rows)
+            progress.advance(offset - progress.done)
 
+        progress.close()
+        if checkpoints:
+            checkpoints.save(CHECKPOINT_JOB, table_name, offset, total_rows, finished=True)
         end_time = time.time()
         print(f" Importation de {csv_filename} vers {table_name} terminée. Lignes: {total_rows:,}. Temps: {end_time - start_time:.2f}s")
         return total_rows
@@ -104,60 +171,98 @@ def process_person_professions(df):
 
 
 
-def main():
-    """Fonction principale pour importer toutes les données."""
-    conn = create_connection(DB_FILE)
-    if conn is None:
-        return
+def prepare_import(conn, quarantine_dir=QUARANTINE_DIR):
+    """
+    Points de reprise et validateur d'un import (quarantaine conservée en cas de reprise).
+    Il ne reste des points de reprise qu'après un import interrompu : import_all
+    les efface quand toutes les tables sont terminées.
+    """
+    checkpoints = SqliteCheckpoints(conn)
+    resuming = conn.execute(f"SELECT COUNT(*) FROM {SqliteCheckpoints.TABLE}").fetchone()[0] > 0
+    if resuming:
+        print("Points de reprise trouvés : les tables terminées sont sautées, les autres reprennent.")
+    return checkpoints, ImportValidator(conn, quarantine_dir, reset=not resuming)
 
-    print("Début de l'importation des données...")
-    start_global_time = time.time()
-    
+
+def import_all(conn, validator=None, checkpoints=None):
+    """
+    Importe toutes les tables sur une connexion ouverte. Retourne {table: lignes insérées}.
+    Les points de reprise sont effacés si aucune table n'est restée en cours
+    (terminée, ou fichier source absent) : le prochain import relit les CSV au
+    lieu de sauter chaque table.
+    """
     stats = {}
     
     
     stats['Person'] = import_csv_to_db(conn, 'persons.csv', 'Person', 
-        {'pid': 'person_id', 'primaryName': 'primaryName', 'birthYear': 'birthYear', 'deathYear': 'deathYear'}
+        {'pid': 'person_id', 'primaryName': 'primaryName', 'birthYear': 'birthYear', 'deathYear': 'deathYear'}, validator=validator, checkpoints=checkpoints
     )
     stats['Movie'] = import_csv_to_db(conn, 'movies.csv', 'Movie', 
         {'mid': 'movie_id', 'titleType': 'titleType', 'primaryTitle': 'primaryTitle', 'originalTitle': 'originalTitle', 
-         'isAdult': 'isAdult', 'startYear': 'startYear', 'endYear': 'endYear', 'runtimeMinutes': 'runtimeMinutes'}
+         'isAdult': 'isAdult', 'startYear': 'startYear', 'endYear': 'endYear', 'runtimeMinutes': 'runtimeMinutes'}, validator=validator, checkpoints=checkpoints
     )
     
     
     stats['Rating'] = import_csv_to_db(conn, 'ratings.csv', 'Rating', 
-        {'mid': 'movie_id', 'averageRating': 'averageRating', 'numVotes': 'numVotes'}
+        {'mid': 'movie_id', 'averageRating': 'averageRating', 'numVotes': 'numVotes'}, validator=validator, checkpoints=checkpoints
     )
     stats['TitleAlias'] = import_csv_to_db(conn, 'titles.csv', 'TitleAlias', 
         {'mid': 'movie_id', 'ordering': 'ordering', 'title': 'title', 'region': 'region', 'language': 'language', 
-         'types': 'types', 'attributes': 'attributes', 'isOriginalTitle': 'isOriginalTitle'}
+         'types': 'types', 'attributes': 'attributes', 'isOriginalTitle': 'isOriginalTitle'}, validator=validator, checkpoints=checkpoints
     )
     
     
     stats['MovieGenre'] = import_csv_to_db(conn, 'genres.csv', 'MovieGenre', 
-        {'mid': 'movie_id', 'genre': 'genre_name'}, process_movie_genres 
+        {'mid': 'movie_id', 'genre': 'genre_name'}, process_movie_genres, validator=validator, checkpoints=checkpoints
     ) 
     stats['PersonProfession'] = import_csv_to_db(conn, 'professions.csv', 'PersonProfession', 
-        {'pid': 'person_id', 'jobName': 'job_name'}, process_person_professions
+        {'pid': 'person_id', 'jobName': 'job_name'}, process_person_professions, validator=validator, checkpoints=checkpoints
     ) 
     
     
     stats['MoviePrincipal'] = import_csv_to_db(conn, 'principals.csv', 'MoviePrincipal', 
-        {'mid': 'movie_id', 'ordering': 'ordering', 'pid': 'person_id', 'category': 'category', 'job': 'job'}
+        {'mid': 'movie_id', 'ordering': 'ordering', 'pid': 'person_id', 'category': 'category', 'job': 'job'}, validator=validator, checkpoints=checkpoints
     )
     stats['MovieWriter'] = import_csv_to_db(conn, 'writers.csv', 'MovieWriter', 
-        {'mid': 'movie_id', 'pid': 'person_id'}
+        {'mid': 'movie_id', 'pid': 'person_id'}, validator=validator, checkpoints=checkpoints
     )
+    if checkpoints and all((checkpoints.get(CHECKPOINT_JOB, table) or {'finished': True})['finished']
+                           for table in stats):
+        checkpoints.clear(CHECKPOINT_JOB)
+    return stats
+
+
+def print_import_stats(stats, validator):
+    print("\n--- STATISTIQUES D'IMPORTATION ---")
+    for table, count in stats.items():
+        print(f"Table {table:<18}: {count:,} lignes insérées")
+    print("-" * 37)
+    for table, count in validator.summary().items():
+        print(f"Table {table:<18}: {count:,} lignes en quarantaine ({validator.quarantine_path(table)})")
+
+
+def main():
+    """
+    Importe toutes les données. Les structures dérivées (classements, historique
+    des notes, graphe, index, instantané) sont construites par leurs étapes de
+    `python cli.py pipeline`, une seule fois par exécution.
+    """
+    conn = create_connection(DB_FILE)
+    if conn is None:
+        return
+
+    print("Début de l'importation des données...")
+    start_global_time = time.time()
+    checkpoints, validator = prepare_import(conn)
     
+    stats = import_all(conn, validator, checkpoints)
     conn.close()
     
     end_global_time = time.time()
     
-    print("\n--- STATISTIQUES D'IMPORTATION ---")
-    for table, count in stats.items():
-        print(f"Table {table:<18}: {count:,} lignes insérées")
-    print("-" * 37)
+    print_import_stats(stats, validator)
     print(f"Temps total d'importation : {end_global_time - start_global_time:.2f} secondes.")
+    print("Structures dérivées : python cli.py pipeline --from indexes")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,8 +1,19 @@
 import sqlite3
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.breakout import breakout_careers
+from movies.fuzzy import FuzzyIndex, has_fuzzy_index
+from movies.leaderboard import top_n
 
 
 DB_FILE = os.path.join(os.path.dirname(__file__), '../../data/imdb.db')
+FUZZY_DIR = os.path.join(os.path.dirname(__file__), '../../data/fuzzy/')
+
+# Index de trigrammes (movies/fuzzy.py) pour les noms de Q1/Q4/Q6 ; None = LIKE seul
+FUZZY_INDEX = None
 
 def create_connection(db_file):
     """Crée une connexion à la base de données SQLite."""
@@ -15,6 +26,25 @@ def create_connection(db_file):
         return None
 
 
+def actor_name_filter(conn, actor_name: str) -> tuple:
+    """
+    Nom saisi -> (condition sur primaryName, paramètre) pour Q1/Q4/Q6.
+    
+    Par défaut : ("LIKE ?", "%nom%"). Si aucun primaryName ne contient le nom saisi
+    et que FUZZY_INDEX est chargé, le nom est remplacé par la personne la plus proche
+    (accents, fautes de frappe : "fred astair" -> "Fred Astaire") et comparé
+    exactement ("= ?", via idx_person_name) : un nom résolu contenant % ou _
+    ne doit pas redevenir un motif LIKE.
+    """
+    like = ("LIKE ?", f'%{actor_name}%')
+    if FUZZY_INDEX is None:
+        return like
+    if conn.execute("SELECT 1 FROM Person WHERE primaryName LIKE ? LIMIT 1", (like[1],)).fetchone():
+        return like
+    names = FUZZY_INDEX.person_names(actor_name, limit=1)
+    return ("= ?", names[0]) if names else like
+
+
 def query_actor_filmography(conn, actor_name: str) -> list:
     """
     Retourne la filmographie d’un acteur donné.
@@ -34,7 +64,8 @@ def query_actor_filmography(conn, actor_name: str) -> list:
     WHERE pe.primaryName LIKE ? AND mp.category IN ('actor', 'actress')
     ORDER BY m.startYear DESC
     """
-    sql = """
+    name_condition, name_param = actor_name_filter(conn, actor_name)
+    sql = f"""
     SELECT 
         m.primaryTitle, 
         m.startYear, 
@@ -49,11 +80,11 @@ def query_actor_filmography(conn, actor_name: str) -> list:
     LEFT JOIN 
         Rating r ON m.movie_id = r.movie_id
     WHERE 
-        pe.primaryName LIKE ? AND mp.category IN ('actor', 'actress')
+        pe.primaryName {name_condition} AND mp.category IN ('actor', 'actress')
     ORDER BY 
         m.startYear DESC
     """
-    return conn.execute(sql, (f'%{actor_name}%',)).fetchall()
+    return conn.execute(sql, (name_param,)).fetchall()
 
 
 
@@ -103,6 +134,19 @@ def query_top_n_films(conn, genre: str, start_year: int, end_year: int, n: int)
     return conn.execute(sql, (genre, start_year, end_year, n)).fetchall()
 
 
+def query_top_n_films_leaderboard(conn, genre: str, start_year: int, end_year: int, n: int) -> list:
+    """
+    Variante de Q2 servie par le classement précalculé (movies/leaderboard.py) :
+    fusion des listes Top K par décennie au lieu du tri de la jointure complète.
+    Le classement suit le score bayésien (note pondérée par le nombre de votes),
+    pas la note brute.
+    
+    Returns:
+        Liste de tuples (titre, année, note, votes)
+    """
+    return [tuple(row[1:5]) for row in top_n(conn, n, genre, start_year, end_year)]
+
+
 def query_multi_role_actors(conn) -> list:
     """
     Acteurs ayant joué plusieurs personnages dans un même film, triés par nombre de rôles.
@@ -167,9 +211,10 @@ def query_collaborations(conn, actor_name: str) -> list:
     GROUP BY 
         director_name
     ORDER BY 
-        collaboration_count DESC;
+        collaboration_count DESC, director_name;
     """
-    sql = """
+    name_condition, name_param = actor_name_filter(conn, actor_name)
+    sql = f"""
     SELECT 
         d.primaryName AS director_name, 
         COUNT(m.movie_id) AS collaboration_count
@@ -183,15 +228,52 @@ def query_collaborations(conn, actor_name: str) -> list:
         m.movie_id IN (
             SELECT movie_id FROM MoviePrincipal mp_a
             JOIN Person pa ON mp_a.person_id = pa.person_id
-            WHERE pa.primaryName LIKE ? AND mp_a.category IN ('actor', 'actress')
+            WHERE pa.primaryName {name_condition} AND mp_a.category IN ('actor', 'actress')
         )
     GROUP BY 
         director_name
     ORDER BY 
-        collaboration_count DESC
+        collaboration_count DESC, director_name
     LIMIT 10;
     """
-    return conn.execute(sql, (f'%{actor_name}%',)).fetchall()
+    return conn.execute(sql, (name_param,)).fetchall()
+
+
+def query_collaborations_graph(conn, graph, actor_name: str) -> list:
+    """
+    Variante de Q4 servie par le graphe de collaborations en mémoire
+    (movies/collab_graph.py) : SQLite ne sert plus qu'à résoudre les noms.
+    Mêmes résultats que query_collaborations : films réalisés par l'acteur
+    compris, égalités départagées par nom.
+    
+    Args:
+        conn: Connexion SQLite
+        graph: CollaborationGraph chargé (voir CollaborationGraph.load)
+        actor_name: Nom de l'acteur (recherche LIKE, comme Q4)
+    Returns:
+        Liste de tuples (director_name, collaboration_count)
+    """
+    name_condition, name_param = actor_name_filter(conn, actor_name)
+    person_ids = [row[0] for row in conn.execute(
+        f"SELECT person_id FROM Person WHERE primaryName {name_condition}", (name_param,)
+    )]
+    top = graph.top_collaborators(person_ids, k=None)
+    if not top:
+        return []
+
+    placeholders = ",".join("?" * len(top))
+    names = dict(conn.execute(
+        f"SELECT person_id, primaryName FROM Person WHERE person_id IN ({placeholders})",
+        [director_id for director_id, _ in top],
+    ).fetchall())
+
+    # Même regroupement par nom que la version SQL
+    counts = {}
+    for director_id, count in top:
+        name = names.get(director_id)
+        if name is not None:
+            counts[name] = counts.get(name, 0) + count
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:10]
 
 
 
@@ -253,7 +335,8 @@ def query_career_evolution(conn, actor_name: str) -> list:
     GROUP BY decade
     ORDER BY decade;
     """
-    sql = """
+    name_condition, name_param = actor_name_filter(conn, actor_name)
+    sql = f"""
     WITH ActorFilms AS (
         SELECT 
             m.movie_id, 
@@ -268,7 +351,7 @@ def query_career_evolution(conn, actor_name: str) -> list:
         LEFT JOIN 
             Rating r ON m.movie_id = r.movie_id
         WHERE 
-            pe.primaryName LIKE ? AND mp.category IN ('actor', 'actress')
+            pe.primaryName {name_condition} AND mp.category IN ('actor', 'actress')
     )
     SELECT 
         -- Calcul de la décennie : 1987 -> 198, * 10 = 1980
@@ -281,7 +364,7 @@ def query_career_evolution(conn, actor_name: str) -> list:
     GROUP BY decade
     ORDER BY decade;
     """
-    return conn.execute(sql, (f'%{actor_name}%',)).fetchall()
+    return conn.execute(sql, (name_param,)).fetchall()
 
 
 def query_genre_ranking(conn) -> list:
@@ -325,54 +408,21 @@ def query_genre_ranking(conn) -> list:
 
 
 
-def query_breakout_career(conn) -> list:
+def query_breakout_career(conn, limit: int = 10) -> list:
     """
-    Personnes ayant percé grâce à un film : (avant : films < 200k votes, après : films > 200k votes).
-    
-    Note: SQLite n'a pas de CTE récursif. On utilise une simple jointure sur la Personne ayant
-    un rôle dans les deux catégories de films (populaires et non populaires).
-    
-    SQL utilisé:
-    SELECT DISTINCT 
-        pe.primaryName
-    FROM 
-        Person pe
-    JOIN 
-        MoviePrincipal mp_low ON pe.person_id = mp_low.person_id
-    JOIN 
-        Rating r_low ON mp_low.movie_id = r_low.movie_id
-    JOIN 
-        MoviePrincipal mp_high ON pe.person_id = mp_high.person_id
-    JOIN 
-        Rating r_high ON mp_high.movie_id = r_high.movie_id
-    WHERE 
-        r_low.numVotes < 200000 
-        AND r_high.numVotes > 200000 
-        AND mp_low.category IN ('actor', 'actress', 'director') 
-        AND mp_high.category IN ('actor', 'actress', 'director')
-    LIMIT 10;
-    """
-    sql = """
-    SELECT DISTINCT 
-        pe.primaryName
-    FROM 
-        Person pe
-    JOIN 
-        MoviePrincipal mp_low ON pe.person_id = mp_low.person_id
-    JOIN 
-        Rating r_low ON mp_low.movie_id = r_low.movie_id
-    JOIN 
-        MoviePrincipal mp_high ON pe.person_id = mp_high.person_id
-    JOIN 
-        Rating r_high ON mp_high.movie_id = r_high.movie_id
-    WHERE 
-        r_low.numVotes < 200000 
-        AND r_high.numVotes > 200000 
-        AND mp_low.category IN ('actor', 'actress', 'director') 
-        AND mp_high.category IN ('actor', 'actress', 'director')
-    LIMIT 10;
+    Personnes ayant percé grâce à un film : premier film (ordre chronologique)
+    à plus de 200k votes, précédé d'au moins 3 films des années antérieures,
+    tous sous le seuil. Classement par votes du film de la percée.
+
+    Détection vectorisée sur toute la base (movies/breakout.py) : crédits lus
+    par lots, triés par personne et année, segments traités en NumPy.
+    Référence SQL équivalente : breakout.reference_breakouts() (vérifiée par
+    benchmark_breakout.py).
+
+    Returns:
+        [(primaryName, primaryTitle, année, films avant, votes max avant, votes de la percée)]
     """
-    return conn.execute(sql).fetchall()
+    return breakout_careers(conn, limit)
 
 
 
@@ -435,8 +485,11 @@ def query_free_style(conn) -> list:
 
 
 def main():
+    global FUZZY_INDEX
     conn = create_connection(DB_FILE)
     if conn:
+        if has_fuzzy_index(FUZZY_DIR):
+            FUZZY_INDEX = FuzzyIndex.load(FUZZY_DIR)
         print("--- Début des tests des 9 requêtes ---")
         
         
@@ -456,6 +509,10 @@ def main():
         r = query_top_n_films(conn, GENRE, START_YEAR, END_YEAR, N)
         for row in r: print(f"- {row['primaryTitle']} ({row['startYear']}) | Note: {row['averageRating']}")
 
+        print(f"\n[Q2] Top {N} films '{GENRE}' de {START_YEAR}-{END_YEAR} (classement précalculé, score bayésien):")
+        r = query_top_n_films_leaderboard(conn, GENRE, START_YEAR, END_YEAR, N)
+        for title, year, rating, votes in r: print(f"- {title} ({year}) | Note: {rating} | Votes: {votes:,}")
+
         
         print("\n[Q3] Acteurs multi-rôles (Top 5):")
         r = query_multi_role_actors(conn)
@@ -494,7 +551,8 @@ def main():
         
         print("\n[Q8] Personnes ayant percé (Top 10):")
         r = query_breakout_career(conn)
-        for row in r: print(f"- {row['primaryName']}")
+        for name, title, year, low_films, prior_max, votes in r:
+            print(f"- {name} | {title} ({year}) : {votes:,} votes après {low_films} films (max {prior_max:,})")
         
         
         print("\n[Q9] Acteurs célèbres n'ayant jamais réalisé (Requête libre):")
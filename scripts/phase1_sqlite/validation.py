@@ -0,0 +1,205 @@
+"""
+Étape de validation en flux, appliquée à chaque lot avant l'insertion SQLite.
+
+Pour chaque table :
+    - conversion de type par colonne ('\\N', vide -> NULL ; année non numérique
+      -> ligne rejetée) ;
+    - colonnes obligatoires (NOT NULL du schéma) ;
+    - clés étrangères vérifiées contre les ensembles d'identifiants en mémoire
+      (Movie/Person déjà importés ou déjà présents dans la base) ;
+    - dédoublonnage de la clé primaire (dans le lot, entre lots et avec la base) ;
+      les tables 'upsert' (Rating) ne sont dédoublonnées qu'au sein de l'import :
+      une ligne déjà en base est remplacée (INSERT OR REPLACE dans import_data.py),
+      un réimport rafraîchit les notes.
+
+Les lignes rejetées sont écrites dans data/quarantine/<Table>.csv avec la
+raison du rejet : un lot n'est plus perdu en entier parce qu'une ligne fait
+échouer to_sql, et l'import se fait en une seule passe vectorisée.
+"""
+
+import csv
+import os
+
+import pandas as pd
+
+
+QUARANTINE_DIR = os.path.join(os.path.dirname(__file__), '../../data/quarantine/')
+
+# colonne -> type ('int', 'float', 'bool', 'text') ; obligatoires = NOT NULL de create_schema.py
+# upsert : lignes existantes remplacées au réimport (notes et votes changent d'un import à l'autre)
+TABLE_SPECS = {
+    'Person': {
+        'types': {'person_id': 'text', 'primaryName': 'text', 'birthYear': 'int', 'deathYear': 'int'},
+        'required': ['person_id', 'primaryName'],
+        'primary_key': ['person_id'],
+        'foreign_keys': {},
+    },
+    'Movie': {
+        'types': {'movie_id': 'text', 'titleType': 'text', 'primaryTitle': 'text', 'originalTitle': 'text',
+                  'isAdult': 'bool', 'startYear': 'int', 'endYear': 'int', 'runtimeMinutes': 'int'},
+        'required': ['movie_id', 'primaryTitle', 'originalTitle'],
+        'primary_key': ['movie_id'],
+        'foreign_keys': {},
+    },
+    'Rating': {
+        'types': {'movie_id': 'text', 'averageRating': 'float', 'numVotes': 'int'},
+        'required': ['movie_id'],
+        'primary_key': ['movie_id'],
+        'foreign_keys': {'movie_id': 'Movie'},
+        'upsert': True,
+    },
+    'TitleAlias': {
+        'types': {'movie_id': 'text', 'ordering': 'int', 'title': 'text', 'region': 'text', 'language': 'text',
+                  'types': 'text', 'attributes': 'text', 'isOriginalTitle': 'bool'},
+        'required': ['movie_id', 'ordering', 'title'],
+        'primary_key': ['movie_id', 'ordering', 'title'],
+        'foreign_keys': {'movie_id': 'Movie'},
+    },
+    'MovieGenre': {
+        'types': {'movie_id': 'text', 'genre_name': 'text'},
+        'required': ['movie_id', 'genre_name'],
+        'primary_key': ['movie_id', 'genre_name'],
+        'foreign_keys': {'movie_id': 'Movie'},
+    },
+    'PersonProfession': {
+        'types': {'person_id': 'text', 'job_name': 'text'},
+        'required': ['person_id', 'job_name'],
+        'primary_key': ['person_id', 'job_name'],
+        'foreign_keys': {'person_id': 'Person'},
+    },
+    'MoviePrincipal': {
+        'types': {'movie_id': 'text', 'ordering': 'int', 'person_id': 'text', 'category': 'text', 'job': 'text'},
+        'required': ['movie_id', 'person_id', 'ordering'],
+        'primary_key': ['movie_id', 'person_id', 'ordering'],
+        'foreign_keys': {'movie_id': 'Movie', 'person_id': 'Person'},
+    },
+    'MovieWriter': {
+        'types': {'movie_id': 'text', 'person_id': 'text'},
+        'required': ['movie_id', 'person_id'],
+        'primary_key': ['movie_id', 'person_id'],
+        'foreign_keys': {'movie_id': 'Movie', 'person_id': 'Person'},
+    },
+}
+
+# Table référencée -> colonne de ses identifiants
+REFERENCED_KEYS = {'Movie': 'movie_id', 'Person': 'person_id'}
+
+
+def _coerce(values, kind):
+    """Convertit une colonne ; retourne (valeurs converties, masque des valeurs invalides)."""
+    present = values.notna()
+    if kind == 'text':
+        return values, pd.Series(False, index=values.index)
+    if kind == 'bool':
+        mapped = values.astype(str).str.strip().str.lower().map(
+            {'0': 0, '1': 1, 'false': 0, 'true': 1, '0.0': 0, '1.0': 1})
+        return mapped.astype('Int64'), present & mapped.isna()
+    numbers = pd.to_numeric(values, errors='coerce')
+    invalid = present & numbers.isna()
+    if kind == 'int':
+        fractional = numbers.notna() & (numbers != numbers.round())
+        invalid |= fractional
+        numbers = numbers.where(~fractional).astype('Int64')
+    return numbers, invalid
+
+
+class ImportValidator:
+    """Valide les lots d'import et tient les ensembles d'identifiants/clés vus."""
+
+    def __init__(self, conn, quarantine_dir=QUARANTINE_DIR, reset=True):
+        self.conn = conn
+        self.quarantine_dir = quarantine_dir
+        self.known_ids = {}
+        self.seen_keys = {}
+        self.rejected = {}
+        os.makedirs(quarantine_dir, exist_ok=True)
+        # Import repris après un plantage (reset=False) : on complète la quarantaine existante
+        for table in TABLE_SPECS if reset else ():
+            path = self.quarantine_path(table)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def quarantine_path(self, table):
+        return os.path.join(self.quarantine_dir, f"{table}.csv")
+
+    def _existing(self, sql):
+        try:
+            return self.conn.execute(sql).fetchall()
+        except Exception:
+            return []
+
+    def _ids(self, table):
+        """Identifiants connus d'une table référencée (base existante + lignes validées)."""
+        if table not in self.known_ids:
+            column = REFERENCED_KEYS[table]
+            self.known_ids[table] = {row[0] for row in self._existing(f"SELECT {column} FROM {table}")}
+        return self.known_ids[table]
+
+    def _keys(self, table):
+        """Clés déjà vues : base existante + lignes validées (import seul pour une table upsert)."""
+        if table not in self.seen_keys:
+            if TABLE_SPECS[table].get('upsert'):
+                self.seen_keys[table] = set()
+            else:
+                columns = ', '.join(TABLE_SPECS[table]['primary_key'])
+                self.seen_keys[table] = set(self._existing(f"SELECT {columns} FROM {table}"))
+        return self.seen_keys[table]
+
+    def validate(self, table, chunk):
+        """Retourne le lot nettoyé ; les lignes rejetées partent en quarantaine."""
+        spec = TABLE_SPECS.get(table)
+        if spec is None:
+            return chunk
+
+        raw = chunk
+        chunk = chunk.copy()
+        reasons = pd.Series('', index=chunk.index, dtype=object)
+
+        def reject(mask, message):
+            if mask.any():
+                reasons[mask] += message[mask] if isinstance(message, pd.Series) else message
+
+        for column, kind in spec['types'].items():
+            if column not in chunk.columns:
+                continue
+            chunk[column], invalid = _coerce(chunk[column], kind)
+            reject(invalid, f"{column} invalide ('" + raw[column].astype(str) + "'); ")
+
+        for column in spec['required']:
+            if column in chunk.columns:
+                reject(chunk[column].isna(), f"{column} manquant; ")
+
+        for column, referenced in spec['foreign_keys'].items():
+            ids = self._ids(referenced)
+            # Table de référence vide (fichier source absent) : contrôle impossible
+            if column in chunk.columns and ids:
+                reject(chunk[column].notna() & ~chunk[column].map(ids.__contains__).astype(bool),
+                       f"{column} absent de {referenced} ('" + raw[column].astype(str) + "'); ")
+
+        primary_key = spec['primary_key']
+        valid = reasons == ''
+        keys = pd.Series(list(zip(*(chunk[c] for c in primary_key))), index=chunk.index)
+        seen = self._keys(table)
+        duplicate = pd.Series(False, index=chunk.index)
+        duplicate[valid] = keys[valid].duplicated() | keys[valid].map(seen.__contains__).astype(bool)
+        reject(duplicate, "clé primaire en double; ")
+
+        valid = reasons == ''
+        seen.update(keys[valid])
+        if table in REFERENCED_KEYS:
+            self._ids(table).update(chunk.loc[valid, REFERENCED_KEYS[table]])
+
+        if not valid.all():
+            self._quarantine(table, raw[~valid], reasons[~valid])
+        return chunk[valid]
+
+    def _quarantine(self, table, rows, reasons):
+        path = self.quarantine_path(table)
+        new_file = not os.path.exists(path)
+        rows = rows.assign(reason=reasons.str.rstrip('; '))
+        rows.to_csv(path, mode='a', header=new_file, index=False, quoting=csv.QUOTE_MINIMAL)
+        self.rejected[table] = self.rejected.get(table, 0) + len(rows)
+
+    def summary(self):
+        """{table: nombre de lignes en quarantaine}"""
+        return dict(self.rejected)
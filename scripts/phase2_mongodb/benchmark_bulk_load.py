@@ -0,0 +1,56 @@
+"""
+Benchmark des profils d'écriture (movies/bulk_load.py) : charge NUM_DOCS
+documents de movies_complete dans une base de test avec chaque profil (safe,
+balanced, fast) et rapporte ensemble le débit et le retard de réplication
+observé (max / moyen), ainsi que le temps passé en pause par le plafond de
+retard. Sur un Replica Set à un seul membre, le retard n'est pas mesurable.
+"""
+
+import os
+import sys
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.bulk_load import PROFILES, BulkLoader
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "cineexplorer_db"
+BENCH_DB = "cineexplorer_bulk"
+NUM_DOCS = 200000
+
+
+def batches(source, batch_size):
+    batch = []
+    for doc in source.movies_complete.find({}, {"_id": 0}).limit(NUM_DOCS):
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+    source, db = client[DB_NAME], client[BENCH_DB]
+    try:
+        print(f"--- Chargement de {NUM_DOCS:,} documents de movies_complete par profil ---")
+        print("\n| Profil | w / j | Lots (taille x en vol) | Docs/s | Retard max (s) | Retard moyen (s) | Pauses (s) |")
+        print("| :--- | :--- | :--- | :--- | :--- | :--- | :--- |")
+        for name, profile in PROFILES.items():
+            db.movies_bulk.drop()
+            loader = BulkLoader(db, name)
+            loader.insert_batches("movies_bulk", batches(source, profile["batch_size"]))
+            stats = loader.stats()
+            print(f"| {name} | {profile['w']} / {profile['j']} | "
+                  f"{profile['batch_size']:,} x {profile['max_in_flight']} | {stats['rate']:,.0f} | "
+                  f"{stats['max_lag_s'] if stats['max_lag_s'] is not None else '-'} | "
+                  f"{stats['mean_lag_s'] if stats['mean_lag_s'] is not None else '-'} | {stats['throttled_s']} |")
+    finally:
+        client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Expériences de compression WiredTiger : copie movies_complete et
+persons_complete dans une base de test par compresseur de blocs (none,
+snappy, zlib, zstd ; index déclarés recréés), puis compare taille non
+compressée, taille sur disque, taille des index et temps des requêtes Q1-Q9
+(queries_mongo.workload) sur chaque copie. Les bases de test sont supprimées
+à la fin.
+"""
+
+import os
+import sys
+import time
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.mongo_indexes import STRUCTURED_COLLECTIONS
+from movies.storage_report import COMPRESSORS, mongo_copy, mongo_report
+from queries_mongo import workload
+
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "cineexplorer_db"
+BENCH_DB = "cineexplorer_compression_{}"
+NUM_RUNS = 5
+
+
+def run(db, command):
+    """Exécute une commande de workload() et consomme tout le curseur."""
+    if "aggregate" in command:
+        return list(db[command["aggregate"]].aggregate(command["pipeline"]))
+    cursor = db[command["find"]].find(command["filter"], command.get("projection"))
+    if "sort" in command:
+        cursor = cursor.sort(list(command["sort"].items()))
+    return list(cursor.limit(command.get("limit", 0)))
+
+
+def time_ms(db, command):
+    run(db, command)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        run(db, command)
+    return (time.perf_counter() - start) / NUM_RUNS * 1000
+
+
+def main(mongo_uri=MONGO_URI, db_name=DB_NAME):
+    client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+    source = client[db_name]
+    queries = workload()
+    sizes, latencies = {}, {}
+    try:
+        for compressor in COMPRESSORS:
+            db = client[BENCH_DB.format(compressor)]
+            start = time.perf_counter()
+            copied = mongo_copy(source, db, STRUCTURED_COLLECTIONS, compressor)
+            print(f"  {compressor} : {copied:,} documents copiés en {time.perf_counter() - start:.1f} s")
+            sizes[compressor] = mongo_report(db, STRUCTURED_COLLECTIONS)
+            latencies[compressor] = {query: time_ms(db, command) for query, command, _ in queries}
+    finally:
+        for compressor in COMPRESSORS:
+            client.drop_database(BENCH_DB.format(compressor))
+        client.close()
+
+    print("\n| Compresseur | Collection | Données (Mo) | Disque (Mo) | Ratio | Index (Mo) |")
+    print("| :--- | :--- | :--- | :--- | :--- | :--- |")
+    for compressor, report in sizes.items():
+        for name, stats in report.items():
+            ratio = stats["size"] / stats["storage"] if stats["storage"] else 0.0
+            print(f"| {compressor} | {name} | {stats['size'] / 1e6:.1f} | {stats['storage'] / 1e6:.1f} | "
+                  f"{ratio:.2f} | {stats['index_bytes'] / 1e6:.1f} |")
+
+    print("\n| Requête | " + " | ".join(f"{compressor} (ms)" for compressor in latencies) + " |")
+    print("| :--- |" + " :--- |" * len(latencies))
+    for query, _, _ in queries:
+        print(f"| {query} | " + " | ".join(f"{latencies[c][query]:.2f}" for c in latencies) + " |")
+
+
+if __name__ == "__main__":
+    main()
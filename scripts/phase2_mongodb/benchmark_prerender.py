@@ -0,0 +1,73 @@
+"""
+Benchmark de la page Détails : rendu en direct (find_one MongoDB puis
+template detail.html) contre fragment précalculé (movies/prerender.py : une
+lecture par clé dans SQLite, décompression zlib, en-tête et pied en cache).
+Mesure aussi la vue complète via le client de test Django dans les deux modes,
+et vérifie que la page servie est identique au rendu en direct.
+Prérequis : python cli.py prerender.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import Client
+from django.test.utils import override_settings
+
+from movies.mongo_service import mongo_service
+from movies.prerender import TABLE, get_fragment_store
+
+NUM_MOVIES = 500
+
+
+def per_page_ms(func, ids):
+    start = time.perf_counter()
+    for movie_id in ids:
+        func(movie_id)
+    return (time.perf_counter() - start) / len(ids) * 1000
+
+
+def main():
+    store = get_fragment_store()
+    if not store.enabled:
+        print("Fragments absents ou périmés : lancer python cli.py prerender")
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT movie_id FROM {TABLE} LIMIT %s", [NUM_MOVIES])
+        ids = [row[0] for row in cursor.fetchall()]
+    movies = {movie_id: mongo_service.get_movie_by_id(movie_id) for movie_id in ids}
+    count, raw_size, stored_size = store.stats()
+    print(f"--- {count:,} fragments, {raw_size / 1e6:.1f} Mo rendus, {stored_size / 1e6:.1f} Mo stockés ; "
+          f"{len(ids)} films mesurés ---")
+
+    live = lambda movie_id: render_to_string('movies/detail.html',
+                                             {'movie': mongo_service.get_movie_by_id(movie_id)})
+    template_only = lambda movie_id: render_to_string('movies/detail.html', {'movie': movies[movie_id]})
+    identical = all(store.page(movie_id) == template_only(movie_id) for movie_id in ids)
+
+    client = Client()
+    view = lambda movie_id: client.get(f'/movie/{movie_id}/', HTTP_HOST='localhost')
+    view(ids[0])
+
+    print("\n| Chemin | ms / page |")
+    print("| :--- | :--- |")
+    print(f"| MongoDB find_one + template | {per_page_ms(live, ids):.3f} |")
+    print(f"| Template seul (document en mémoire) | {per_page_ms(template_only, ids):.3f} |")
+    print(f"| Fragment précalculé (lecture SQLite + zlib) | {per_page_ms(store.page, ids):.3f} |")
+    with override_settings(PRERENDERED_DETAIL=False):
+        print(f"| Vue complète, rendu en direct | {per_page_ms(view, ids):.3f} |")
+    print(f"| Vue complète, fragment précalculé | {per_page_ms(view, ids):.3f} |")
+    print(f"\nPages identiques au rendu en direct : {'oui' if identical else 'NON'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark du cluster shardé local (scripts/setup_sharded.py) : copie
+NUM_DOCS documents de movies_complete depuis rs0 dans deux collections du
+cluster, l'une shardée sur _id hashé, l'autre par zones d'années, puis compare
+requêtes ciblées (un shard) et scatter-gather (tous les shards) : nombre de
+shards lus (explain via mongos) et latence.
+"""
+
+import os
+import sys
+import time
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.mongo_sharding import (HASHED_ID, YEAR_ZONES, chunk_distribution, prepare_collection,
+                                   shard_names, targeted_shards, year_boundaries)
+
+SOURCE_URI = "mongodb://localhost:27017/"
+MONGOS_URI = "mongodb://localhost:27030/"
+DB_NAME = "cineexplorer_db"
+BENCH_DB = "cineexplorer_sharding"
+NUM_DOCS = 200000
+BATCH_SIZE = 5000
+NUM_RUNS = 20
+
+LAYOUTS = {HASHED_ID: "movies_hashed", YEAR_ZONES: "movies_zoned"}
+
+
+def load(source, db, profile, boundaries):
+    """Collection vide shardée et pré-découpée, puis chargement par lots ; renvoie docs/s."""
+    name = LAYOUTS[profile]
+    db[name].drop()
+    prepare_collection(db, name, profile=profile, boundaries=boundaries, verbose=False)
+    start = time.perf_counter()
+    batch, total = [], 0
+    for doc in source.movies_complete.find().limit(NUM_DOCS):
+        batch.append(doc)
+        if len(batch) == BATCH_SIZE:
+            db[name].insert_many(batch, ordered=False)
+            total, batch = total + len(batch), []
+    if batch:
+        db[name].insert_many(batch, ordered=False)
+        total += len(batch)
+    return total / (time.perf_counter() - start)
+
+
+def queries(sample_id):
+    """(libellé, commande find) ; la collection est renseignée par layout."""
+    return [
+        ("Détail par _id", {"filter": {"_id": sample_id}, "limit": 1}),
+        ("Films des années 1990", {"filter": {"year": {"$gte": 1990, "$lte": 1999}},
+                                   "projection": {"title": 1}}),
+        ("Q2 Drama 2000-2010", {"filter": {"genres": "Drama", "year": {"$gte": 2000, "$lte": 2010}},
+                                "sort": {"rating.average": -1}, "limit": 5}),
+        ("Genre seul (Comedy)", {"filter": {"genres": "Comedy"}, "limit": 50}),
+    ]
+
+
+def run(db, name, command):
+    collection = db[name]
+    cursor = collection.find(command["filter"], command.get("projection"))
+    if "sort" in command:
+        cursor = cursor.sort(list(command["sort"].items()))
+    return list(cursor.limit(command.get("limit", 0)))
+
+
+def time_ms(func, *args):
+    func(*args)
+    start = time.perf_counter()
+    for _ in range(NUM_RUNS):
+        func(*args)
+    return (time.perf_counter() - start) / NUM_RUNS * 1000
+
+
+def main():
+    source_client = MongoClient(SOURCE_URI, serverSelectionTimeoutMS=5000)
+    cluster = MongoClient(MONGOS_URI, serverSelectionTimeoutMS=5000)
+    source, db = source_client[DB_NAME], cluster[BENCH_DB]
+    try:
+        shards = shard_names(db)
+        boundaries = year_boundaries(source, len(shards), source="movies_complete", field="year")
+        print(f"--- {len(shards)} shards, zones d'années coupées à {boundaries} ---")
+
+        print("\n| Clé de shard | Docs/s au chargement | Chunks par shard |")
+        print("| :--- | :--- | :--- |")
+        for profile, name in LAYOUTS.items():
+            rate = load(source, db, profile, boundaries)
+            print(f"| {profile} | {rate:,.0f} | {chunk_distribution(db, name)} |")
+
+        sample_id = db[LAYOUTS[HASHED_ID]].find_one({"year": 1995}, {"_id": 1})["_id"]
+        print("\n| Requête | Clé de shard | Shards lus | Latence (ms) |")
+        print("| :--- | :--- | :--- | :--- |")
+        for label, command in queries(sample_id):
+            for profile, name in LAYOUTS.items():
+                explain = db.command("explain", dict({"find": name}, **command), verbosity="queryPlanner")
+                read = targeted_shards(explain)
+                kind = "ciblée" if len(read) == 1 else "scatter-gather"
+                print(f"| {label} | {profile} | {len(read)} ({kind}) | {time_ms(run, db, name, command):.2f} |")
+    finally:
+        source_client.close()
+        cluster.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,21 @@
+import os
+import sys
 from pymongo import MongoClient
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.mongo_indexes import sync_indexes
+
 def create_indexes():
     client = MongoClient("mongodb://localhost:27017/")
     db = client["cineexplorer_db"]
     
     print(" Création des index pour accélérer la dénormalisation...")
     
-    
-    db.Movie.create_index("mid")
-    db.Rating.create_index("mid")
-    db.MovieGenre.create_index("mid")
-    db.MoviePrincipal.create_index("mid")
-    db.Person.create_index("pid")
-    db.Character.create_index("mid")
-    db.Character.create_index("pid")
+    # Index déclarés dans movies/mongo_indexes.py (clés movie_id / person_id écrites par migrate_flat)
+    sync_indexes(db)
     
     print(" Index créés avec succès !")
 
 if __name__ == "__main__":
-    create_indexes()
\ No newline at end of file
+    create_indexes()
@@ -1,45 +1,141 @@
 import sqlite3
 import os
+import sys
 from pymongo import MongoClient
 
-def migrate_flat():
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.bulk_load import BulkLoader
+from movies.mongo_sharding import prepare_collection
+from movies.progress import MongoCheckpoints, ProgressReporter
+from movies.snapshot import is_fresh, load_table, sqlite_sources
+
+CHECKPOINT_JOB = "migrate_flat"
+# Tables produites par une étape facultative du pipeline (python cli.py similar)
+OPTIONAL_TABLES = {"MovieSimilar"}
+
+
+def _use_snapshot(table, sqlite_conn, snapshot_dir):
+    """Instantané de la table au moins aussi récent que la base SQLite (sinon il est périmé)."""
+    db_path = sqlite_conn.execute("PRAGMA database_list").fetchone()[2]
+    return bool(db_path) and is_fresh(table, sqlite_sources(db_path), snapshot_dir)
+
+
+def count_rows(table, sqlite_conn, snapshot_dir):
+    if _use_snapshot(table, sqlite_conn, snapshot_dir):
+        return load_table(table, snapshot_dir).num_rows
+    return sqlite_conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def iter_batches(table, sqlite_conn, snapshot_dir, offset, batch_size):
+    """Lots de documents à partir de la ligne `offset` (ordre stable de la source)."""
+    # Instantané Arrow (mémoire mappée) s'il est à jour, sinon lecture SQLite
+    if _use_snapshot(table, sqlite_conn, snapshot_dir):
+        for batch in load_table(table, snapshot_dir).slice(offset).to_batches(max_chunksize=batch_size):
+            yield batch.to_pylist()
+        return
+    cursor = sqlite_conn.cursor()
+    cursor.execute(f"SELECT * FROM {table} LIMIT -1 OFFSET ?", (offset,))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield [dict(row) for row in rows]
+
+
+def migrate_table(db, table, sqlite_conn, snapshot_dir, checkpoints, profile=None):
+    """
+    Copie une table par lots selon le profil d'écriture (movies/bulk_load.py) ;
+    le point de reprise garde la position dans la source et le dernier _id
+    inséré, pour supprimer les lots partiels à la reprise.
+    """
+    state = checkpoints.get(CHECKPOINT_JOB, table)
+    if state is not None and state["finished"]:
+        print(f"{table} : deja migree ({state['rows_done']} documents)")
+        return
+
+    total = count_rows(table, sqlite_conn, snapshot_dir)
+    if total == 0:
+        return
+
+    if state is None:
+        db[table].drop()
+        # Sur un cluster shardé : collection shardée et pré-découpée avant le chargement
+        prepare_collection(db, table)
+        offset, last_id = 0, None
+    else:
+        offset, last_id = state["last_key"]["offset"], state["last_key"]["_id"]
+        db[table].delete_many({"_id": {"$gt": last_id}} if last_id is not None else {})
+        print(f"{table} : reprise a la ligne {offset}")
+
+    loader = BulkLoader(db, profile)
+    progress = ProgressReporter(table, total=total, done=offset)
+
+    def commit(count, batch_last_id):
+        nonlocal offset, last_id
+        offset, last_id = offset + count, batch_last_id
+        checkpoints.save(CHECKPOINT_JOB, table, {"offset": offset, "_id": last_id}, offset)
+        progress.advance(count)
+
+    batches = iter_batches(table, sqlite_conn, snapshot_dir, offset, loader.profile["batch_size"])
+    loader.insert_batches(table, batches, on_commit=commit)
+    progress.close()
+    loader.report()
+
+    checkpoints.save(CHECKPOINT_JOB, table, {"offset": offset, "_id": last_id}, offset, finished=True)
+    print(f"{table} : {offset} documents migres")
+
+
+def migrate_all(db, sqlite_conn, snapshot_dir, restart=False, profile=None):
+    """Migre toutes les tables sur des connexions déjà ouvertes (sqlite_conn en row_factory Row)."""
+    checkpoints = MongoCheckpoints(db)
+    if restart:
+        checkpoints.clear(CHECKPOINT_JOB)
+
+    tables = [
+        "Movie", "Person", "Rating", "Genre", "Profession", 
+        "TitleAlias", "MovieGenre", "PersonProfession", 
+        "MoviePrincipal", "Character", "MovieWriter", "MovieSimilar"
+    ]
+
+    existing = {row[0] for row in sqlite_conn.execute("SELECT name FROM sqlite_schema WHERE type = 'table'")}
+    for table in tables:
+        if table in OPTIONAL_TABLES and table not in existing:
+            # Pas de collection périmée d'une migration précédente
+            db[table].drop()
+            continue
+        migrate_table(db, table, sqlite_conn, snapshot_dir, checkpoints, profile)
+
+    # Migration complète : le prochain lancement repart de zéro
+    checkpoints.clear(CHECKPOINT_JOB)
+
+
+def migrate_flat(restart=False, profile=None):
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     sqlite_path = os.path.join(base_dir, "data", "imdb.db")
+    snapshot_dir = os.path.join(base_dir, "data", "snapshot")
     
     if not os.path.exists(sqlite_path):
         return
 
     sqlite_conn = None
+    mongo_client = None
     try:
         sqlite_conn = sqlite3.connect(sqlite_path)
         sqlite_conn.row_factory = sqlite3.Row
         
         mongo_client = MongoClient("mongodb://localhost:27017/")
         db = mongo_client["cineexplorer_db"]
-
-        tables = [
-            "Movie", "Person", "Rating", "Genre", "Profession", 
-            "TitleAlias", "MovieGenre", "PersonProfession", 
-            "MoviePrincipal", "Character", "MovieWriter"
-        ]
-
-        for table in tables:
-            cursor = sqlite_conn.cursor()
-            cursor.execute(f"SELECT * FROM {table}")
-            rows = cursor.fetchall()
-            documents = [dict(row) for row in rows]
-
-            if documents:
-                db[table].drop()
-                db[table].insert_many(documents)
-                print(f"{table} : {len(documents)} documents migres")
+        migrate_all(db, sqlite_conn, snapshot_dir, restart, profile)
 
     except Exception as e:
-        print(f"Erreur : {e}")
+        print(f"Erreur : {e} (relancer le script pour reprendre au dernier point de reprise)")
     finally:
         if sqlite_conn:
             sqlite_conn.close()
-        mongo_client.close()
+        if mongo_client:
+            mongo_client.close()
 
 if __name__ == "__main__":
-    migrate_flat()
\ No newline at end of file
+    profile = sys.argv[sys.argv.index("--profile") + 1] if "--profile" in sys.argv else None
+    migrate_flat(restart="--restart" in sys.argv, profile=profile)
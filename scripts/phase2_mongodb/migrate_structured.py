@@ -3,10 +3,24 @@ Phase 2 - T2.4 : Migration vers documents structurés
 
 """
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne
 from pymongo.errors import OperationFailure
+import os
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from movies.bulk_load import BulkLoader
+from movies.mongo_indexes import FLAT_COLLECTIONS, sync_indexes
+from movies.mongo_sharding import prepare_collection, range_shard_key
+from movies.progress import MongoCheckpoints, ProgressReporter
+
+CHECKPOINT_JOB = "migrate_structured"
+TOP_COLLABORATORS = 20
+# $sortArray (filmographie, réalisateurs de persons_complete)
+MIN_MONGODB_VERSION = (5, 2)
+
 
 def connect_mongodb(host='localhost', port=27017, db_name='cineexplorer_db'):
     
@@ -21,49 +35,43 @@ def connect_mongodb(host='localhost', port=27017, db_name='cineexplorer_db'):
         return None, None
 
 
-def create_indexes(db):
-    
-
-    
-    indexes_to_create = [
-        ('Movie', 'movie_id'),
-        ('Rating', 'movie_id'),
-        ('MovieGenre', 'movie_id'),
-        ('MoviePrincipal', 'movie_id'),
-        ('Person', 'person_id')
-    ]
-    
-    for collection_name, field in indexes_to_create:
-        try:
-            collection = db[collection_name]
-            existing_indexes = collection.index_information()
-            
-            
-            index_exists = any(field in str(idx) for idx in existing_indexes.values())
-            
-            if not index_exists:
-                collection.create_index(field)
-                print(f"    Index créé: {collection_name}.{field}")
-            else:
-                print(f"     Index existe déjà: {collection_name}.{field}")
-        except Exception as e:
-            print(f"     Erreur index {collection_name}.{field}: {e}")
+def create_indexes(db, collections=FLAT_COLLECTIONS):
+    """Index des collections plates utilisés par les $lookup (déclarés dans movies/mongo_indexes.py)."""
+    try:
+        sync_indexes(db, collections)
+    except Exception as e:
+        print(f"     Erreur index : {e}")
 
 
-def create_structured_collection_optimized(db, limit=1000, batch_size=100):
-   
+def create_structured_collection_optimized(db, limit=1000, batch_size=100, profile=None):
+    """
+    Construit movies_complete par lots de `batch_size` films (ordre de movie_id).
+    Chaque lot est fusionné ($merge, idempotent) puis le dernier movie_id traité
+    est enregistré : après un plantage, la migration reprend au lot suivant.
+    Le write concern et le plafond de retard de réplication viennent du profil
+    d'écriture (movies/bulk_load.py).
+    """
     print(f"\n Création de movies_complete (limite: {limit} films, batch: {batch_size})...")
     start_time = time.time()
     
-    if 'movies_complete' in db.list_collection_names():
-        print("    Suppression de l'ancienne collection...")
-        db.movies_complete.drop()
+    checkpoints = MongoCheckpoints(db)
+    state = checkpoints.get(CHECKPOINT_JOB, "movies_complete")
+    if state is None:
+        if 'movies_complete' in db.list_collection_names():
+            print("    Suppression de l'ancienne collection...")
+            db.movies_complete.drop()
+        prepare_collection(db, "movies_complete")
+        last_id, done = None, 0
+    else:
+        last_id, done = state["last_key"], state["rows_done"]
+        print(f"    Reprise après {last_id} ({done:,} films déjà traités)")
+    
     
+    # Collection shardée par intervalles d'années : écriture par la clé de shard, sans $merge
+    key_fields = range_shard_key(db, "movies_complete")
+    loader = BulkLoader(db, profile)
     
-    pipeline = [
-        {"$limit": limit},
-        
-        
+    document_stages = [
         {"$lookup": {
             "from": "Rating",
             "localField": "movie_id",
@@ -118,6 +126,25 @@ def create_structured_collection_optimized(db, limit=1000, batch_size=100):
             "as": "persons_info"
         }},
         
+        # Films similaires précalculés (movies/similar.py, collection plate MovieSimilar)
+        {"$lookup": {
+            "from": "MovieSimilar",
+            "let": {"movie_id": "$movie_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$movie_id", "$$movie_id"]}}},
+                {"$sort": {"rank": 1}},
+                {"$project": {"similar_id": 1, "score": 1, "_id": 0}}
+            ],
+            "as": "similar_list"
+        }},
+        # Égalité localField/foreignField : index movie_id_1 de Movie ($expr $in n'en utilise pas)
+        {"$lookup": {
+            "from": "Movie",
+            "localField": "similar_list.similar_id",
+            "foreignField": "movie_id",
+            "as": "similar_info"
+        }},
+        
       
         {"$project": {
             "_id": "$movie_id",
@@ -174,17 +201,70 @@ def create_structured_collection_optimized(db, limit=1000, batch_size=100):
                         "category": "$$c.category"
                     }
                 }
+            },
+            "similar": {
+                "$map": {
+                    "input": "$similar_list",
+                    "as": "s",
+                    "in": {
+                        "$let": {
+                            "vars": {"info": {"$arrayElemAt": [
+                                {"$filter": {
+                                    "input": "$similar_info",
+                                    "as": "m",
+                                    "cond": {"$eq": ["$$m.movie_id", "$$s.similar_id"]}
+                                }},
+                                0
+                            ]}},
+                            "in": {
+                                "movie_id": "$$s.similar_id",
+                                "title": "$$info.primaryTitle",
+                                "year": "$$info.startYear",
+                                "score": "$$s.score"
+                            }
+                        }
+                    }
+                }
             }
         }},
         
-        {"$out": "movies_complete"}
+        {"$merge": {"into": "movies_complete", "whenMatched": "replace", "whenNotMatched": "insert"}}
     ]
     
     try:
         print("    Exécution du pipeline d'agrégation...")
         
-       
-        db.Movie.aggregate(pipeline, allowDiskUse=True)
+        total = min(limit, db.Movie.count_documents({}))
+        progress = ProgressReporter("movies_complete", total=total, done=done)
+        while done < total:
+            query = {"movie_id": {"$gt": last_id}} if last_id is not None else {}
+            ids = [doc["movie_id"] for doc in db.Movie.find(query, {"movie_id": 1, "_id": 0})
+                   .sort("movie_id", 1).limit(min(batch_size, total - done))]
+            if not ids:
+                break
+            
+            pipeline = [{"$match": {"movie_id": {"$in": ids}}}] + document_stages
+            if key_fields:
+                def write():
+                    documents = db.Movie.aggregate(pipeline[:-1], allowDiskUse=True)
+                    loader.collection("movies_complete").bulk_write([
+                        ReplaceOne({field: doc.get(field) for field in key_fields}, doc, upsert=True)
+                        for doc in documents
+                    ], ordered=False)
+            else:
+                def write():
+                    # Le $merge hérite du write concern de la collection source
+                    loader.collection("Movie").aggregate(pipeline, allowDiskUse=True)
+            loader.run_batch(write, len(ids))
+            
+            last_id, done = ids[-1], done + len(ids)
+            checkpoints.save(CHECKPOINT_JOB, "movies_complete", last_id, done)
+            progress.advance(len(ids))
+        progress.close()
+        loader.report()
+        
+        # Collection terminée : la prochaine migration repart de zéro
+        checkpoints.clear(CHECKPOINT_JOB)
         
         elapsed = time.time() - start_time
         count = db.movies_complete.count_documents({})
@@ -195,6 +275,111 @@ def create_structured_collection_optimized(db, limit=1000, batch_size=100):
         
         return True
         
+    except Exception as e:
+        print(f"\n    Erreur: {type(e).__name__}: {e}")
+        print("    Relancer le script pour reprendre au dernier lot enregistré.")
+        return False
+
+
+def create_persons_collection(db, top_collaborators=TOP_COLLABORATORS):
+    """
+    Construit persons_complete depuis movies_complete : un document par personne
+    (_id = person_id) avec sa filmographie triée par année, ses films par
+    décennie et ses collaborateurs les plus fréquents. Q1, Q4 et Q6 deviennent
+    la lecture d'un seul document au lieu d'un $unwind de la distribution.
+    Trois agrégations : filmographie ($out), décennies puis collaborateurs
+    ($merge). $sortArray demande MongoDB 5.2 ou plus : la collection n'est pas
+    construite sur un serveur plus ancien.
+    """
+    print("\n Création de persons_complete...")
+    start_time = time.time()
+    
+    try:
+        version = tuple(db.client.server_info()["versionArray"][:2])
+        if version < MIN_MONGODB_VERSION:
+            print(f"    MongoDB {'.'.join(map(str, version))} : $sortArray demande "
+                  f"{'.'.join(map(str, MIN_MONGODB_VERSION))} ou plus, persons_complete non construite")
+            return False
+        
+        # 1. Filmographie compacte
+        db.movies_complete.aggregate([
+            {"$unwind": "$cast"},
+            {"$match": {"cast.person_id": {"$ne": None}}},
+            {"$group": {
+                "_id": "$cast.person_id",
+                "name": {"$first": "$cast.name"},
+                "filmography": {"$push": {
+                    "movie_id": "$_id",
+                    "title": "$title",
+                    "year": "$year",
+                    "category": "$cast.category",
+                    "rating": "$rating.average",
+                    "votes": "$rating.votes"
+                }}
+            }},
+            {"$set": {"filmography": {"$sortArray": {"input": "$filmography", "sortBy": {"year": 1, "movie_id": 1}}}}},
+            {"$out": "persons_complete"}
+        ], allowDiskUse=True)
+        
+        # 2. Nombre de films par décennie (films sans année exclus, comme Q6)
+        db.movies_complete.aggregate([
+            {"$match": {"year": {"$ne": None}}},
+            {"$unwind": "$cast"},
+            {"$group": {
+                "_id": {"person_id": "$cast.person_id", "decade": {"$subtract": ["$year", {"$mod": ["$year", 10]}]}},
+                "total": {"$sum": 1}
+            }},
+            {"$sort": {"_id.decade": 1}},
+            {"$group": {"_id": "$_id.person_id", "decades": {"$push": {"decade": "$_id.decade", "total": "$total"}}}},
+            {"$merge": {"into": "persons_complete", "whenMatched": "merge", "whenNotMatched": "discard"}}
+        ], allowDiskUse=True)
+        
+        # 3. Collaborateurs : paires de la distribution d'un même film
+        db.movies_complete.aggregate([
+            {"$project": {"me": "$cast", "other": "$cast"}},
+            {"$unwind": "$me"},
+            {"$unwind": "$other"},
+            {"$match": {"$expr": {"$ne": ["$me.person_id", "$other.person_id"]}}},
+            {"$group": {
+                "_id": {"person_id": "$me.person_id", "other": "$other.person_id"},
+                "name": {"$first": "$other.name"},
+                "count": {"$sum": 1},
+                # Comme Q4 : films où la personne joue (actor/actress) et l'autre réalise
+                "directed": {"$sum": {"$cond": [{"$and": [
+                    {"$in": ["$me.category", ["actor", "actress"]]},
+                    {"$eq": ["$other.category", "director"]}
+                ]}, 1, 0]}}
+            }},
+            {"$sort": {"count": -1, "_id.other": 1}},
+            {"$group": {
+                "_id": "$_id.person_id",
+                "collaborators": {"$push": {"person_id": "$_id.other", "name": "$name",
+                                            "count": "$count", "directed": "$directed"}}
+            }},
+            {"$project": {
+                "top_collaborators": {"$map": {
+                    "input": {"$slice": ["$collaborators", top_collaborators]},
+                    "as": "c",
+                    "in": {"person_id": "$$c.person_id", "name": "$$c.name", "count": "$$c.count"}
+                }},
+                # Q4 : réalisateurs avec qui la personne a joué, tous conservés
+                "directors": {"$sortArray": {
+                    "input": {"$map": {
+                        "input": {"$filter": {"input": "$collaborators", "as": "c", "cond": {"$gt": ["$$c.directed", 0]}}},
+                        "as": "c",
+                        "in": {"person_id": "$$c.person_id", "name": "$$c.name", "count": "$$c.directed"}
+                    }},
+                    "sortBy": {"count": -1, "person_id": 1}
+                }}
+            }},
+            {"$merge": {"into": "persons_complete", "whenMatched": "merge", "whenNotMatched": "discard"}}
+        ], allowDiskUse=True)
+        
+        elapsed = time.time() - start_time
+        count = db.persons_complete.count_documents({})
+        print(f"    {count:,} personnes, Temps: {elapsed:.2f}s")
+        return True
+        
     except Exception as e:
         print(f"\n    Erreur: {type(e).__name__}: {e}")
         return False
@@ -254,7 +439,10 @@ def main():
     
     test_limit = 1000000
     
-    if create_structured_collection_optimized(db, limit=test_limit):
+    if create_structured_collection_optimized(db, limit=test_limit, batch_size=2000):
+        create_indexes(db, ["movies_complete"])
+        if create_persons_collection(db):
+            create_indexes(db, ["persons_complete"])
         show_sample_document(db)
         
         print("\n Migration réussie!")
@@ -1,11 +1,15 @@
+import re
 import time
 from pymongo import MongoClient
 
 client = MongoClient("mongodb://localhost:27017/")
 db = client["cineexplorer_db"]
 
-db.movies_complete.create_index("cast.name")
-db.movies_complete.create_index("genres")
+# Les index de movies_complete sont déclarés dans movies/mongo_indexes.py
+# (python cli.py mongo-indexes), plus créés à l'import de ce module.
+
+# Q1, Q4 et Q6 lisent persons_complete (un document par personne) ; les
+# variantes *_unwind parcourent la distribution de movies_complete.
 
 def measure(query_func, *args):
     start = time.perf_counter()
@@ -13,7 +17,14 @@ def measure(query_func, *args):
     duration = (time.perf_counter() - start) * 1000
     return result, duration
 
-def q1_filmography(name):
+def person_filter(person):
+    """person_id (nm...) : un seul document ; sinon nom : un document par homonyme."""
+    return {"_id": person} if re.fullmatch(r"nm\d+", person) else {"name": person}
+
+def q1_filmography(person):
+    return db.persons_complete.find(person_filter(person), {"name": 1, "filmography.title": 1, "filmography.year": 1})
+
+def q1_filmography_unwind(name):
     return db.movies_complete.find({"cast.name": name}, {"title": 1, "year": 1, "_id": 0})
 
 def q2_top_genre(genre, y_min, y_max, n):
@@ -22,16 +33,19 @@ def q2_top_genre(genre, y_min, y_max, n):
         "year": {"$gte": y_min, "$lte": y_max}
     }).sort("rating.average", -1).limit(n)
 
-def q3_multi_roles():
-    return db.movies_complete.aggregate([
+def q3_pipeline():
+    return [
         {"$unwind": "$cast"},
         {"$group": {"_id": {"m": "$_id", "p": "$cast.person_id"}, "count": {"$sum": 1}}},
         {"$match": {"count": {"$gt": 1}}},
         {"$limit": 10}
-    ])
+    ]
+
+def q3_multi_roles():
+    return db.movies_complete.aggregate(q3_pipeline())
 
-def q4_collabs(actor_name):
-    return db.movies_complete.aggregate([
+def q4_pipeline(actor_name):
+    return [
         {"$match": {"cast.name": actor_name}},
         {"$unwind": "$cast"},
         {"$group": {"_id": "$_id", "directors": {"$push": {"$cond": [{"$eq": ["$cast.category", "director"]}, "$cast.name", None]}}}},
@@ -39,45 +53,97 @@ def q4_collabs(actor_name):
         {"$match": {"directors": {"$ne": None}}},
         {"$group": {"_id": "$directors", "count": {"$sum": 1}}},
         {"$sort": {"count": -1}}
-    ])
+    ]
 
-def q5_popular_genres():
-    return db.movies_complete.aggregate([
+def q4_collabs(person):
+    return db.persons_complete.find(person_filter(person), {"name": 1, "directors": 1})
+
+def q4_collabs_unwind(actor_name):
+    return db.movies_complete.aggregate(q4_pipeline(actor_name))
+
+def q5_pipeline():
+    return [
         {"$unwind": "$genres"},
         {"$group": {"_id": "$genres", "avg": {"$avg": "$rating.average"}, "count": {"$sum": 1}}},
         {"$match": {"avg": {"$gt": 7.0}, "count": {"$gt": 5}}},
         {"$sort": {"avg": -1}}
-    ])
+    ]
+
+def q5_popular_genres():
+    return db.movies_complete.aggregate(q5_pipeline())
 
-def q6_career_evolution(name):
-    return db.movies_complete.aggregate([
+def q6_pipeline(name):
+    return [
         {"$match": {"cast.name": name}},
         {"$project": {"decade": {"$subtract": ["$year", {"$mod": ["$year", 10]}]}}},
         {"$group": {"_id": "$decade", "total": {"$sum": 1}}},
         {"$sort": {"_id": 1}}
-    ])
+    ]
 
-def q7_top3_per_genre():
-    return db.movies_complete.aggregate([
+def q6_career_evolution(person):
+    return db.persons_complete.find(person_filter(person), {"name": 1, "decades": 1})
+
+def q6_career_evolution_unwind(name):
+    return db.movies_complete.aggregate(q6_pipeline(name))
+
+def q7_pipeline():
+    return [
         {"$unwind": "$genres"},
         {"$sort": {"rating.average": -1}},
         {"$group": {"_id": "$genres", "top3": {"$push": "$title"}}},
         {"$project": {"top3": {"$slice": ["$top3", 3]}}}
-    ])
+    ]
 
-def q8_blockbuster_actors():
-    return db.movies_complete.aggregate([
+def q7_top3_per_genre():
+    return db.movies_complete.aggregate(q7_pipeline())
+
+def q8_pipeline():
+    return [
         {"$match": {"rating.votes": {"$gt": 2000}}},
         {"$unwind": "$cast"},
         {"$group": {"_id": "$cast.name"}}
-    ])
+    ]
+
+def q8_blockbuster_actors():
+    return db.movies_complete.aggregate(q8_pipeline())
 
 def q9_longest_films():
     return db.movies_complete.find().sort("runtime", -1).limit(5)
 
+def workload(name="Salvatore Papa", genre="Drama", y_min=1900, y_max=2024, n=5):
+    """
+    Q1-Q9 sous forme de commandes find / aggregate, pour explain
+    (movies/mongo_indexes.check_indexes) : (nom, commande, utilise_un_index).
+    Q3, Q5 et Q7 agrègent toute la collection : un COLLSCAN y est attendu.
+    """
+    def aggregate(pipeline):
+        return {"aggregate": "movies_complete", "pipeline": pipeline, "cursor": {}}
+
+    return [
+        ("Q1", {"find": "persons_complete", "filter": person_filter(name),
+                "projection": {"name": 1, "filmography.title": 1, "filmography.year": 1}}, True),
+        ("Q1 unwind", {"find": "movies_complete", "filter": {"cast.name": name},
+                       "projection": {"title": 1, "year": 1, "_id": 0}}, True),
+        ("Q2", {"find": "movies_complete", "filter": {"genres": genre, "year": {"$gte": y_min, "$lte": y_max}},
+                "sort": {"rating.average": -1}, "limit": n}, True),
+        ("Q3", aggregate(q3_pipeline()), False),
+        ("Q4", {"find": "persons_complete", "filter": person_filter(name),
+                "projection": {"name": 1, "directors": 1}}, True),
+        ("Q4 unwind", aggregate(q4_pipeline(name)), True),
+        ("Q5", aggregate(q5_pipeline()), False),
+        ("Q6", {"find": "persons_complete", "filter": person_filter(name),
+                "projection": {"name": 1, "decades": 1}}, True),
+        ("Q6 unwind", aggregate(q6_pipeline(name)), True),
+        ("Q7", aggregate(q7_pipeline()), False),
+        ("Q8", aggregate(q8_pipeline()), True),
+        ("Q9", {"find": "movies_complete", "filter": {}, "sort": {"runtime": -1}, "limit": 5}, True),
+    ]
+
 if __name__ == "__main__":
     res, t = measure(q1_filmography, "Salvatore Papa")
-    print(f"Q1: {t:.2f} ms | {len(res)} docs")
+    print(f"Q1: {t:.2f} ms | {sum(len(p.get('filmography', [])) for p in res)} films")
+    res, t = measure(q1_filmography_unwind, "Salvatore Papa")
+    print(f"Q1 (unwind): {t:.2f} ms | {len(res)} docs")
     
     res, t = measure(q2_top_genre, "Drama", 1900, 2024, 5)
     print(f"Q2: {t:.2f} ms")
@@ -87,12 +153,16 @@ if __name__ == "__main__":
     
     res, t = measure(q4_collabs, "Salvatore Papa")
     print(f"Q4: {t:.2f} ms")
+    res, t = measure(q4_collabs_unwind, "Salvatore Papa")
+    print(f"Q4 (unwind): {t:.2f} ms")
     
     res, t = measure(q5_popular_genres)
     print(f"Q5: {t:.2f} ms")
     
     res, t = measure(q6_career_evolution, "Salvatore Papa")
     print(f"Q6: {t:.2f} ms")
+    res, t = measure(q6_career_evolution_unwind, "Salvatore Papa")
+    print(f"Q6 (unwind): {t:.2f} ms")
     
     res, t = measure(q7_top3_per_genre)
     print(f"Q7: {t:.2f} ms")
@@ -2,9 +2,9 @@ from pymongo import MongoClient
 import time
 
 
-client = MongoClient("mongodb://localhost:27017/", directConnection=True)
-
-def setup():
+def setup(client=None):
+    if client is None:
+        client = MongoClient("mongodb://localhost:27017/", directConnection=True)
     try:
         config = {
             '_id': "rs0",
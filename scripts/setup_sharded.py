@@ -0,0 +1,110 @@
+"""
+Cluster shardé local de test : un config server (Replica Set cfg), deux shards
+(Replica Sets shard1 et shard2, un membre chacun) et un routeur mongos.
+
+    python scripts/setup_sharded.py          # démarre et configure le cluster
+    python scripts/setup_sharded.py stop     # arrête les processus
+
+Les données vont dans data/mongo/sharded/, les journaux à côté (*.log).
+L'application et les migrations utilisent alors mongodb://localhost:27030/
+(--mongo-uri de cli.py) ; movies/mongo_sharding.py shard les collections.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pymongo import MongoClient
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'mongo', 'sharded')
+MONGOS_PORT = 27030
+CONFIG = ("cfg", 27040)
+SHARDS = [("shard1", 27041), ("shard2", 27042)]
+MONGOS_URI = f"mongodb://localhost:{MONGOS_PORT}/"
+
+
+def _spawn(name, args):
+    os.makedirs(BASE_DIR, exist_ok=True)
+    log = open(os.path.join(BASE_DIR, f"{name}.log"), "a")
+    return subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT)
+
+
+def _start_mongod(name, port, role):
+    dbpath = os.path.join(BASE_DIR, name)
+    os.makedirs(dbpath, exist_ok=True)
+    _spawn(name, ["mongod", role, "--replSet", name, "--port", str(port),
+                  "--dbpath", dbpath, "--bind_ip", "localhost"])
+
+
+def _wait(port, timeout=30):
+    client = MongoClient(f"mongodb://localhost:{port}/", directConnection=True, serverSelectionTimeoutMS=1000)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            client.admin.command("ping")
+            return client
+        except Exception:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def _initiate(name, port, configsvr=False):
+    """Replica Set à un membre ; attend qu'il soit PRIMARY."""
+    client = _wait(port)
+    config = {'_id': name, 'members': [{'_id': 0, 'host': f"localhost:{port}"}]}
+    if configsvr:
+        config['configsvr'] = True
+    try:
+        client.admin.command("replSetInitiate", config)
+    except Exception as e:
+        if "already initialized" not in str(e):
+            raise
+    while not client.admin.command("hello").get("isWritablePrimary"):
+        time.sleep(0.5)
+    print(f" - {name} (localhost:{port}) : PRIMARY")
+    client.close()
+
+
+def start():
+    print(" Démarrage du config server et des shards...")
+    _start_mongod(CONFIG[0], CONFIG[1], "--configsvr")
+    for name, port in SHARDS:
+        _start_mongod(name, port, "--shardsvr")
+
+    _initiate(*CONFIG, configsvr=True)
+    for name, port in SHARDS:
+        _initiate(name, port)
+
+    print(" Démarrage de mongos...")
+    _spawn("mongos", ["mongos", "--configdb", f"{CONFIG[0]}/localhost:{CONFIG[1]}",
+                      "--port", str(MONGOS_PORT), "--bind_ip", "localhost"])
+    client = _wait(MONGOS_PORT)
+
+    existing = {shard["_id"] for shard in client.admin.command("listShards")["shards"]}
+    for name, port in SHARDS:
+        if name not in existing:
+            client.admin.command("addShard", f"{name}/localhost:{port}")
+    print(f"\n Cluster prêt : {MONGOS_URI}")
+    for shard in client.admin.command("listShards")["shards"]:
+        print(f" - {shard['_id']} : {shard['host']}")
+    client.close()
+
+
+def stop():
+    for name, port in [("mongos", MONGOS_PORT)] + SHARDS + [CONFIG]:
+        try:
+            client = MongoClient(f"mongodb://localhost:{port}/", directConnection=True,
+                                 serverSelectionTimeoutMS=2000)
+            client.admin.command("shutdown", force=True)
+        except Exception:
+            # La connexion se ferme pendant l'arrêt : erreur attendue
+            pass
+        print(f" - {name} arrêté")
+
+
+if __name__ == "__main__":
+    if "stop" in sys.argv[1:]:
+        stop()
+    else:
+        start()